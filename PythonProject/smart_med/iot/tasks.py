@@ -5,6 +5,8 @@ from datetime import timedelta
 from firebase_admin import messaging
 
 from medications.models import Plan
+from notifications.services import FcmOutgoing, send_fcm_batch
+from notifications.tokens import active_tokens
 
 logger = logging.getLogger("celery")   # ⭐ Celery용 로거 사용
 
@@ -63,31 +65,43 @@ def check_medication_schedule():
         taken_at__minute=minute,
     ).select_related("regihistory__user")
 
-    count = 0
+    plans = list(plans)
+    tokens_by_user = active_tokens(plan.regihistory.user_id for plan in plans)
+    outgoing = []
 
     for plan in plans:
         user = plan.regihistory.user
+        tokens = tokens_by_user.get(user.id)
 
-        if not user.fcm_token:
+        if not tokens:
             logger.warning(f"[FCM] FCM 토큰 없음 → user_id={user.id}")
             continue
 
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title="복약 알림",
-                body=f"{user.username}님, {plan.med_name} 복약 시간이 되었습니다.",
-            ),
-            token=user.fcm_token,
-        )
-
-        try:
-            messaging.send(message)
-            count += 1
+        # 유저의 활성 디바이스마다 1개 (같은 send_each 배치로 발송)
+        for token in tokens:
+            message = messaging.Message(
+                notification=messaging.Notification(
+                    title="복약 알림",
+                    body=f"{user.username}님, {plan.med_name} 복약 시간이 되었습니다.",
+                ),
+                token=token,
+            )
+            outgoing.append(FcmOutgoing(message, context=(user, plan)))
+
+    # 500개씩 send_each 일괄 발송
+    report = send_fcm_batch(outgoing, tag="FCM")
+
+    for result in report.results:
+        user, plan = result.outgoing.context
+        if result.success:
             logger.info(f"[FCM] 복약 알림 전송 성공 → user_id={user.id}, plan_id={plan.id}")
+        else:
+            logger.error(
+                f"[FCM] 복약 알림 전송 실패 → user_id={user.id}, plan_id={plan.id}, "
+                f"code={result.error_code}, error={result.error}"
+            )
 
-        except Exception as e:
-            logger.error(f"[FCM] 복약 알림 전송 실패 → user_id={user.id}, plan_id={plan.id}, error={e}")
-
+    count = report.success_count
     logger.info(f"[FCM] 총 {count}건의 복약 알림 발송 완료")
 
     return f"{count}건의 복약 알림 발송"
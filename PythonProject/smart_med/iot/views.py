@@ -63,7 +63,7 @@ def ingest(request):
     plans = Plan.objects.filter(
         regihistory__in=regi_list,
         use_alarm=True
-    )
+    ).order_by("-created_at")
 
     current_plan = None
     for p in plans:
@@ -171,7 +171,7 @@ class CommandView(APIView):
             regihistory__in=regi_list,
             use_alarm=True,
             taken__isnull=True
-        )
+        ).order_by("-created_at")
 
         time_signal = False
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MedicationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "medications"
+
+    def ready(self):
+        # Plan 저장/삭제 → 알림 이벤트 스케줄러 반영
+        from . import signals  # noqa: F401
@@ -0,0 +1,361 @@
+# medications/management/commands/plan_index_bench.py
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from medications.models import Plan, RegiHistory
+
+User = get_user_model()
+
+# 벤치마크 데이터 표시 (정리할 때 이 값으로만 지움)
+BENCH_EMAIL_PREFIX = "plan-bench-"
+BENCH_EMAIL_DOMAIN = "@bench.local"
+BENCH_MED_NAME = "__plan_bench__"
+
+# 0004_plan_indexes 이전의 FK 단일 인덱스 (before 단계에서 임시로 다시 만듦)
+LEGACY_FK_INDEX = "plan_bench_regihistory_id"
+
+_SEED_SQL = """
+INSERT INTO plan (regihistory_id, med_name, taken_at, ex_taken_at, meal_time, note, taken, use_alarm, created_at, updated_at)
+SELECT
+    (%(ids)s::bigint[])[1 + (s.g %% %(n)s)],
+    %(med_name)s,
+    s.taken_at,
+    NULL,
+    'after',
+    NULL,
+    CASE WHEN s.taken_at < now() AND random() < %(taken_ratio)s
+         THEN s.taken_at + random() * interval '30 minutes' END,
+    random() < %(alarm_ratio)s,
+    s.taken_at - interval '7 days',
+    now()
+FROM (
+    SELECT
+        g,
+        date_trunc('day', now())
+            + (floor(random() * %(days)s) - %(half_days)s) * interval '1 day'
+            + (ARRAY[interval '8 hours', interval '12 hours 30 minutes', interval '19 hours'])[1 + floor(random() * 3)::int]
+            + floor(random() * 30) * interval '1 minute' AS taken_at
+    FROM generate_series(%(start)s, %(stop)s) AS g
+) s
+"""
+
+
+def _walk(node, found):
+    """EXPLAIN JSON 노드 트리 → 스캔 방식 (Index Scan(plan_alarm_taken_at_idx) / Seq Scan(plan) ...)"""
+    node_type = node.get("Node Type", "")
+    if "Scan" in node_type:
+        target = node.get("Index Name") or node.get("Relation Name") or ""
+        found.append(f"{node_type}({target})" if target else node_type)
+    elif node_type in ("Sort", "Incremental Sort"):
+        found.append(node_type)
+    for child in node.get("Plans", []):
+        _walk(child, found)
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan 알림 작업 조회(정시 / 재알림 / 미복용 / IoT / 오늘 일정 ...)를 EXPLAIN ANALYZE 로 실행해 "
+        "인덱스 적용 전(before: 0004_plan_indexes 인덱스 삭제 + 기본 ordering)과 후(after)를 비교합니다. "
+        "벤치마크용 유저/등록이력/Plan(기본 200만 개)을 SQL 로 생성하며 signal(알림 스케줄러)은 거치지 않습니다. "
+        "before 는 트랜잭션 안에서 인덱스를 지웠다가 롤백하므로 그동안 plan 테이블이 잠깁니다 → 운영 DB 에서 실행하지 마세요."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plans", type=int, default=2_000_000, help="생성할 Plan 수 (기본 200만)")
+        parser.add_argument("--users", type=int, default=20_000, help="생성할 유저 수 (기본 2만)")
+        parser.add_argument("--regis-per-user", type=int, default=3, help="유저당 등록이력 수 (기본 3)")
+        parser.add_argument("--days", type=int, default=60, help="taken_at 분포 기간(일, 오늘 기준 앞뒤 절반씩, 기본 60)")
+        parser.add_argument("--taken-ratio", type=float, default=0.85, help="지난 Plan 중 복용 완료 비율 (기본 0.85)")
+        parser.add_argument("--alarm-ratio", type=float, default=0.8, help="use_alarm=True 비율 (기본 0.8)")
+        parser.add_argument("--seed", type=float, default=0.42, help="setseed 값 (-1 ~ 1)")
+        parser.add_argument("--runs", type=int, default=5, help="조회별 실행 횟수, 첫 실행은 워밍업 (기본 5)")
+        parser.add_argument("--phase", choices=["both", "before", "after"], default="both")
+        parser.add_argument("--show-plans", action="store_true", help="after 단계의 EXPLAIN 전체 출력")
+        parser.add_argument("--reseed", action="store_true", help="기존 벤치마크 데이터를 지우고 다시 생성")
+        parser.add_argument("--cleanup", action="store_true", help="벤치마크 데이터만 지우고 종료")
+
+    # ==================================================
+    # 데이터 생성 / 정리
+    # ==================================================
+    def _bench_users(self):
+        return User.objects.filter(email__startswith=BENCH_EMAIL_PREFIX, email__endswith=BENCH_EMAIL_DOMAIN)
+
+    def _cleanup(self):
+        t0 = time.perf_counter()
+        user_ids = list(self._bench_users().values_list("id", flat=True))
+        if not user_ids:
+            return
+        with connection.cursor() as cursor:
+            # Django cascade 는 Plan 을 한 건씩 모으므로 수백만 건은 SQL 로 직접 삭제
+            cursor.execute(
+                "DELETE FROM plan WHERE regihistory_id IN (SELECT id FROM regihistory WHERE user_id = ANY(%s))",
+                [user_ids],
+            )
+            plans = cursor.rowcount
+            cursor.execute("DELETE FROM regihistory WHERE user_id = ANY(%s)", [user_ids])
+        self._bench_users().delete()
+        self.stdout.write(
+            f"[BENCH] 기존 데이터 삭제 → users={len(user_ids)}, plans={plans} ({time.perf_counter() - t0:.1f}s)"
+        )
+
+    def _seed(self, options):
+        t0 = time.perf_counter()
+        n_users = options["users"]
+
+        User.objects.bulk_create(
+            [
+                User(
+                    email=f"{BENCH_EMAIL_PREFIX}{i}{BENCH_EMAIL_DOMAIN}",
+                    username=f"bench{i}",
+                    password="!",  # 로그인 불가
+                )
+                for i in range(n_users)
+            ],
+            batch_size=2000,
+        )
+        user_ids = list(self._bench_users().values_list("id", flat=True))
+
+        RegiHistory.objects.bulk_create(
+            [
+                RegiHistory(user_id=uid, regi_type="bench", label=f"bench-{j}")
+                for uid in user_ids
+                for j in range(options["regis_per_user"])
+            ],
+            batch_size=5000,
+        )
+        regi_ids = list(RegiHistory.objects.filter(user_id__in=user_ids).values_list("id", flat=True))
+        self.stdout.write(f"[BENCH] users={len(user_ids)}, regihistories={len(regi_ids)} ({time.perf_counter() - t0:.1f}s)")
+
+        total = options["plans"]
+        chunk = 500_000
+        params = {
+            "ids": regi_ids,
+            "n": len(regi_ids),
+            "med_name": BENCH_MED_NAME,
+            "taken_ratio": options["taken_ratio"],
+            "alarm_ratio": options["alarm_ratio"],
+            "days": options["days"],
+            "half_days": options["days"] // 2,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT setseed(%s)", [options["seed"]])
+            for start in range(1, total + 1, chunk):
+                stop = min(total, start + chunk - 1)
+                cursor.execute(_SEED_SQL, {**params, "start": start, "stop": stop})
+                self.stdout.write(f"[BENCH] plans {stop}/{total} ({time.perf_counter() - t0:.1f}s)")
+            cursor.execute("ANALYZE plan")
+            cursor.execute("ANALYZE regihistory")
+
+        self.stdout.write(self.style.SUCCESS(f"[BENCH] 데이터 생성 완료 ({time.perf_counter() - t0:.1f}s)"))
+
+    # ==================================================
+    # 조회 (medications.tasks / views, iot 와 같은 조건)
+    # ==================================================
+    def _queries(self, sample):
+        """(이름, QuerySet, 기존 기본 ordering(-created_at)이 붙던 조회인지)"""
+        at = sample["taken_at"]
+        minute = at.replace(second=0, microsecond=0)
+        one = timedelta(minutes=1)
+        t10 = minute - timedelta(minutes=10)
+        t20 = minute - timedelta(minutes=20)
+        day_start = timezone.localtime(at).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        return [
+            (
+                "send_med_alarms",
+                Plan.objects.filter(use_alarm=True, taken_at__gte=minute, taken_at__lt=minute + one)
+                .select_related("regihistory__user"),
+                True,
+            ),
+            (
+                "send_user_reminders",
+                Plan.objects.filter(
+                    Q(taken_at__range=(t10, t10 + one)) | Q(taken_at__range=(t20, t20 + one)),
+                    use_alarm=True,
+                    taken__isnull=True,
+                ).select_related("regihistory__user"),
+                True,
+            ),
+            (
+                "check_missed",
+                Plan.objects.filter(
+                    taken_at__range=(at - timedelta(days=1), at - timedelta(minutes=30)),
+                    taken__isnull=True,
+                ).select_related("regihistory__user"),
+                True,
+            ),
+            (
+                "iot_is_time",
+                Plan.objects.filter(
+                    taken_at__gte=at - timedelta(minutes=30),
+                    taken_at__lte=at + timedelta(minutes=30),
+                    use_alarm=True,
+                ).select_related("regihistory__user"),
+                True,
+            ),
+            (
+                "rebuild_schedule",
+                Plan.objects.filter(taken_at__gte=at - timedelta(days=1, minutes=30), taken__isnull=True)
+                .only("id", "taken_at", "taken", "use_alarm")
+                .order_by(),
+                False,
+            ),
+            (
+                "plan_today",
+                Plan.objects.filter(
+                    regihistory__user_id=sample["user_id"],
+                    taken_at__gte=day_start,
+                    taken_at__lt=day_start + timedelta(days=1),
+                ).order_by("taken_at"),
+                False,
+            ),
+            (
+                "plan_list",
+                Plan.objects.filter(regihistory__user_id=sample["user_id"]).order_by("-created_at"),
+                False,
+            ),
+            (
+                "plan_siblings",
+                Plan.objects.filter(regihistory_id=sample["regihistory_id"], taken_at=at).exclude(id=sample["id"]),
+                True,
+            ),
+            (
+                "iot_device_plans",
+                Plan.objects.filter(
+                    regihistory__in=sample["regi_ids"],
+                    use_alarm=True,
+                    taken__isnull=True,
+                ).order_by("-created_at"),
+                False,
+            ),
+        ]
+
+    # ==================================================
+    # EXPLAIN ANALYZE
+    # ==================================================
+    def _explain(self, cursor, qs, text=False):
+        sql, params = qs.query.sql_with_params()
+        if text:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        raw = cursor.fetchone()[0]
+        result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        root = result["Plan"]
+        return {
+            "exec_ms": result["Execution Time"],
+            "plan_ms": result["Planning Time"],
+            "rows": root.get("Actual Rows", 0),
+            "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+            "nodes": _walk(root, []),
+        }
+
+    def _run_phase(self, name, queries, runs, legacy, show_plans=False):
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING(f"[{name}]"))
+        self.stdout.write(f"{'query':<22}{'exec ms':>10}{'plan ms':>9}{'rows':>9}{'buffers':>10}  scans")
+
+        results = {}
+        with connection.cursor() as cursor:
+            for label, qs, had_ordering in queries:
+                if legacy and had_ordering:
+                    qs = qs.order_by("-created_at")
+
+                samples = [self._explain(cursor, qs) for _ in range(max(2, runs))][1:]  # 첫 실행은 워밍업
+                last = samples[-1]
+                exec_ms = statistics.median(s["exec_ms"] for s in samples)
+                plan_ms = statistics.median(s["plan_ms"] for s in samples)
+                results[label] = exec_ms
+
+                self.stdout.write(
+                    f"{label:<22}{exec_ms:>10.2f}{plan_ms:>9.2f}{last['rows']:>9}{last['buffers']:>10}  "
+                    f"{', '.join(last['nodes'])}"
+                )
+                if show_plans:
+                    self.stdout.write(self._explain(cursor, qs, text=True))
+                    self.stdout.write("")
+        return results
+
+    def _before(self, queries, runs):
+        """0004_plan_indexes 인덱스를 지우고(FK 단일 인덱스는 다시 만들고) 측정 후 롤백"""
+        names = [index.name for index in Plan._meta.indexes]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index_name in names:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+                cursor.execute(f'CREATE INDEX "{LEGACY_FK_INDEX}" ON plan (regihistory_id)')
+                cursor.execute("ANALYZE plan")
+            results = self._run_phase("before: FK 인덱스만 + ORDER BY created_at", queries, runs, legacy=True)
+            transaction.set_rollback(True)
+        return results
+
+    def _check_indexes(self):
+        names = {index.name for index in Plan._meta.indexes}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'plan'")
+            existing = {row[0] for row in cursor.fetchall()}
+        missing = sorted(names - existing)
+        if missing:
+            raise CommandError(f"plan 인덱스가 없습니다: {missing} → python manage.py migrate medications 먼저 실행")
+
+    # ==================================================
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("PostgreSQL 에서만 실행할 수 있습니다.")
+
+        if options["cleanup"] or options["reseed"]:
+            self._cleanup()
+            if options["cleanup"]:
+                return
+
+        if not self._bench_users().exists():
+            self._seed(options)
+
+        self._check_indexes()
+
+        sample = (
+            Plan.objects.filter(med_name=BENCH_MED_NAME, taken_at__gte=timezone.now())
+            .order_by()
+            .values("id", "taken_at", "regihistory_id", "regihistory__user_id")
+            .first()
+        )
+        if not sample:
+            raise CommandError("벤치마크 Plan 이 없습니다 → --reseed 로 다시 생성하세요.")
+        sample["user_id"] = sample.pop("regihistory__user_id")
+        sample["regi_ids"] = list(RegiHistory.objects.filter(user_id=sample["user_id"]).values_list("id", flat=True))
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM plan")
+            total = cursor.fetchone()[0]
+        self.stdout.write(
+            f"[BENCH] plan rows={total}, 기준 시각={timezone.localtime(sample['taken_at']):%Y-%m-%d %H:%M}, "
+            f"user_id={sample['user_id']}, runs={options['runs']}"
+        )
+
+        queries = self._queries(sample)
+        before = after = None
+        if options["phase"] in ("both", "before"):
+            before = self._before(queries, options["runs"])
+        if options["phase"] in ("both", "after"):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE plan")
+            after = self._run_phase("after: 0004_plan_indexes", queries, options["runs"], legacy=False,
+                                    show_plans=options["show_plans"])
+
+        if before and after:
+            self.stdout.write("")
+            self.stdout.write(self.style.MIGRATE_HEADING("[before → after] exec ms (median)"))
+            for label in after:
+                b, a = before[label], after[label]
+                speedup = b / a if a else float("inf")
+                self.stdout.write(f"{label:<22}{b:>10.2f} → {a:>9.2f}  x{speedup:.1f}")
@@ -0,0 +1,29 @@
+# medications/management/commands/rebuild_alarm_schedule.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from medications import scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "DB 의 미복용 Plan 으로 복약 알림 이벤트(Redis sorted set)를 다시 채웁니다. "
+        "스케줄러를 처음 켤 때 / Redis 데이터를 잃었을 때 / signal 을 거치지 않고 Plan 을 대량 수정했을 때 실행합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="한 번에 읽고 쓰는 Plan 수 (기본 2000)")
+
+    def handle(self, *args, **options):
+        before = scheduler.pending_count()
+        t0 = time.perf_counter()
+        count = scheduler.rebuild_schedule(chunk_size=options["chunk_size"])
+        elapsed = time.perf_counter() - t0
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"알림 이벤트 재구성 완료: {before}개 → {scheduler.pending_count()}개 "
+                f"(등록 {count}개, {elapsed:.2f}s)"
+            )
+        )
@@ -0,0 +1,61 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY 는 트랜잭션 안에서 실행할 수 없음 (운영 중 plan 쓰기를 막지 않도록)
+    atomic = False
+
+    dependencies = [
+        ("medications", "0003_alter_plan_regihistory_alter_regihistory_label"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="plan",
+            options={},
+        ),
+        AddIndexConcurrently(
+            model_name="plan",
+            index=models.Index(
+                condition=models.Q(("use_alarm", True)),
+                fields=["taken_at"],
+                name="plan_alarm_taken_at_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="plan",
+            index=models.Index(
+                condition=models.Q(("taken__isnull", True)),
+                fields=["taken_at"],
+                name="plan_untaken_taken_at_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="plan",
+            index=models.Index(
+                condition=models.Q(("taken__isnull", True), ("use_alarm", True)),
+                fields=["taken_at"],
+                name="plan_alarm_untaken_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="plan",
+            index=models.Index(
+                fields=["regihistory", "taken_at"],
+                name="plan_regi_taken_at_idx",
+            ),
+        ),
+        # 복합 인덱스가 생긴 뒤 FK 단일 인덱스 삭제
+        migrations.AlterField(
+            model_name="plan",
+            name="regihistory",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="medications.regihistory",
+            ),
+        ),
+    ]
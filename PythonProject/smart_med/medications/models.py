@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 from iot.models import Device
@@ -58,9 +59,11 @@ class RegiHistory(models.Model):
 class Plan(models.Model):
     #PK id자동생성
     # user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # FK 단일 인덱스 대신 (regihistory_id, taken_at) 복합 인덱스의 앞 컬럼으로 조회 (Meta.indexes)
     regihistory = models.ForeignKey(
         RegiHistory,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
 
     med_name = models.CharField(null=True, max_length=120)
@@ -83,7 +86,22 @@ class Plan(models.Model):
 
     class Meta:
         db_table = "plan"
-        ordering = ["-created_at"]
+        # 기본 ordering 없음: 알림 작업 조회마다 정렬이 붙지 않도록, 순서가 필요한 곳에서 order_by
+        # 인덱스는 알림 작업 조회 기준 (python manage.py plan_index_bench 로 EXPLAIN ANALYZE 비교)
+        indexes = [
+            # 정시 알림 / IoT is_time: use_alarm AND taken_at 범위
+            models.Index(fields=["taken_at"], name="plan_alarm_taken_at_idx", condition=Q(use_alarm=True)),
+            # 미복용 보호자 알림 / 스케줄러 재구성: taken IS NULL AND taken_at 범위
+            models.Index(fields=["taken_at"], name="plan_untaken_taken_at_idx", condition=Q(taken__isnull=True)),
+            # 10/20분 재알림: use_alarm AND taken IS NULL AND taken_at 범위 (가장 작은 인덱스)
+            models.Index(
+                fields=["taken_at"],
+                name="plan_alarm_untaken_idx",
+                condition=Q(use_alarm=True, taken__isnull=True),
+            ),
+            # 유저/등록이력별 조회 (오늘 일정, 같은 시간 형제 Plan, IoT 기기별 Plan) + FK 조회/삭제
+            models.Index(fields=["regihistory", "taken_at"], name="plan_regi_taken_at_idx"),
+        ]
 
     def __str__(self):
         return f" {self.med_name} ({self.taken_at})"
\ No newline at end of file
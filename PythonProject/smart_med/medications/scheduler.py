@@ -0,0 +1,294 @@
+# medications/scheduler.py
+"""
+복약 알림 이벤트 스케줄러 (Redis sorted set)
+
+매 분 Plan 테이블을 시간 범위로 다시 훑던 3개 작업
+(send_med_alarms_task / send_user_reminders_task / check_missed_medication) 대신
+Plan 이 생성/수정/미루기/복용될 때 그 Plan 의 알림 이벤트를 미리 넣어 두고
+dispatch_due_alarms_task 가 시각이 된 이벤트만 꺼내 보낸다.
+→ 분당 DB 부하가 Plan 전체 개수가 아니라 그 분에 도래한 이벤트 수에 비례
+
+- member = "{종류}:{plan_id}", score = 발송 시각(epoch 초)
+    alarm    : taken_at        (use_alarm, 미복용)
+    remind10 : taken_at + 10분 (use_alarm, 미복용)
+    remind20 : taken_at + 20분 (use_alarm, 미복용)
+    missed   : taken_at + 30분 (미복용) → 보호자
+- Plan 1개의 이벤트는 항상 통째로 다시 계산해서 덮어씀 (_write_plans)
+- Plan 저장/삭제는 medications.signals 가, QuerySet.update() 는 호출한 곳에서 schedule_plans 로 반영
+- 꺼내기는 Lua 스크립트로 조회+삭제를 한 번에 → 디스패처가 여러 개여도 같은 이벤트를 두 번 보내지 않음
+  꺼낸 이벤트는 처리 중 sorted set(PROCESSING_KEY, score = lease 만료 시각)으로 옮기고
+  Notification 등록 후 ack_events 로 지움 → 워커가 죽거나 시간 제한에 걸리면 lease 만료 후 다시 꺼냄
+  (중복 등록은 Notification.dedupe_key 로 막음)
+- Redis 가 비워지면(키 없음) 디스패처가 DB 에서 다시 채움 (rebuild_schedule)
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+logger = logging.getLogger("celery")
+
+SCHEDULE_KEY = "alarm:schedule"
+PROCESSING_KEY = "alarm:schedule:processing"
+BUILT_KEY = "alarm:schedule:built"
+REBUILD_LOCK_KEY = "alarm:schedule:rebuild_lock"
+
+EVENT_ALARM = "alarm"
+EVENT_REMIND_10 = "remind10"
+EVENT_REMIND_20 = "remind20"
+EVENT_MISSED = "missed"
+
+# 종류 → taken_at 이후 지연
+EVENT_OFFSETS = {
+    EVENT_ALARM: timedelta(0),
+    EVENT_REMIND_10: timedelta(minutes=10),
+    EVENT_REMIND_20: timedelta(minutes=20),
+    EVENT_MISSED: timedelta(minutes=30),
+}
+
+# 미복용 알림은 기존 check_missed_medication 과 같이 24시간 안이면 늦게라도 보냄
+MISSED_WINDOW = timedelta(days=1)
+
+# 1) lease 가 만료된 처리 중 이벤트를 다시 넣고 (그 사이 Plan 이 바뀌어 새 이벤트가 있으면 NX 로 유지)
+# 2) 시각이 된 이벤트를 조회 + 삭제 → 처리 중 set 에 "member@due" 로 이동 (원자적)
+_POP_DUE_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, m in ipairs(expired) do
+    local member, due = string.match(m, '^(.*)@([^@]*)$')
+    if member then
+        redis.call('ZADD', KEYS[1], 'NX', due, member)
+    end
+    redis.call('ZREM', KEYS[2], m)
+end
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+local lease_until = tonumber(ARGV[1]) + tonumber(ARGV[3])
+for i = 1, #items, 2 do
+    redis.call('ZREM', KEYS[1], items[i])
+    redis.call('ZADD', KEYS[2], lease_until, items[i] .. '@' .. items[i + 1])
+end
+return items
+"""
+
+
+@dataclass
+class DueEvent:
+    kind: str
+    plan_id: int
+    due: float
+    lease: str = ""  # 처리 중 set 의 member ("{kind}:{plan_id}@{due}")
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _member(kind: str, plan_id: int) -> str:
+    return f"{kind}:{plan_id}"
+
+
+def _members(plan_id: int) -> List[str]:
+    return [_member(kind, plan_id) for kind in EVENT_OFFSETS]
+
+
+def plan_events(plan) -> Dict[str, float]:
+    """Plan 현재 상태 → {member: 발송 시각} (보낼 이벤트만)"""
+    if plan.taken_at is None or plan.taken is not None:
+        return {}
+
+    events = {}
+    for kind, offset in EVENT_OFFSETS.items():
+        if kind != EVENT_MISSED and not plan.use_alarm:
+            continue
+        events[_member(kind, plan.id)] = (plan.taken_at + offset).timestamp()
+    return events
+
+
+def max_delay_seconds() -> int:
+    """정시/재알림 이벤트를 이만큼 넘게 늦게 꺼내면 보내지 않음 (디스패처 중단 후 몰아서 보내기 방지)"""
+    return getattr(settings, "ALARM_EVENT_MAX_DELAY_SECONDS", 300)
+
+
+def is_expired(kind: str, due: float, now: float) -> bool:
+    if kind == EVENT_MISSED:
+        return due < now - MISSED_WINDOW.total_seconds()
+    return due < now - max_delay_seconds()
+
+
+def _write_plans(pipe, plans: Iterable, now: float) -> int:
+    """
+    Plan 별 이벤트 덮어쓰기
+    - 보낼 필요 없는 이벤트(복용/알람 끔/삭제)는 ZREM
+    - 앞으로 올 이벤트는 ZADD
+    - 이미 시각이 지난 정시/재알림은 아직 안 꺼내진 경우에만 갱신 (ZADD XX) → 이미 보낸 알림을 다시 넣지 않음
+    - 시각이 지난 미복용 이벤트는 MISSED_WINDOW 안이면 그냥 ZADD
+      (taken_at 이 지난 뒤 만들거나 시간을 바꾼 Plan 도 미복용 알림을 받도록, 중복은 Notification.dedupe_key 로 막음)
+    """
+    count = 0
+    for plan in plans:
+        events = plan_events(plan)
+
+        stale = [m for m in _members(plan.id) if m not in events]
+        if stale:
+            pipe.zrem(SCHEDULE_KEY, *stale)
+
+        add, update_only = {}, {}
+        for member, due in events.items():
+            kind = member.split(":", 1)[0]
+            if due > now or (kind == EVENT_MISSED and not is_expired(kind, due, now)):
+                add[member] = due
+            elif not is_expired(kind, due, now):
+                update_only[member] = due
+
+        if add:
+            pipe.zadd(SCHEDULE_KEY, add)
+        if update_only:
+            pipe.zadd(SCHEDULE_KEY, update_only, xx=True)
+        count += len(add) + len(update_only)
+    return count
+
+
+# ==================================================
+# 생성 / 수정 / 삭제 시 호출
+# ==================================================
+def is_enabled() -> bool:
+    return getattr(settings, "ALARM_SCHEDULER_ENABLED", True)
+
+
+def schedule_plans(plans: Iterable) -> int:
+    """Plan 들의 이벤트를 현재 상태로 다시 넣음 (복용/알람 끔이면 취소만 됨), 넣은 이벤트 수 반환"""
+    plans = list(plans)
+    if not plans or not is_enabled():
+        return 0
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        count = _write_plans(pipe, plans, time.time())
+        pipe.execute()
+        return count
+    except Exception as e:
+        # Redis 장애여도 Plan 저장은 성공해야 함 → 복구 후 rebuild_alarm_schedule
+        logger.error(f"[SCHEDULER] 이벤트 등록 실패 → plan_ids={[p.id for p in plans][:10]}, error={e}")
+        return 0
+
+
+def schedule_plan(plan) -> int:
+    return schedule_plans([plan])
+
+
+def cancel_plans(plan_ids: Iterable[int]) -> None:
+    members = [m for pid in plan_ids for m in _members(pid)]
+    if not members or not is_enabled():
+        return
+    try:
+        _redis().zrem(SCHEDULE_KEY, *members)
+    except Exception as e:
+        logger.error(f"[SCHEDULER] 이벤트 취소 실패 → members={members[:8]}, error={e}")
+
+
+# ==================================================
+# 디스패처
+# ==================================================
+def lease_seconds() -> int:
+    """꺼낸 이벤트를 ack 없이 이 시간이 지나면 다시 꺼냄 (알림 작업 hard time limit 보다 길게)"""
+    return getattr(settings, "ALARM_EVENT_LEASE_SECONDS", 120)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def pop_due_events(now: Optional[float] = None, limit: Optional[int] = None) -> List[DueEvent]:
+    """
+    시각이 된 이벤트를 꺼냄 (sorted set 에서 삭제 → 처리 중 set 으로 이동)
+    처리가 끝나면 ack_events, 실패하면 release_events (둘 다 못 하면 lease 만료 후 다시 꺼내짐)
+    """
+    now = time.time() if now is None else now
+    limit = limit or getattr(settings, "ALARM_DISPATCH_BATCH", 5000)
+
+    raw = _redis().eval(_POP_DUE_LUA, 2, SCHEDULE_KEY, PROCESSING_KEY, now, limit, lease_seconds())
+
+    events = []
+    for i in range(0, len(raw), 2):
+        member, score = _text(raw[i]), _text(raw[i + 1])
+        kind, plan_id = member.split(":", 1)
+        events.append(DueEvent(kind=kind, plan_id=int(plan_id), due=float(score), lease=f"{member}@{score}"))
+    return events
+
+
+def ack_events(events: Iterable[DueEvent]) -> None:
+    """처리(Notification 등록)가 끝난 이벤트를 처리 중 set 에서 삭제"""
+    leases = [e.lease for e in events if e.lease]
+    if leases:
+        _redis().zrem(PROCESSING_KEY, *leases)
+
+
+def release_events(events: Iterable[DueEvent]) -> None:
+    """처리에 실패한 이벤트를 바로 다시 넣음 (lease 만료를 기다리지 않음, 새 이벤트가 있으면 유지)"""
+    events = [e for e in events if e.lease]
+    if not events:
+        return
+    pipe = _redis().pipeline(transaction=True)
+    pipe.zadd(SCHEDULE_KEY, {_member(e.kind, e.plan_id): e.due for e in events}, nx=True)
+    pipe.zrem(PROCESSING_KEY, *[e.lease for e in events])
+    pipe.execute()
+
+
+def is_current(plan, event: DueEvent) -> bool:
+    """꺼낸 이벤트가 Plan 의 현재 상태와 맞는지 (그 사이 복용/알람 끔/시간 변경이 signal 을 거치지 않은 경우 대비)"""
+    due = plan_events(plan).get(_member(event.kind, plan.id))
+    return due is not None and abs(due - event.due) < 1
+
+
+def pending_count() -> int:
+    return _redis().zcard(SCHEDULE_KEY)
+
+
+def rebuild_schedule(chunk_size: int = 2000) -> int:
+    """DB 의 미복용 Plan 으로 sorted set 을 다시 채움 (배포 직후 / Redis 초기화 후), 넣은 이벤트 수 반환"""
+    from .models import Plan
+
+    r = _redis()
+    now = time.time()
+    since = timezone.now() - MISSED_WINDOW - EVENT_OFFSETS[EVENT_MISSED]
+
+    qs = (
+        Plan.objects.filter(taken_at__gte=since, taken__isnull=True)
+        .only("id", "taken_at", "taken", "use_alarm")
+        .order_by()
+    )
+
+    r.delete(SCHEDULE_KEY)
+    count = 0
+    batch = []
+    for plan in qs.iterator(chunk_size=chunk_size):
+        batch.append(plan)
+        if len(batch) >= chunk_size:
+            pipe = r.pipeline(transaction=False)
+            count += _write_plans(pipe, batch, now)
+            pipe.execute()
+            batch = []
+    if batch:
+        pipe = r.pipeline(transaction=False)
+        count += _write_plans(pipe, batch, now)
+        pipe.execute()
+
+    r.set(BUILT_KEY, str(int(now)))
+    logger.info(f"[SCHEDULER] 재구성 완료 → events={count}")
+    return count
+
+
+def ensure_schedule() -> None:
+    """sorted set 이 한 번도 채워지지 않았으면(Redis 초기화 등) 한 프로세스만 재구성"""
+    r = _redis()
+    if r.exists(BUILT_KEY):
+        return
+    if not r.set(REBUILD_LOCK_KEY, "1", nx=True, ex=300):
+        return
+    try:
+        rebuild_schedule()
+    finally:
+        r.delete(REBUILD_LOCK_KEY)
@@ -0,0 +1,19 @@
+# medications/signals.py
+"""Plan 저장/삭제 → 알림 이벤트 스케줄러(medications.scheduler) 반영 (트랜잭션 커밋 후)"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Plan
+from .scheduler import cancel_plans, schedule_plan
+
+
+@receiver(post_save, sender=Plan, dispatch_uid="medications.plan_schedule")
+def plan_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: schedule_plan(instance))
+
+
+@receiver(post_delete, sender=Plan, dispatch_uid="medications.plan_cancel")
+def plan_deleted(sender, instance, **kwargs):
+    plan_id = instance.id
+    transaction.on_commit(lambda: cancel_plans([plan_id]))
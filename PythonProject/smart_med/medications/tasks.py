@@ -4,15 +4,38 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
-from django.core.cache import cache
-from firebase_admin import messaging
-from notifications.services import send_fcm_to_token, initialize_firebase
+from notifications.outbox import data_payload, dispatch_outbox, enqueue, existing_dedupe_keys, new_notification
+from notifications.tokens import active_tokens
+from . import scheduler
 from .models import Plan
 
 logger = logging.getLogger("celery")
 User = get_user_model()
 
 
+def group_by_regihistory(plans) -> dict:
+    """Plan 목록 → RegiHistory 단위 그룹 {regi_id: {'regihistory', 'plans', 'earliest_time'}}"""
+    regihistory_groups = {}
+    for plan in plans:
+        if not plan.regihistory:
+            continue
+
+        regi_id = plan.regihistory.id
+        if regi_id not in regihistory_groups:
+            regihistory_groups[regi_id] = {
+                'regihistory': plan.regihistory,
+                'plans': [],
+                'earliest_time': plan.taken_at
+            }
+        regihistory_groups[regi_id]['plans'].append(plan)
+
+        # 가장 빠른 복용 시간 저장
+        if plan.taken_at < regihistory_groups[regi_id]['earliest_time']:
+            regihistory_groups[regi_id]['earliest_time'] = plan.taken_at
+
+    return regihistory_groups
+
+
 # ====================================================
 # 1. [Celery Task] 환자 정시 복용 알림 (1분마다 실행)
 # ====================================================
@@ -40,25 +63,30 @@ def send_med_alarms_task():
     ).select_related('regihistory__user')
 
     # 3. RegiHistory 단위로 그룹화
-    regihistory_groups = {}
-    for plan in targets:
-        if plan.regihistory:
-            regi_id = plan.regihistory.id
-            if regi_id not in regihistory_groups:
-                regihistory_groups[regi_id] = {
-                    'regihistory': plan.regihistory,
-                    'plans': [],
-                    'earliest_time': plan.taken_at
-                }
-            regihistory_groups[regi_id]['plans'].append(plan)
-            # 가장 빠른 복용 시간 저장
-            if plan.taken_at < regihistory_groups[regi_id]['earliest_time']:
-                regihistory_groups[regi_id]['earliest_time'] = plan.taken_at
+    regihistory_groups = group_by_regihistory(targets)
 
     logger.info(f"[MED] 발견된 Plan: {targets.count()}개, 그룹화된 RegiHistory: {len(regihistory_groups)}개")
 
-    # 4. RegiHistory 단위로 알림 전송 (High Priority 적용)
-    success_count = 0
+    # 4. RegiHistory 단위로 알림 대기열 등록 (High Priority 적용) → 바로 발송
+    queued = send_alarm_groups(regihistory_groups)
+    stats = dispatch_outbox()
+
+    logger.info(f"[MED] 총 {queued}개 RegiHistory 그룹 알림 등록, 발송 {stats['success']}건")
+    return f"총 {stats['success']}건 전송 완료"
+
+
+def dedupe_time(dt) -> str:
+    """중복 방지 키에 쓰는 복용 시각 (분 단위)"""
+    return dt.strftime("%Y%m%d%H%M")
+
+
+def send_alarm_groups(regihistory_groups: dict) -> int:
+    """환자 정시 복용 알림 (RegiHistory 그룹당 1건) → 알림 대기열(notifications.outbox) 등록, 등록 건수 반환"""
+    # 유저별 활성 디바이스 토큰 (쿼리 1회, 발송은 outbox 가 디바이스 전체로)
+    tokens_by_user = active_tokens(
+        g['regihistory'].user_id for g in regihistory_groups.values() if g['regihistory']
+    )
+    rows = []
     for regi_id, group_data in regihistory_groups.items():
         try:
             regihistory = group_data['regihistory']
@@ -69,9 +97,8 @@ def send_med_alarms_task():
                 continue
 
             user = regihistory.user
-            token = getattr(user, 'fcm_token', None)
 
-            if not token:
+            if not tokens_by_user.get(user.id):
                 logger.warning(f"[MED] FCM 토큰 없음 → user_id={user.id}, username={user.username}")
                 continue
 
@@ -82,44 +109,33 @@ def send_med_alarms_task():
 
             # 🔴 [핵심 수정] Android High Priority 설정
             # 화면이 꺼져 있거나 절전 모드일 때 즉시 깨우기 위한 필수 설정입니다.
-            message = messaging.Message(
-                token=token,
-                data={
-                    "type": "ALARM",
-                    "title": "💊 약 드실 시간이에요!",
-                    "body": f"{user.username}님, [{regihistory.label}] 복용 시간입니다. ({plan_time_str})",
-                    "regihistory_id": str(regihistory.id),
-                    "plan_ids": ",".join(plan_ids),
-                    "plan_count": str(plan_count),
-                    "click_action": "FLUTTER_NOTIFICATION_CLICK"
-                },
-                # 👇 안드로이드 설정: 중요도 높음, 즉시 전송
-                android=messaging.AndroidConfig(
-                    priority='high',
-                    ttl=0,  # 지연 없이 즉시 배달
-                ),
-                # 👇 iOS 설정: 백그라운드 깨우기
-                apns=messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(content_available=True)
-                    )
-                )
-            )
-
-            # 전송
-            response = messaging.send(message)
-
-            success_count += 1
-            logger.info(
-                f"[MED] 알림 전송 성공(High Priority) → user_id={user.id}, regihistory_id={regi_id}, "
-                f"time={plan_time_str}, response={response}"
-            )
+            # (data_payload: Android priority=high, ttl=0 / iOS content_available)
+            payload = data_payload({
+                "type": "ALARM",
+                "title": "💊 약 드실 시간이에요!",
+                "body": f"{user.username}님, [{regihistory.label}] 복용 시간입니다. ({plan_time_str})",
+                "regihistory_id": regihistory.id,
+                "plan_ids": ",".join(plan_ids),
+                "plan_count": plan_count,
+                "click_action": "FLUTTER_NOTIFICATION_CLICK"
+            })
+            rows.append(new_notification(
+                regihistory=regihistory,
+                recipient=user,
+                notification_type="ALARM",
+                payload=payload,
+                dedupe_key=f"ALARM:{regi_id}:{dedupe_time(earliest_time)}",
+                # 정시 알림은 몇 분 지나면 의미 없음
+                expires_at=earliest_time + timedelta(seconds=scheduler.max_delay_seconds()),
+            ))
 
         except Exception as e:
-            logger.error(f"[MED] 알림 전송 실패 → regihistory_id={regi_id}, error={e}")
+            logger.error(f"[MED] 알림 생성 실패 → regihistory_id={regi_id}, error={e}")
 
-    logger.info(f"[MED] 총 {success_count}개 RegiHistory 그룹에 대한 알림 발송 완료")
-    return f"총 {success_count}건 전송 완료"
+    count = enqueue(rows)
+    if count:
+        logger.info(f"[MED] 알림 {count}건 발송 대기열 등록")
+    return count
 
 # ====================================================
 # 2. [Celery Task] 보호자 미복용 알림 (30분 지연)
@@ -130,9 +146,6 @@ def check_missed_medication():
     30분이 지났는데 미복용(taken is NULL)인 건에 대해 보호자에게 알림을 보냅니다.
     ⭐ RegiHistory + 복용시간(earliest_time)을 조합하여 중복 알림을 방지합니다.
     """
-    # Firebase 초기화 (안전장치)
-    initialize_firebase()
-
     now = timezone.now()
     now_kst = timezone.localtime(now)
 
@@ -150,46 +163,53 @@ def check_missed_medication():
     ).select_related('regihistory__user')
 
     # 3. RegiHistory 단위로 그룹화
-    regihistory_groups = {}
-    for plan in missed_plans:
-        if plan.regihistory:
-            regi_id = plan.regihistory.id
-            if regi_id not in regihistory_groups:
-                regihistory_groups[regi_id] = {
-                    'regihistory': plan.regihistory,
-                    'plans': [],
-                    'earliest_time': plan.taken_at
-                }
-            regihistory_groups[regi_id]['plans'].append(plan)
-
-            # 그룹 내에서 가장 오래된(빠른) 미복용 시간 업데이트
-            if plan.taken_at < regihistory_groups[regi_id]['earliest_time']:
-                regihistory_groups[regi_id]['earliest_time'] = plan.taken_at
+    regihistory_groups = group_by_regihistory(missed_plans)
 
     logger.info(f"[MISSED] 발견된 미복용 Plan: {missed_plans.count()}개, 그룹화된 RegiHistory: {len(regihistory_groups)}개")
 
-    # 4. RegiHistory 단위로 알림 전송
-    success_count = 0
+    # 4. RegiHistory 단위로 알림 대기열 등록 → 바로 발송
+    queued = send_missed_groups(regihistory_groups)
+    stats = dispatch_outbox()
+
+    logger.info(f"[MISSED] 총 {queued}개 그룹 알림 등록, 발송 {stats['success']}건")
+    return f"미복용 체크 완료: {stats['success']}건 발송"
+
+
+def send_missed_groups(regihistory_groups: dict) -> int:
+    """
+    보호자 미복용 알림 → 알림 대기열 등록, 등록 건수 반환
+    RegiHistory + 복용시간 조합(dedupe_key)이 이미 등록돼 있으면 건너뜀 (기존 24시간 Redis 키 대체)
+    """
+    # 🟢 [중복 체크 키 생성]
+    # 키 형식: MISSED:{ID}:{YYYYMMDDHHMM}
+    # 약의 종류(ID)와 복용해야 했던 시간(Time)이 모두 같아야만 중복으로 처리
+    dedupe_keys = {
+        regi_id: f"MISSED:{regi_id}:{dedupe_time(group_data['earliest_time'])}"
+        for regi_id, group_data in regihistory_groups.items()
+    }
+    # 이미 등록된 알림은 보호자 조회 전에 한 번에 걸러냄
+    already = existing_dedupe_keys(dedupe_keys.values())
+
+    # 보호자 유저 + 활성 디바이스 토큰 일괄 조회
+    guardian_emails = {
+        g['regihistory'].user.prot_email
+        for regi_id, g in regihistory_groups.items()
+        if dedupe_keys[regi_id] not in already and g['regihistory'].user.prot_email
+    }
+    guardians = {u.email: u for u in User.objects.filter(email__in=guardian_emails)} if guardian_emails else {}
+    tokens_by_user = active_tokens(u.id for u in guardians.values())
+
+    rows = []
     for regi_id, group_data in regihistory_groups.items():
         try:
+            if dedupe_keys[regi_id] in already:
+                continue
+
             regihistory = group_data['regihistory']
             plans = group_data['plans']
-
-            # 🟢 [수정 포인트] 딕셔너리에서 시간을 꺼내와야 합니다.
             earliest_time = group_data['earliest_time']
 
-            # 🟢 [Redis 중복 체크 키 생성]
-            # 키 형식: missed_noti:regi:{ID}:time:{YYYYMMDDHHMM}
-            # 약의 종류(ID)와 복용해야 했던 시간(Time)이 모두 같아야만 중복으로 처리
-            time_key = earliest_time.strftime("%Y%m%d%H%M")
-            cache_key = f"missed_noti_sent:regi:{regi_id}:time:{time_key}"
-
-            # 이미 전송된 기록이 있다면 건너뜀
-            if cache.get(cache_key):
-                # logger.info(f"[MISSED] 스킵 → 이미 전송됨 (RegiID: {regi_id}, Time: {time_key})")
-                continue
-
-            # --- 이하 전송 로직 ---
+            # --- 이하 알림 생성 로직 ---
             patient = regihistory.user
             guardian_email = patient.prot_email
 
@@ -197,10 +217,9 @@ def check_missed_medication():
                 logger.warning(f"[MISSED] 보호자 이메일 없음 → RegiHistory {regi_id}, patient={patient.username}")
                 continue
 
-            # 보호자 유저 조회
-            guardian = User.objects.filter(email=guardian_email).first()
+            guardian = guardians.get(guardian_email)
 
-            if not guardian or not guardian.fcm_token:
+            if not guardian or not tokens_by_user.get(guardian.id):
                 logger.warning(f"[MISSED] 보호자 FCM 토큰 없음 → guardian_email={guardian_email}")
                 continue
 
@@ -220,38 +239,35 @@ def check_missed_medication():
             # 메시지에 표시할 시간 (한국 시간 기준)
             missed_time_str = timezone.localtime(earliest_time).strftime('%H:%M')
 
-            # FCM 전송
-            message = messaging.Message(
-                data={
-                    "type": "missed_alarm",
-                    "regihistory_id": str(regihistory.id),
-                    "plan_ids": ",".join(plan_ids),
-                    "plan_count": str(plan_count),
-                    "user_name": patient.username,
-                    "med_name": med_name,
-                    "patient_phone": patient_phone,
-                    "title": "🚨 미복용 알림",
-                    "body": f"{patient.username}님이 [{med_name}] 약을 아직 복용하지 않았습니다. ({missed_time_str})"
-                },
-                token=guardian.fcm_token,
-            )
-
-            response = messaging.send(message)
-
-            # 🟢 [중요] 전송 성공 시 캐시 저장 (24시간 동안 유지)
-            cache.set(cache_key, "True", timeout=86400)
-
-            success_count += 1
-            logger.info(
-                f"[MISSED] 알림 전송 성공 → patient={patient.username}, guardian={guardian.email}, "
-                f"regihistory_id={regi_id}, time={missed_time_str}"
-            )
+            payload = data_payload({
+                "type": "missed_alarm",
+                "regihistory_id": regihistory.id,
+                "plan_ids": ",".join(plan_ids),
+                "plan_count": plan_count,
+                "user_name": patient.username,
+                "med_name": med_name,
+                "patient_phone": patient_phone,
+                "title": "🚨 미복용 알림",
+                "body": f"{patient.username}님이 [{med_name}] 약을 아직 복용하지 않았습니다. ({missed_time_str})"
+            }, high_priority=False)
+            rows.append(new_notification(
+                regihistory=regihistory,
+                recipient=guardian,
+                notification_type="MISSED",
+                payload=payload,
+                dedupe_key=dedupe_keys[regi_id],
+                # 기존 check_missed_medication 과 같이 24시간 안이면 늦게라도 보냄
+                expires_at=earliest_time + scheduler.MISSED_WINDOW,
+                metadata={"patient_id": patient.id},
+            ))
 
         except Exception as e:
-            logger.error(f"[MISSED] 알림 전송 실패 → regihistory_id={regi_id}, error={e}", exc_info=True)
+            logger.error(f"[MISSED] 알림 생성 실패 → regihistory_id={regi_id}, error={e}", exc_info=True)
 
-    logger.info(f"[MISSED] 총 {success_count}개 그룹에 대한 알림 발송 완료")
-    return f"미복용 체크 완료: {success_count}건 발송"
+    count = enqueue(rows)
+    if count:
+        logger.info(f"[MISSED] 알림 {count}건 발송 대기열 등록 (이미 등록됨 {len(already)}건)")
+    return count
 
 
 # ====================================================
@@ -265,10 +281,9 @@ def send_user_reminders_task():
     """
     # 1. 시간 설정
     now_utc = timezone.now()  # DB 조회용 (UTC)
-    now_kst = timezone.localtime(now_utc)  # 로그 출력용 (KST)
 
     # (선택사항) 작업 시작 로그를 한국 시간으로 찍어두면 디버깅이 편합니다.
-    # logger.info(f"[REMINDER] 재알림 체크 시작 → {now_kst.strftime('%Y-%m-%d %H:%M:%S')} (KST)")
+    # logger.info(f"[REMINDER] 재알림 체크 시작 → {timezone.localtime(now_utc).strftime('%Y-%m-%d %H:%M:%S')} (KST)")
 
     # 2. 시간대 계산 (초 단위 절삭) - UTC 기준
     # Target 1: 10분 전
@@ -288,81 +303,146 @@ def send_user_reminders_task():
     ).select_related('regihistory__user')
 
     # 4. RegiHistory 그룹화
-    regihistory_groups = {}
-    for plan in targets:
-        if not plan.regihistory: continue
+    regihistory_groups = group_by_regihistory(targets)
 
-        regi_id = plan.regihistory.id
-        if regi_id not in regihistory_groups:
-            regihistory_groups[regi_id] = {
-                'regihistory': plan.regihistory,
-                'plans': [],
-                'earliest_time': plan.taken_at
-            }
-        regihistory_groups[regi_id]['plans'].append(plan)
+    # 5. 몇 분 지났는지로 10분/20분 분기 후 알림 전송
+    by_minutes = {10: {}, 20: {}}
+    for regi_id, group_data in regihistory_groups.items():
+        diff_minutes = (now_utc - group_data['earliest_time']).total_seconds() / 60
+        if 10 <= diff_minutes <= 11:
+            by_minutes[10][regi_id] = group_data
+        elif 20 <= diff_minutes <= 21:
+            by_minutes[20][regi_id] = group_data
+
+    queued = sum(send_reminder_groups(groups, minutes) for minutes, groups in by_minutes.items())
+    success_count = dispatch_outbox()["success"] if queued else 0
+
+    # 여기도 한국 시간으로 로그 남기기 (선택사항)
+    # if success_count > 0:
+    #     logger.info(f"[REMINDER] 총 {success_count}건 전송 완료 at {timezone.localtime(now_utc).strftime('%H:%M')} (KST)")
+
+    return f"재알림(10/20분) 통합 체크 완료: {success_count}건 전송"
+
+
+REMINDER_MESSAGES = {
+    10: (
+        "💊 [재알림] 약 드셨나요?",
+        "{username}님, [{label}] 복용 시간 10분이 지났습니다. 잊지 말고 챙겨드세요!",
+    ),
+    20: (
+        "💊 [2차 알림] 약 복용 잊으셨나요?",
+        "{username}님, [{label}] 복용 시간 20분이 지났습니다. 건강을 위해 지금 복용해주세요.",
+    ),
+}
+
+
+def send_reminder_groups(regihistory_groups: dict, minutes: int) -> int:
+    """환자 재알림 (복용 시간 10분/20분 경과) → 알림 대기열 등록, 등록 건수 반환"""
+    title, body_format = REMINDER_MESSAGES[minutes]
+    tokens_by_user = active_tokens(g['regihistory'].user_id for g in regihistory_groups.values())
 
-    # 5. 알림 전송 및 메시지 분기 처리
-    success_count = 0
+    rows = []
     for regi_id, group_data in regihistory_groups.items():
         try:
             regihistory = group_data['regihistory']
             plans = group_data['plans']
             earliest_time = group_data['earliest_time']
             user = regihistory.user
-            token = getattr(user, 'fcm_token', None)
-
-            if not token: continue
-
-            # 몇 분 지났는지 계산
-            diff_minutes = (now_utc - earliest_time).total_seconds() / 60
-
-            # 메시지 내용 분기
-            if 10 <= diff_minutes <= 11:
-                # 10분 경과
-                title = "💊 [재알림] 약 드셨나요?"
-                body = f"{user.username}님, [{regihistory.label}] 복용 시간 10분이 지났습니다. 잊지 말고 챙겨드세요!"
-                log_prefix = "10분 경과"
-            elif 20 <= diff_minutes <= 21:
-                # 20분 경과
-                title = "💊 [2차 알림] 약 복용 잊으셨나요?"
-                body = f"{user.username}님, [{regihistory.label}] 복용 시간 20분이 지났습니다. 건강을 위해 지금 복용해주세요."
-                log_prefix = "20분 경과"
-            else:
-                continue
 
+            if not tokens_by_user.get(user.id): continue
+
+            body = body_format.format(username=user.username, label=regihistory.label)
             plan_ids = [str(p.id) for p in plans]
 
-            message = messaging.Message(
-                token=token,
-                data={
-                    "type": "ALARM",
-                    "title": title,
-                    "body": body,
-                    "regihistory_id": str(regihistory.id),
-                    "plan_ids": ",".join(plan_ids),
-                    "plan_count": str(len(plans)),
-                    "click_action": "FLUTTER_NOTIFICATION_CLICK"
-                },
-                android=messaging.AndroidConfig(priority='high', ttl=0),
-                apns=messaging.APNSConfig(payload=messaging.APNSPayload(aps=messaging.Aps(content_available=True)))
-            )
-            messaging.send(message)
-            success_count += 1
-
-            # ✅ [수정됨] 로그에 한국 시간(now_kst) 표시
-            logger.info(
-                f"[REMINDER] {log_prefix} 알림 전송 완료 → "
-                f"Time: {now_kst.strftime('%H:%M')} (KST), User: {user.username}"
-            )
+            payload = data_payload({
+                "type": "ALARM",
+                "title": title,
+                "body": body,
+                "regihistory_id": regihistory.id,
+                "plan_ids": ",".join(plan_ids),
+                "plan_count": len(plans),
+                "click_action": "FLUTTER_NOTIFICATION_CLICK"
+            })
+            rows.append(new_notification(
+                regihistory=regihistory,
+                recipient=user,
+                notification_type=f"REMIND{minutes}",
+                payload=payload,
+                dedupe_key=f"REMIND{minutes}:{regi_id}:{dedupe_time(earliest_time)}",
+                expires_at=earliest_time + timedelta(minutes=minutes, seconds=scheduler.max_delay_seconds()),
+            ))
 
         except Exception as e:
-            logger.error(f"[REMINDER] 전송 실패 error={e}")
+            logger.error(f"[REMINDER] 알림 생성 실패 error={e}")
 
-    # 여기도 한국 시간으로 로그 남기기 (선택사항)
-    # if success_count > 0:
-    #     logger.info(f"[REMINDER] 총 {success_count}건 전송 완료 at {now_kst.strftime('%H:%M')} (KST)")
+    count = enqueue(rows)
+    if count:
+        logger.info(f"[REMINDER] {minutes}분 경과 알림 {count}건 발송 대기열 등록")
+    return count
 
-    return f"재알림(10/20분) 통합 체크 완료: {success_count}건 전송"
+
+# ====================================================
+# 4. [Celery Task] 알림 이벤트 디스패처 (medications.scheduler)
+# ====================================================
+@shared_task
+def dispatch_due_alarms_task():
+    """
+    Redis sorted set 에서 시각이 된 이벤트만 꺼내 보냅니다. (위 1~3번 작업의 Plan 테이블 스캔 대체)
+    꺼낸 뒤 Plan 을 다시 읽어 현재 상태(복용/알람 끔/시간 변경)를 한 번 더 확인합니다.
+    Notification 등록이 끝난 뒤에 이벤트를 ack → 중간에 실패하면 이벤트를 다시 넣어 알림을 잃지 않습니다.
+    """
+    if not scheduler.is_enabled():
+        return "스케줄러 사용 안 함 (ALARM_SCHEDULER_ENABLED=False)"
+
+    scheduler.ensure_schedule()
+
+    now = timezone.now()
+    now_ts = now.timestamp()
+    events = scheduler.pop_due_events(now_ts)
+    if not events:
+        return "도래한 이벤트 없음"
+
+    try:
+        plans = (
+            Plan.objects.filter(id__in={e.plan_id for e in events})
+            .select_related('regihistory__user')
+            .order_by()
+        )
+        plans_by_id = {p.id: p for p in plans}
+
+        # 종류별 Plan 목록 (현재 상태 기준으로 여전히 보낼 이벤트만)
+        by_kind = {kind: [] for kind in scheduler.EVENT_OFFSETS}
+        skipped = 0
+        for event in events:
+            plan = plans_by_id.get(event.plan_id)
+            if (
+                plan is None
+                or scheduler.is_expired(event.kind, event.due, now_ts)
+                or not scheduler.is_current(plan, event)
+            ):
+                skipped += 1
+                continue
+            by_kind[event.kind].append(plan)
+
+        counts = {
+            scheduler.EVENT_ALARM: send_alarm_groups(group_by_regihistory(by_kind[scheduler.EVENT_ALARM])),
+            scheduler.EVENT_REMIND_10: send_reminder_groups(group_by_regihistory(by_kind[scheduler.EVENT_REMIND_10]), 10),
+            scheduler.EVENT_REMIND_20: send_reminder_groups(group_by_regihistory(by_kind[scheduler.EVENT_REMIND_20]), 20),
+            scheduler.EVENT_MISSED: send_missed_groups(group_by_regihistory(by_kind[scheduler.EVENT_MISSED])),
+        }
+    except Exception:
+        # 등록 전에 실패 (DB 오류, SoftTimeLimitExceeded 등) → 이벤트를 다시 넣고 다음 실행에서 재시도
+        scheduler.release_events(events)
+        raise
+    scheduler.ack_events(events)
+    # 등록한 알림 바로 발송 (실패분은 dispatch_notification_outbox_task 가 재시도)
+    stats = dispatch_outbox()
+
+    logger.info(
+        f"[SCHEDULER] 이벤트 {len(events)}개 처리 (건너뜀 {skipped}) → 등록 {counts}, 발송 {stats}, "
+        f"지연 최대 {now_ts - min(e.due for e in events):.0f}s"
+    )
+    return f"이벤트 {len(events)}개 처리: {counts}"
 
 @shared_task
 def delete_plan_async(plan_id, user_id):
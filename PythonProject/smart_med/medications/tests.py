@@ -1,3 +1,129 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from . import scheduler
+from .models import Plan
+
+
+class FakePipeline:
+    """_write_plans 가 부르는 zrem / zadd 호출만 기록 (Redis 없이 테스트)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def zrem(self, key, *members):
+        self.calls.append(("zrem", key, set(members)))
+
+    def zadd(self, key, mapping, xx=False):
+        self.calls.append(("zadd_xx" if xx else "zadd", key, dict(mapping)))
+
+    def members(self, op: str) -> dict:
+        """op(zadd / zadd_xx / zrem) 로 넘긴 member 전체 ({member: score}, zrem 은 score 없음)"""
+        merged = {}
+        for name, _, value in self.calls:
+            if name == op:
+                merged.update(value if isinstance(value, dict) else dict.fromkeys(value))
+        return merged
+
+
+def make_plan(taken_at, taken=None, use_alarm=True, plan_id=7) -> Plan:
+    return Plan(id=plan_id, taken_at=taken_at, taken=taken, use_alarm=use_alarm)
+
+
+@override_settings(ALARM_EVENT_MAX_DELAY_SECONDS=300)
+class WritePlansTests(SimpleTestCase):
+    def setUp(self):
+        self.base = timezone.now().replace(microsecond=0)
+        self.now = self.base.timestamp()
+
+    def write(self, *plans):
+        pipe = FakePipeline()
+        count = scheduler._write_plans(pipe, plans, self.now)
+        return pipe, count
+
+    def test_future_events_are_added(self):
+        pipe, count = self.write(make_plan(self.base + timedelta(hours=1)))
+
+        self.assertEqual(count, 4)
+        self.assertEqual(set(pipe.members("zadd")), {"alarm:7", "remind10:7", "remind20:7", "missed:7"})
+        self.assertEqual(pipe.members("zadd_xx"), {})
+        self.assertEqual(pipe.members("zadd")["alarm:7"], (self.base + timedelta(hours=1)).timestamp())
+
+    def test_past_due_alarm_is_only_updated(self):
+        # 정시 알림은 1분 지났지만 아직 버릴 정도는 아님 → 아직 안 꺼내진 경우만 갱신 (XX)
+        pipe, count = self.write(make_plan(self.base - timedelta(minutes=1)))
+
+        self.assertEqual(count, 4)
+        self.assertEqual(set(pipe.members("zadd_xx")), {"alarm:7"})
+        self.assertEqual(set(pipe.members("zadd")), {"remind10:7", "remind20:7", "missed:7"})
+
+    def test_expired_alarm_is_skipped(self):
+        # 정시 12분 지남: alarm 은 만료, remind10 은 2분 지남(XX), 나머지는 앞으로 올 이벤트
+        pipe, count = self.write(make_plan(self.base - timedelta(minutes=12)))
+
+        self.assertEqual(count, 3)
+        self.assertEqual(set(pipe.members("zadd_xx")), {"remind10:7"})
+        self.assertEqual(set(pipe.members("zadd")), {"remind20:7", "missed:7"})
+
+    def test_past_due_missed_inside_window_is_added(self):
+        # 복용 시각 2시간 뒤에 만든 Plan 도 미복용 이벤트는 그냥 ZADD (중복은 dedupe_key 가 막음)
+        pipe, count = self.write(make_plan(self.base - timedelta(hours=2)))
+
+        self.assertEqual(count, 1)
+        self.assertEqual(set(pipe.members("zadd")), {"missed:7"})
+        self.assertEqual(pipe.members("zadd_xx"), {})
+
+    def test_missed_outside_window_is_dropped(self):
+        pipe, count = self.write(make_plan(self.base - timedelta(days=2)))
+
+        self.assertEqual(count, 0)
+        self.assertEqual(pipe.members("zadd"), {})
+        self.assertEqual(pipe.members("zadd_xx"), {})
+
+    def test_taken_plan_removes_all_events(self):
+        pipe, count = self.write(make_plan(self.base + timedelta(hours=1), taken=self.base))
+
+        self.assertEqual(count, 0)
+        self.assertEqual(set(pipe.members("zrem")), set(scheduler._members(7)))
+        self.assertEqual(pipe.members("zadd"), {})
+
+    def test_alarm_off_keeps_only_missed(self):
+        pipe, count = self.write(make_plan(self.base + timedelta(hours=1), use_alarm=False))
+
+        self.assertEqual(count, 1)
+        self.assertEqual(set(pipe.members("zadd")), {"missed:7"})
+        self.assertEqual(set(pipe.members("zrem")), {"alarm:7", "remind10:7", "remind20:7"})
+
+
+@override_settings(ALARM_EVENT_MAX_DELAY_SECONDS=300)
+class EventStateTests(SimpleTestCase):
+    def setUp(self):
+        self.base = timezone.now().replace(microsecond=0)
+        self.now = self.base.timestamp()
+
+    def test_is_expired(self):
+        self.assertFalse(scheduler.is_expired(scheduler.EVENT_ALARM, self.now - 299, self.now))
+        self.assertTrue(scheduler.is_expired(scheduler.EVENT_ALARM, self.now - 301, self.now))
+        self.assertFalse(scheduler.is_expired(scheduler.EVENT_REMIND_10, self.now + 60, self.now))
+
+        window = scheduler.MISSED_WINDOW.total_seconds()
+        self.assertFalse(scheduler.is_expired(scheduler.EVENT_MISSED, self.now - 3600, self.now))
+        self.assertTrue(scheduler.is_expired(scheduler.EVENT_MISSED, self.now - window - 1, self.now))
+
+    def test_is_current(self):
+        plan = make_plan(self.base)
+        due = self.base.timestamp()
+
+        self.assertTrue(scheduler.is_current(plan, scheduler.DueEvent(scheduler.EVENT_ALARM, 7, due)))
+        # 꺼낸 뒤 시간이 바뀐 Plan
+        self.assertFalse(scheduler.is_current(plan, scheduler.DueEvent(scheduler.EVENT_ALARM, 7, due - 600)))
+
+        plan.taken = self.base
+        self.assertFalse(scheduler.is_current(plan, scheduler.DueEvent(scheduler.EVENT_ALARM, 7, due)))
+
+        plan = make_plan(self.base, use_alarm=False)
+        self.assertFalse(scheduler.is_current(plan, scheduler.DueEvent(scheduler.EVENT_ALARM, 7, due)))
+        missed_due = (self.base + scheduler.EVENT_OFFSETS[scheduler.EVENT_MISSED]).timestamp()
+        self.assertTrue(scheduler.is_current(plan, scheduler.DueEvent(scheduler.EVENT_MISSED, 7, missed_due)))
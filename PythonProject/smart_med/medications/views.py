@@ -4,9 +4,11 @@ from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.response import Response
 from rest_framework import status
 from medications.tasks import delete_plan_async
+from medications.scheduler import schedule_plans
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
 import datetime
 
 from smart_med.utils.time_utils import to_ms, from_ms
@@ -96,6 +98,10 @@ class RegiHistoryDeleteView(APIView):
 #    - GET /api/med/regihistory/all/
 # ============================================================
 
+# 관리자 목록의 Plan: 최근 생성 순 (Plan 은 기본 ordering 없음), RegiHistory 마다 조회하지 않고 한 번에
+PLANS_PREFETCH = Prefetch("plan_set", queryset=Plan.objects.order_by("-created_at"))
+
+
 class UserRegiHistoryListView(APIView):
     """
     특정 사용자(user_id)의 등록 이력 + Plan 목록
@@ -107,6 +113,7 @@ class UserRegiHistoryListView(APIView):
             RegiHistory.objects
             .filter(user_id=user_id)
             .order_by("-id")
+            .prefetch_related(PLANS_PREFETCH)
         )
         return Response(RegiHistoryWithPlansSerializer(rows, many=True).data)
 
@@ -118,7 +125,7 @@ class AllRegiHistoryListView(APIView):
     permission_classes = [IsStaffUser]
 
     def get(self, request):
-        rows = RegiHistory.objects.all().order_by("-id")
+        rows = RegiHistory.objects.all().order_by("-id").prefetch_related(PLANS_PREFETCH)
         return Response(RegiHistoryWithPlansSerializer(rows, many=True).data)
 
 
@@ -131,7 +138,7 @@ class PlanListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        plans = Plan.objects.filter(regihistory__user=request.user)
+        plans = Plan.objects.filter(regihistory__user=request.user).order_by("-created_at")
         return Response(PlanSerializer(plans, many=True).data)
 
     @plan_create_docs
@@ -321,11 +328,16 @@ class PlanUpdateView(APIView):
                 updated_at=old_updated
             ).exclude(id=plan.id)
 
+            sibling_ids = list(siblings.values_list("id", flat=True))
             siblings.update(
                 taken_at=new_dt,
                 updated_at=plan.updated_at
             )
 
+            # update() 는 post_save signal 이 없으므로 알림 이벤트를 직접 다시 등록
+            if sibling_ids:
+                schedule_plans(Plan.objects.filter(id__in=sibling_ids))
+
         else:
             if "medName" in data:
                 plan.med_name = data["medName"]
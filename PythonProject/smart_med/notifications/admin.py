@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "notification_type", "status", "attempts", "recipient", "created_at", "sent_at", "next_attempt_at")
+    list_filter = ("status", "notification_type")
+    search_fields = ("dedupe_key", "recipient__username")
+    readonly_fields = ("created_at", "sent_at")
+    raw_id_fields = ("regihistory", "recipient")
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status__in", ["SUCCESS", "FAILED"])),
+                fields=["created_at"],
+                name="notification_finished_idx",
+            ),
+        ),
+    ]
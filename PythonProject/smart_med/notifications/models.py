@@ -1,25 +1,70 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
 from medications.models import RegiHistory
 
 
-from django.db import models
-from django.contrib.postgres.fields import JSONField
+class NotificationStatus(models.TextChoices):
+    PENDING = "PENDING", "대기"
+    SUCCESS = "SUCCESS", "성공"
+    FAILED = "FAILED", "실패"
+
 
+# 발송 대기열(outbox) 겸 발송 기록 (notifications.outbox)
 class Notification(models.Model):
     regihistory = models.ForeignKey(RegiHistory, on_delete=models.CASCADE)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="notifications",
+        verbose_name="수신자",
+    )
 
     notification_type = models.CharField(max_length=30)
     status = models.CharField(
         max_length=20,
-        choices=[("SUCCESS", "성공"), ("FAILED", "실패")],
-        default="SUCCESS"
+        choices=NotificationStatus.choices,
+        default=NotificationStatus.PENDING,
     )
     sent_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
 
     metadata = models.JSONField(null=True, blank=True)
 
+    # 발송 정보: FCM 토큰 + 메시지 내용(notifications.outbox.build_message)
+    # token 이 비어 있으면 발송 시점의 recipient 활성 디바이스 전체(users.FcmDevice)로 보냄
+    token = models.CharField(max_length=255, blank=True, default="")
+    payload = models.JSONField(default=dict)
+
+    # 같은 알림 중복 등록 방지 (예: "MISSED:{regihistory_id}:{YYYYMMDDHHMM}")
+    dedupe_key = models.CharField(max_length=120, null=True, blank=True, unique=True)
+
+    # 재시도: 실패 시 attempts 증가 + next_attempt_at 을 지수 백오프로 미룸
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # 이 시각이 지나면 보내지 않고 FAILED (예: 정시 알림은 몇 분 뒤면 의미 없음)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # 디스패처 조회: status = PENDING 인 행만 next_attempt_at 순서로
+            models.Index(
+                fields=["next_attempt_at"],
+                name="notification_pending_idx",
+                condition=Q(status="PENDING"),
+            ),
+            # 보관 기간 정리(outbox.purge_finished): 끝난 행만 created_at 순서로
+            models.Index(
+                fields=["created_at"],
+                name="notification_finished_idx",
+                condition=Q(status__in=["SUCCESS", "FAILED"]),
+            ),
+        ]
 
+    def __str__(self):
+        return f"notification #{self.id} ({self.notification_type}, {self.status})"
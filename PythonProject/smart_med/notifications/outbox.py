@@ -0,0 +1,279 @@
+# notifications/outbox.py
+"""
+알림 발송 대기열 (transactional outbox, Notification 테이블)
+
+- 알림 작업(medications.tasks)은 FCM 을 직접 부르지 않고 Notification 행을 bulk_create 로 넣기만 함
+  (dedupe_key unique → 같은 알림은 한 번만 등록, 기존 24시간 Redis 중복 키 대체)
+- dispatch_outbox() 가 PENDING 행을 SELECT ... FOR UPDATE SKIP LOCKED 로 가져가 send_each 로 보내고
+  SUCCESS / FAILED 를 기록
+  → 디스패처 워커를 여러 개 띄워도 같은 행을 두 번 보내지 않음
+- 일시적 오류(UNAVAILABLE, INTERNAL, QUOTA_EXCEEDED ...)는 지수 백오프로 재시도,
+  토큰/메시지 오류(UNREGISTERED, INVALID_ARGUMENT, SENDER_ID_MISMATCH)와 만료된 알림은 바로 FAILED
+  (INVALID_ARGUMENT 는 메시지 오류일 수도 있음 → 그 행만 FAILED, 토큰 비활성화는 notifications.tokens 가 판단)
+- token 이 비어 있는 행은 발송 시점에 수신자의 활성 디바이스 토큰 전체로 보냄 (notifications.tokens)
+  → 한 대라도 성공하면 SUCCESS, 만료 토큰은 send_fcm_batch 가 비활성화
+- 메시지를 만들 수 없는 행(잘못된 payload)은 그 행만 바로 FAILED
+- 발송은 최소 1회(at-least-once): 발송 후 커밋 전에 중단되면 같은 알림이 다시 나갈 수 있음 (dispatch_batch 참고)
+- 전달 지연 = sent_at - created_at (Notification 테이블에서 조회 가능)
+- 끝난 행(SUCCESS / FAILED)은 NOTIFICATION_RETENTION_DAYS 가 지나면 purge_finished() 가 삭제
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from firebase_admin import messaging
+
+from .models import Notification, NotificationStatus
+from .services import FcmOutgoing, send_fcm_batch
+from .tokens import active_tokens
+
+logger = logging.getLogger("celery")
+
+# 재시도해도 결과가 같은 오류 (토큰/메시지 문제) → 행만 FAILED, 토큰 비활성화 여부는 tokens.is_dead_token_error
+PERMANENT_ERRORS = {"UNREGISTERED", "INVALID_ARGUMENT", "SENDER_ID_MISMATCH", "THIRD_PARTY_AUTH_ERROR"}
+
+# 미복용 이벤트는 24시간(medications.scheduler.MISSED_WINDOW) 안에 다시 들어올 수 있음
+# → 그동안 dedupe_key 가 남아 있어야 중복 발송을 막으므로 이보다 짧게 지우지 않음
+MIN_RETENTION = timedelta(days=2)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+# ==================================================
+# 메시지 내용 (payload JSON ↔ messaging.Message)
+# ==================================================
+def data_payload(data: dict, high_priority: bool = True) -> dict:
+    """데이터 메시지 (Android high priority + iOS 백그라운드 깨우기)"""
+    return {"data": {k: str(v) for k, v in data.items()}, "high_priority": high_priority}
+
+
+def build_message(token: str, payload: dict) -> messaging.Message:
+    kwargs = {}
+    if payload.get("high_priority"):
+        kwargs["android"] = messaging.AndroidConfig(priority="high", ttl=0)
+        kwargs["apns"] = messaging.APNSConfig(
+            payload=messaging.APNSPayload(aps=messaging.Aps(content_available=True))
+        )
+    if payload.get("notification"):
+        kwargs["notification"] = messaging.Notification(**payload["notification"])
+    return messaging.Message(token=token, data=payload.get("data") or None, **kwargs)
+
+
+# ==================================================
+# 등록 (producer)
+# ==================================================
+def new_notification(
+    *,
+    regihistory,
+    recipient,
+    notification_type: str,
+    payload: dict,
+    token: str = "",
+    dedupe_key: Optional[str] = None,
+    expires_at: Optional[datetime] = None,
+    metadata: Optional[dict] = None,
+) -> Notification:
+    """
+    저장 전 Notification (enqueue 로 일괄 등록), expires_at 이 지나면 보내지 않고 FAILED
+    token 을 비우면 발송 시점의 수신자 활성 디바이스 전체로 보냄
+    """
+    now = timezone.now()
+    return Notification(
+        regihistory=regihistory,
+        recipient=recipient,
+        token=token,
+        notification_type=notification_type,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        metadata=metadata,
+        status=NotificationStatus.PENDING,
+        next_attempt_at=now,
+        expires_at=expires_at,
+    )
+
+
+def existing_dedupe_keys(keys: Iterable[str]) -> set:
+    """이미 등록된 dedupe_key (알림 만들기 전에 걸러서 불필요한 조회를 줄일 때)"""
+    keys = [k for k in keys if k]
+    if not keys:
+        return set()
+    return set(Notification.objects.filter(dedupe_key__in=keys).values_list("dedupe_key", flat=True))
+
+
+def enqueue(notifications: List[Notification]) -> int:
+    """Notification 행 일괄 등록 (dedupe_key 가 이미 있으면 무시), 등록 시도 수 반환"""
+    if not notifications:
+        return 0
+    Notification.objects.bulk_create(
+        notifications,
+        batch_size=_setting("NOTIFICATION_OUTBOX_BATCH", 500),
+        ignore_conflicts=True,
+    )
+    return len(notifications)
+
+
+# ==================================================
+# 발송 (dispatcher)
+# ==================================================
+def retry_delay(attempts: int) -> timedelta:
+    """attempts 번째 실패 후 대기 시간 (base × 2^(attempts-1), 최대 NOTIFICATION_RETRY_MAX_SECONDS)"""
+    base = _setting("NOTIFICATION_RETRY_BASE_SECONDS", 30)
+    cap = _setting("NOTIFICATION_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def _mark_failed(row: Notification, now, code: Optional[str], error: Optional[str]) -> None:
+    row.attempts += 1
+    row.error_message = f"{code}: {error}" if code else error
+    max_attempts = _setting("NOTIFICATION_MAX_ATTEMPTS", 5)
+
+    retryable = code not in PERMANENT_ERRORS and row.attempts < max_attempts
+    next_at = now + retry_delay(row.attempts)
+    if retryable and (row.expires_at is None or next_at < row.expires_at):
+        row.next_attempt_at = next_at
+    else:
+        row.status = NotificationStatus.FAILED
+        row.next_attempt_at = None
+
+
+def dispatch_batch(limit: Optional[int] = None) -> dict:
+    """
+    PENDING 행 최대 limit 개를 잠그고(SKIP LOCKED) 발송 → 결과 기록 (트랜잭션 1개)
+    다른 디스패처가 잠근 행은 건너뛰므로 동시에 여러 개 실행 가능
+
+    ※ at-least-once: FCM 호출은 행을 잠근 트랜잭션 안에서 일어남
+      → 발송 뒤 결과를 커밋하기 전에 워커가 죽거나 time limit 에 걸리면 행이 PENDING 으로 롤백되고
+        다음 실행에서 다시 보냄 (앱은 data 의 알림 id 등으로 중복 표시를 걸러야 함)
+    """
+    limit = limit or _setting("NOTIFICATION_OUTBOX_BATCH", 500)
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status=NotificationStatus.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:limit]
+        )
+        if not rows:
+            return {"claimed": 0, "success": 0, "failed": 0, "retry": 0, "expired": 0}
+
+        expired = [r for r in rows if r.expires_at and r.expires_at <= now]
+        for r in expired:
+            r.status = NotificationStatus.FAILED
+            r.next_attempt_at = None
+            r.error_message = "expired"
+
+        sendable = [r for r in rows if r.status == NotificationStatus.PENDING]
+
+        # 수신자별 활성 토큰 (쿼리 1회) → 토큰마다 메시지 1개, 같은 send_each 배치로 발송
+        tokens_by_user = active_tokens(r.recipient_id for r in sendable if not r.token)
+        outgoing = []
+        for r in sendable:
+            tokens = [r.token] if r.token else tokens_by_user.get(r.recipient_id, [])
+            if not tokens:
+                r.status = NotificationStatus.FAILED
+                r.next_attempt_at = None
+                r.error_message = "no active device"
+                continue
+            try:
+                messages = [build_message(t, r.payload) for t in tokens]
+            except Exception as e:
+                # payload 가 잘못된 행은 다시 보내도 같으므로 그 행만 FAILED (배치 전체 롤백 → 같은 행이 계속 막는 것 방지)
+                logger.error(f"[OUTBOX] 메시지 생성 실패 → notification_id={r.id}, error={e}")
+                r.status = NotificationStatus.FAILED
+                r.next_attempt_at = None
+                r.error_message = f"invalid payload: {e}"
+                continue
+            outgoing.extend(FcmOutgoing(m, context=r) for m in messages)
+
+        report = send_fcm_batch(outgoing, tag="OUTBOX")
+
+        # 행 단위로 결과 합치기 (입력 순서 유지)
+        results_by_row = {}
+        for result in report.results:
+            results_by_row.setdefault(id(result.outgoing.context), []).append(result)
+
+        sent_at = timezone.now()
+        success = 0
+        for results in results_by_row.values():
+            row = results[0].outgoing.context
+            delivered = [r for r in results if r.success]
+            if delivered:
+                success += 1
+                row.attempts += 1
+                row.status = NotificationStatus.SUCCESS
+                row.sent_at = sent_at
+                row.next_attempt_at = None
+                row.error_message = None
+                row.metadata = {
+                    **(row.metadata or {}),
+                    "message_ids": [r.message_id for r in delivered],
+                    "devices": len(results),
+                }
+            else:
+                # 재시도할 수 있는 오류가 하나라도 있으면 그 오류 기준 (나머지는 토큰/메시지 오류 → 재시도해도 같음)
+                retryable = [r for r in results if r.error_code not in PERMANENT_ERRORS]
+                worst = (retryable or results)[0]
+                _mark_failed(row, sent_at, worst.error_code, worst.error)
+
+        Notification.objects.bulk_update(
+            rows, ["status", "attempts", "sent_at", "next_attempt_at", "error_message", "metadata"]
+        )
+
+    failed = sum(1 for r in sendable if r.status == NotificationStatus.FAILED)
+    return {
+        "claimed": len(rows),
+        "success": success,
+        "failed": failed,
+        "retry": len(sendable) - success - failed,
+        "expired": len(expired),
+    }
+
+
+def dispatch_outbox(max_batches: Optional[int] = None) -> dict:
+    """대기 중인 알림이 없어질 때까지(최대 max_batches 배치) dispatch_batch 반복, 합계 반환"""
+    max_batches = max_batches or _setting("NOTIFICATION_OUTBOX_MAX_BATCHES", 20)
+    total = {"claimed": 0, "success": 0, "failed": 0, "retry": 0, "expired": 0}
+    for _ in range(max_batches):
+        stats = dispatch_batch()
+        for k, v in stats.items():
+            total[k] += v
+        if stats["claimed"] == 0:
+            break
+
+    if total["claimed"]:
+        logger.info(f"[OUTBOX] 발송 결과 → {total}")
+    return total
+
+
+# ==================================================
+# 보관 기간 정리
+# ==================================================
+def purge_finished(retention: Optional[timedelta] = None, chunk_size: Optional[int] = None) -> int:
+    """
+    created_at 이 보관 기간보다 오래된 SUCCESS / FAILED 행 삭제, 삭제 수 반환
+    한 번에 chunk_size 행씩 지워 긴 트랜잭션/잠금을 피함 (PENDING 행은 그대로)
+    """
+    retention = max(retention or timedelta(days=_setting("NOTIFICATION_RETENTION_DAYS", 30)), MIN_RETENTION)
+    chunk_size = chunk_size or _setting("NOTIFICATION_PURGE_CHUNK", 5000)
+    cutoff = timezone.now() - retention
+
+    finished = Notification.objects.filter(
+        status__in=[NotificationStatus.SUCCESS, NotificationStatus.FAILED], created_at__lt=cutoff
+    )
+    total = 0
+    while True:
+        ids = list(finished.order_by("created_at").values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            break
+        deleted, _ = Notification.objects.filter(id__in=ids).delete()
+        total += deleted
+
+    if total:
+        logger.info(f"[OUTBOX] 보관 기간 지난 알림 삭제 → {total}건 (기준 {cutoff:%Y-%m-%d %H:%M})")
+    return total
@@ -1,9 +1,18 @@
 import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+
 from django.conf import settings
 
 import firebase_admin
 from firebase_admin import credentials, messaging
 
+# messaging.send_each 한 번에 보낼 수 있는 최대 메시지 수
+FCM_MAX_BATCH_SIZE = 500
+
 
 def initialize_firebase():
     """Firebase 초기화를 지연 로딩 방식으로 실행."""
@@ -74,4 +83,132 @@ def send_fcm_to_token(token: str, title: str, body: str, data: dict | None = Non
         return res
     except Exception as e:
         print(f"[FCM] Error sending message: {e}")
-        return str(e)
\ No newline at end of file
+        return str(e)
+
+
+# ==================================================
+# 일괄 발송 (send_each, 500개씩)
+# ==================================================
+@dataclass
+class FcmOutgoing:
+    """보낼 메시지 1개 + 결과 처리에 쓸 호출 측 정보 (regihistory, 로그용 값 등)"""
+    message: messaging.Message
+    context: Any = None
+
+
+@dataclass
+class FcmSendResult:
+    outgoing: FcmOutgoing
+    success: bool
+    message_id: Optional[str] = None
+    error_code: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def token(self) -> Optional[str]:
+        return getattr(self.outgoing.message, "token", None)
+
+
+@dataclass
+class FcmDispatchReport:
+    results: List[FcmSendResult] = field(default_factory=list)
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    @property
+    def success_count(self) -> int:
+        return sum(1 for r in self.results if r.success)
+
+    @property
+    def failure_count(self) -> int:
+        return self.total - self.success_count
+
+    @property
+    def error_counts(self) -> dict:
+        return dict(Counter(r.error_code for r in self.results if not r.success))
+
+    def summary(self) -> dict:
+        return {
+            "total": self.total,
+            "success": self.success_count,
+            "failure": self.failure_count,
+            "batches": self.batches,
+            "elapsed": round(self.elapsed, 3),
+            "errors": self.error_counts,
+        }
+
+
+def fcm_error_code(exc: Optional[BaseException]) -> Optional[str]:
+    """FCM 예외 → 오류 코드 (UNREGISTERED / SENDER_ID_MISMATCH / QUOTA_EXCEEDED / INVALID_ARGUMENT / UNAVAILABLE ...)"""
+    if exc is None:
+        return None
+    if isinstance(exc, messaging.UnregisteredError):
+        return "UNREGISTERED"
+    if isinstance(exc, messaging.SenderIdMismatchError):
+        return "SENDER_ID_MISMATCH"
+    if isinstance(exc, messaging.QuotaExceededError):
+        return "QUOTA_EXCEEDED"
+    if isinstance(exc, messaging.ThirdPartyAuthError):
+        return "THIRD_PARTY_AUTH_ERROR"
+    return getattr(exc, "code", None) or type(exc).__name__
+
+
+def _send_batch(batch: Sequence[FcmOutgoing]) -> List[FcmSendResult]:
+    try:
+        response = messaging.send_each([o.message for o in batch])
+    except Exception as e:
+        # 배치 요청 자체 실패 (인증/네트워크) → 배치 전체 실패로 기록
+        code = fcm_error_code(e)
+        return [FcmSendResult(outgoing=o, success=False, error_code=code, error=str(e)) for o in batch]
+
+    return [
+        FcmSendResult(
+            outgoing=o,
+            success=r.success,
+            message_id=r.message_id,
+            error_code=fcm_error_code(r.exception),
+            error=str(r.exception) if r.exception else None,
+        )
+        for o, r in zip(batch, response.responses)
+    ]
+
+
+def send_fcm_batch(outgoing: Sequence[FcmOutgoing], tag: str = "FCM", prune_tokens: bool = True) -> FcmDispatchReport:
+    """
+    여러 메시지를 FCM_MAX_BATCH_SIZE 개씩 messaging.send_each 로 발송
+    - 배치가 여러 개면 FCM_SEND_WORKERS 개 스레드로 동시에 (firebase_admin 앱/HTTP 세션 공유)
+    - 결과는 입력 순서대로 토큰별 성공/실패 + 오류 코드
+    - prune_tokens: UNREGISTERED / 잘못된 토큰(INVALID_ARGUMENT) 은 비활성화 (notifications.tokens.is_dead_token_error)
+    """
+    report = FcmDispatchReport()
+    if not outgoing:
+        return report
+
+    initialize_firebase()
+
+    size = min(getattr(settings, "FCM_BATCH_SIZE", FCM_MAX_BATCH_SIZE), FCM_MAX_BATCH_SIZE)
+    batches = [outgoing[i:i + size] for i in range(0, len(outgoing), size)]
+    workers = max(1, min(getattr(settings, "FCM_SEND_WORKERS", 4), len(batches)))
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        chunks = [_send_batch(b) for b in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fcm") as pool:
+            chunks = list(pool.map(_send_batch, batches))
+
+    report.results = [r for chunk in chunks for r in chunk]
+    report.batches = len(batches)
+    report.elapsed = time.perf_counter() - t0
+
+    print(f"[{tag}] 일괄 발송 → {report.summary()}")
+
+    if prune_tokens and report.failure_count:
+        from .tokens import prune_dead_tokens
+
+        prune_dead_tokens(report.results, tag=tag)
+    return report
@@ -0,0 +1,33 @@
+import logging
+
+from celery import shared_task
+
+from .outbox import dispatch_outbox, purge_finished
+
+logger = logging.getLogger("celery")
+
+
+# ====================================================
+# [Celery Task] 알림 대기열(outbox) 발송 / 재시도
+# ====================================================
+@shared_task
+def dispatch_notification_outbox_task():
+    """
+    Notification 테이블에서 발송 시각이 된 PENDING 알림(신규 + 재시도)을 보냅니다.
+    행을 SKIP LOCKED 로 잠그므로 여러 워커에서 동시에 실행해도 중복 발송되지 않습니다.
+    """
+    stats = dispatch_outbox()
+    return f"outbox 발송: {stats}"
+
+
+# ====================================================
+# [Celery Task] 끝난 알림 보관 기간 정리
+# ====================================================
+@shared_task
+def purge_old_notifications_task():
+    """
+    NOTIFICATION_RETENTION_DAYS 보다 오래된 SUCCESS / FAILED 알림을 삭제합니다.
+    (하루 1회 beat, 알림 워커를 막지 않도록 default 큐)
+    """
+    deleted = purge_finished()
+    return f"알림 정리: {deleted}건 삭제"
@@ -1,3 +1,90 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from .models import Notification, NotificationStatus
+from .outbox import _mark_failed, retry_delay
+
+RETRY_SETTINGS = dict(
+    NOTIFICATION_RETRY_BASE_SECONDS=30,
+    NOTIFICATION_RETRY_MAX_SECONDS=3600,
+    NOTIFICATION_MAX_ATTEMPTS=5,
+)
+
+
+@override_settings(**RETRY_SETTINGS)
+class RetryDelayTests(SimpleTestCase):
+    def test_exponential_backoff(self):
+        self.assertEqual(retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(retry_delay(2), timedelta(seconds=60))
+        self.assertEqual(retry_delay(3), timedelta(seconds=120))
+
+    def test_capped_at_max(self):
+        self.assertEqual(retry_delay(8), timedelta(seconds=3600))
+
+    def test_zero_attempts_uses_base(self):
+        self.assertEqual(retry_delay(0), timedelta(seconds=30))
+
+
+@override_settings(**RETRY_SETTINGS)
+class MarkFailedTests(SimpleTestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def make_row(self, attempts=0, expires_at=None) -> Notification:
+        return Notification(
+            notification_type="ALARM",
+            status=NotificationStatus.PENDING,
+            attempts=attempts,
+            next_attempt_at=self.now,
+            expires_at=expires_at,
+        )
+
+    def test_transient_error_is_retried(self):
+        row = self.make_row()
+        _mark_failed(row, self.now, "UNAVAILABLE", "boom")
+
+        self.assertEqual(row.attempts, 1)
+        self.assertEqual(row.status, NotificationStatus.PENDING)
+        self.assertEqual(row.next_attempt_at, self.now + timedelta(seconds=30))
+        self.assertEqual(row.error_message, "UNAVAILABLE: boom")
+
+    def test_permanent_error_fails_immediately(self):
+        row = self.make_row()
+        _mark_failed(row, self.now, "UNREGISTERED", "gone")
+
+        self.assertEqual(row.status, NotificationStatus.FAILED)
+        self.assertIsNone(row.next_attempt_at)
+
+    def test_max_attempts(self):
+        row = self.make_row(attempts=3)
+        _mark_failed(row, self.now, "UNAVAILABLE", "boom")
+        self.assertEqual(row.status, NotificationStatus.PENDING)
+
+        _mark_failed(row, self.now, "UNAVAILABLE", "boom")
+        self.assertEqual(row.attempts, 5)
+        self.assertEqual(row.status, NotificationStatus.FAILED)
+        self.assertIsNone(row.next_attempt_at)
+
+    def test_retry_after_expiry_fails(self):
+        # 다음 재시도 시각(30초 뒤)이 expires_at 을 넘으면 보내도 의미 없음 → FAILED
+        row = self.make_row(expires_at=self.now + timedelta(seconds=10))
+        _mark_failed(row, self.now, "UNAVAILABLE", "boom")
+
+        self.assertEqual(row.status, NotificationStatus.FAILED)
+        self.assertIsNone(row.next_attempt_at)
+
+    def test_retry_before_expiry_is_kept(self):
+        row = self.make_row(expires_at=self.now + timedelta(hours=1))
+        _mark_failed(row, self.now, "UNAVAILABLE", "boom")
+
+        self.assertEqual(row.status, NotificationStatus.PENDING)
+        self.assertEqual(row.next_attempt_at, self.now + timedelta(seconds=30))
+
+    def test_error_without_code(self):
+        row = self.make_row()
+        _mark_failed(row, self.now, None, "timeout")
+
+        self.assertEqual(row.error_message, "timeout")
+        self.assertEqual(row.status, NotificationStatus.PENDING)
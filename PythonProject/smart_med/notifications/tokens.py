@@ -0,0 +1,120 @@
+# notifications/tokens.py
+"""
+디바이스별 FCM 토큰 관리 (users.FcmDevice)
+
+- 등록: RegisterFcmTokenView → register_token (토큰별 1행, last_seen_at 갱신)
+- 발송: active_tokens 로 유저의 활성 토큰 전체를 한 번에 조회 → 토큰마다 메시지 1개 (send_each 한 번에 같이 발송)
+- 정리: send_fcm_batch 결과에서 UNREGISTERED / 토큰이 잘못됐다는 INVALID_ARGUMENT 인 토큰은 바로 비활성화
+  (payload 크기 초과 같은 메시지 INVALID_ARGUMENT 는 토큰을 건드리지 않음)
+  → 삭제된 앱/만료 토큰으로 매 분 같은 실패를 반복하지 않음
+- FCM_TOKEN_STALE_DAYS(기본 0 = 끔)를 주면 그 기간 동안 등록(앱 실행)이 없던 토큰은 발송 대상에서 제외
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import FcmDevice, User
+
+logger = logging.getLogger("celery")
+
+# 토큰 자체가 더 이상 유효하지 않다는 오류 (재시도해도 같은 결과)
+DEAD_TOKEN_ERRORS = {"UNREGISTERED", "INVALID_ARGUMENT"}
+# INVALID_ARGUMENT 는 메시지 오류(payload 크기 초과 등)에도 오므로 오류 내용이 토큰을 가리킬 때만 만료로 봄
+# 예: "The registration token is not a valid FCM registration token"
+INVALID_TOKEN_MARKERS = ("registration token", "registration-token")
+
+
+def is_dead_token_error(code: Optional[str], error: Optional[str]) -> bool:
+    """발송 오류가 토큰 문제인지 (메시지 문제면 토큰은 그대로 두고 그 알림만 실패)"""
+    if code not in DEAD_TOKEN_ERRORS:
+        return False
+    if code == "INVALID_ARGUMENT":
+        return any(marker in (error or "").lower() for marker in INVALID_TOKEN_MARKERS)
+    return True
+
+
+def register_token(user, token: str, device_id: str = "", platform: str = "") -> FcmDevice:
+    """
+    토큰 등록/갱신
+    - 같은 토큰이 다른 유저에 있으면(같은 기기에서 다른 계정 로그인) 이 유저로 옮김
+    - device_id 가 있으면 같은 기기의 이전 토큰은 비활성화 (토큰 재발급)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        device, _ = FcmDevice.objects.update_or_create(
+            token=token,
+            defaults={
+                "user": user,
+                "device_id": device_id or "",
+                "platform": platform or "",
+                "is_active": True,
+                "last_seen_at": now,
+                "deactivated_at": None,
+                "deactivated_reason": "",
+            },
+        )
+        if device_id:
+            FcmDevice.objects.filter(user=user, device_id=device_id, is_active=True).exclude(pk=device.pk).update(
+                is_active=False, deactivated_at=now, deactivated_reason="REPLACED"
+            )
+
+        # 기존 코드(User.fcm_token 사용처) 호환: 마지막 등록 토큰
+        if user.fcm_token != token:
+            user.fcm_token = token
+            user.save(update_fields=["fcm_token"])
+    return device
+
+
+def active_tokens(user_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """{user_id: [활성 토큰, ...]} (최근 등록 순), 쿼리 1회"""
+    user_ids = {uid for uid in user_ids if uid}
+    if not user_ids:
+        return {}
+
+    stale_days = getattr(settings, "FCM_TOKEN_STALE_DAYS", 0)
+    qs = FcmDevice.objects.filter(user_id__in=user_ids, is_active=True)
+    if stale_days:
+        qs = qs.filter(last_seen_at__gte=timezone.now() - timedelta(days=stale_days))
+
+    tokens = defaultdict(list)
+    for user_id, token in qs.order_by("-last_seen_at").values_list("user_id", "token"):
+        tokens[user_id].append(token)
+    return dict(tokens)
+
+
+def deactivate_tokens(tokens: Iterable[str], reason: str) -> int:
+    """토큰 비활성화 (+ User.fcm_token 이 같은 토큰이면 비움), 비활성화한 수 반환"""
+    tokens = {t for t in tokens if t}
+    if not tokens:
+        return 0
+
+    count = FcmDevice.objects.filter(token__in=tokens, is_active=True).update(
+        is_active=False, deactivated_at=timezone.now(), deactivated_reason=reason
+    )
+    User.objects.filter(fcm_token__in=tokens).update(fcm_token=None)
+    return count
+
+
+def prune_dead_tokens(results, tag: str = "FCM") -> int:
+    """send_fcm_batch 결과에서 만료 토큰(is_dead_token_error)만 골라 비활성화"""
+    by_code = defaultdict(set)
+    for r in results:
+        if not r.success and r.token and is_dead_token_error(r.error_code, r.error):
+            by_code[r.error_code].add(r.token)
+
+    count = 0
+    for code, tokens in by_code.items():
+        try:
+            count += deactivate_tokens(tokens, reason=code)
+        except Exception as e:
+            logger.error(f"[{tag}] 만료 토큰 비활성화 실패 → code={code}, tokens={len(tokens)}, error={e}")
+
+    if count:
+        logger.info(f"[{tag}] 만료 토큰 {count}개 비활성화 → {dict((c, len(t)) for c, t in by_code.items())}")
+    return count
+
@@ -0,0 +1,72 @@
+# rag/analysis.py
+"""
+질문 분석 결과 (요청당 1회 계산)
+
+DrugRAGView / run_rag_task / 스트리밍이 analyze_query() 로 한 번 만들고
+answer_question → retrieve_top_chunks / build_answer / 증상·건강기능식품 경로 / 답변 캐시가 같은 값을 사용.
+(경로마다 detect_intent / is_medical_question / extract_symptoms / get_embedding 을 다시 부르지 않음)
+
+- 키워드 기반 값은 생성 시 계산 (rag.keyword_matcher 1회 순회 결과 공유)
+- 임베딩 / 정식 제품명(rag.product_index)은 처음 필요할 때 계산 → 인사/비의료/일반 답변 경로는 계산 없이 끝남
+"""
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List
+
+from .embeddings import get_embedding
+from .health_food import extract_specific_keywords
+from .intent_detector import detect_intent
+from .keyword_matcher import HEALTH_FOOD, analyze_keywords
+from .product_index import resolve_products
+from .symptom import detect_age_group, extract_symptoms
+from .utils import extract_med_names, is_greeting, is_medical_question, normalize
+
+
+@dataclass
+class QueryAnalysis:
+    question: str
+    normalized: str
+    intent: str
+    is_greeting: bool
+    is_medical: bool
+    is_health_food: bool
+    med_names: List[str]
+    symptoms: List[str]
+    hf_keywords: List[str]
+    age_group: str
+
+    @cached_property
+    def embedding(self) -> List[float]:
+        return get_embedding(self.question)
+
+    @cached_property
+    def products(self) -> List[str]:
+        """질문에 언급된 약의 정식 제품명 (Chunk.item_name 완전일치 값)"""
+        return resolve_products(self.question)
+
+    def summary(self) -> dict:
+        """로그용 (임베딩 제외)"""
+        return {
+            "intent": self.intent,
+            "medical": self.is_medical,
+            "meds": self.med_names,
+            "products": self.products[:3],
+            "symptoms": self.symptoms,
+            "hf_keywords": self.hf_keywords,
+            "age": self.age_group,
+        }
+
+
+def analyze_query(question: str) -> QueryAnalysis:
+    return QueryAnalysis(
+        question=question,
+        normalized=normalize(question),
+        intent=detect_intent(question),
+        is_greeting=is_greeting(question),
+        is_medical=is_medical_question(question),
+        is_health_food=analyze_keywords(question).has(HEALTH_FOOD),
+        med_names=extract_med_names(question),
+        symptoms=extract_symptoms(question),
+        hf_keywords=extract_specific_keywords(question),
+        age_group=detect_age_group(question),
+    )
@@ -0,0 +1,146 @@
+# rag/answer_cache.py
+"""
+RAG 최종 답변 캐시 (build_answer 앞단)
+
+1) 정규화한 질문 완전일치 → Redis 조회
+2) (선택) 최근 답변한 질문 임베딩과 코사인 유사도가 임계값 이상이면 그 답변 재사용
+   - 약품명이 다르면 유사해도 재사용하지 않음
+
+키에 Chunk 버전(rag.corpus)을 넣어서 재색인되면 이전 답변은 자동으로 무효화된다.
+최근 질문 목록은 버전별 Redis list (LPUSH + LTRIM) → 여러 워커가 동시에 저장해도 항목이 사라지지 않음
+"""
+import hashlib
+import json
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .corpus import get_corpus_version
+from .embeddings import get_embedding
+from .utils import extract_med_names, normalize
+
+if TYPE_CHECKING:
+    from .analysis import QueryAnalysis
+
+ANSWER_CACHE_PREFIX = "rag:answer:"
+
+
+def _ttl() -> int:
+    return getattr(settings, "RAG_ANSWER_CACHE_TTL", 60 * 60 * 6)
+
+
+def normalize_question(question: str, analysis: Optional["QueryAnalysis"] = None) -> str:
+    """공백 제거 + 소문자 + 끝 문장부호 제거"""
+    q_norm = analysis.normalized if analysis else normalize(question)
+    return q_norm.lower().rstrip("?!.~")
+
+
+def _med_names(question: str, analysis: Optional["QueryAnalysis"]) -> list:
+    return sorted(analysis.med_names if analysis else extract_med_names(question))
+
+
+def _embedding(question: str, analysis: Optional["QueryAnalysis"]):
+    return analysis.embedding if analysis else get_embedding(question)
+
+
+def _answer_key(version: str, q_norm: str) -> str:
+    digest = hashlib.sha1(q_norm.encode("utf-8")).hexdigest()
+    return f"{ANSWER_CACHE_PREFIX}{version}:{digest}"
+
+
+def _recent_key(version: str) -> str:
+    return f"{ANSWER_CACHE_PREFIX}recent:{version}"
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _recent_entries(version: str) -> list:
+    """최근 질문 목록 (최신순) [{"key", "meds", "emb"(float16 bytes)}]"""
+    entries = []
+    for raw in _redis().lrange(_recent_key(version), 0, -1):
+        entry = json.loads(raw)
+        entry["emb"] = bytes.fromhex(entry["emb"])
+        entries.append(entry)
+    return entries
+
+
+def _semantic_lookup(question: str, version: str, analysis: Optional["QueryAnalysis"] = None) -> Optional[dict]:
+    recent = _recent_entries(version)
+    if not recent:
+        return None
+
+    meds = _med_names(question, analysis)
+    candidates = [r for r in recent if r["meds"] == meds]
+    if not candidates:
+        return None
+
+    q = np.asarray(_embedding(question, analysis), dtype=np.float32)
+    matrix = np.stack([np.frombuffer(r["emb"], dtype=np.float16) for r in candidates]).astype(np.float32)
+    sims = matrix @ q
+
+    best = int(np.argmax(sims))
+    threshold = getattr(settings, "RAG_ANSWER_CACHE_SIMILARITY", 0.97)
+    if sims[best] < threshold:
+        return None
+
+    hit = cache.get(candidates[best]["key"])
+    if hit is not None:
+        print(f"[ANSWER-CACHE] semantic hit sim={sims[best]:.3f} q='{question[:30]}'")
+    return hit
+
+
+def get_cached_answer(question: str, analysis: Optional["QueryAnalysis"] = None) -> Optional[dict]:
+    """캐시된 {"answer", "contexts"} 또는 None"""
+    if not getattr(settings, "RAG_ANSWER_CACHE_ENABLED", True):
+        return None
+
+    try:
+        version = get_corpus_version()
+        hit = cache.get(_answer_key(version, normalize_question(question, analysis)))
+        if hit is not None:
+            print(f"[ANSWER-CACHE] exact hit q='{question[:30]}'")
+            return hit
+
+        if getattr(settings, "RAG_ANSWER_CACHE_SEMANTIC", False):
+            return _semantic_lookup(question, version, analysis)
+    except Exception as e:
+        print(f"[ANSWER-CACHE] 조회 실패: {e}")
+
+    return None
+
+
+def store_answer(question: str, result: dict, analysis: Optional["QueryAnalysis"] = None) -> None:
+    """답변 저장 (TTL 만료 + 최근 질문 목록은 RAG_ANSWER_CACHE_RECENT 개까지만 유지)"""
+    if not getattr(settings, "RAG_ANSWER_CACHE_ENABLED", True):
+        return
+
+    try:
+        version = get_corpus_version()
+        key = _answer_key(version, normalize_question(question, analysis))
+        cache.set(key, result, timeout=_ttl())
+
+        if not getattr(settings, "RAG_ANSWER_CACHE_SEMANTIC", False):
+            return
+
+        max_recent = getattr(settings, "RAG_ANSWER_CACHE_RECENT", 500)
+        entry = json.dumps({
+            "key": key,
+            "meds": _med_names(question, analysis),
+            "emb": np.asarray(_embedding(question, analysis), dtype=np.float16).tobytes().hex(),
+        })
+        recent_key = _recent_key(version)
+
+        # 같은 질문은 앞으로 옮기고 최근 max_recent 개만 유지 (명령 단위로 원자적)
+        pipe = _redis().pipeline(transaction=True)
+        pipe.lrem(recent_key, 0, entry)
+        pipe.lpush(recent_key, entry)
+        pipe.ltrim(recent_key, 0, max_recent - 1)
+        pipe.expire(recent_key, _ttl())
+        pipe.execute()
+    except Exception as e:
+        print(f"[ANSWER-CACHE] 저장 실패: {e}")
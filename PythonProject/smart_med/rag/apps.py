@@ -1,15 +1,27 @@
 import os
+import sys
 from django.apps import AppConfig
 
+
+def _is_server_process() -> bool:
+    """manage.py 명령 중에는 runserver(자동 재실행 자식)만 서버로 취급 (migrate 등에서 모델 로드 방지)"""
+    if not sys.argv or not sys.argv[0].endswith("manage.py"):
+        return True  # gunicorn / celery
+    if len(sys.argv) < 2 or sys.argv[1] != "runserver":
+        return False
+    # runserver 자동 재실행 때문에 두 번 로드되는 것 방지
+    return os.environ.get("RUN_MAIN") == "true"
+
+
 class RagConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "rag"
 
     def ready(self):
-      # runserver 자동 재실행 때문에 두 번 로드되는 것 방지
-      if os.environ.get("RUN_MAIN") == "true":
-          from .llm import preload_qwen
-          preload_qwen()  #1127임시주석
+        # 모델 미리 로드 여부/방식은 RAG_PRELOAD_MODE (rag.registry)
+        if _is_server_process():
+            from .registry import preload_from_settings
+            preload_from_settings()
 
 class HealthConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
@@ -150,4 +150,114 @@ GREETING_KEYWORDS = [
     "헬로",
     "좋은아침",
     "좋은하루",
-]
\ No newline at end of file
+]
+
+
+# ========== 건강기능식품 세부 키워드 (health_food.extract_specific_keywords) ==========
+# 미네랄/성분/신체부위/목적 매핑은 원문 질문(띄어쓰기 포함)에서 매칭
+
+# 비타민 복합
+HF_MULTIVITAMIN_KEYWORDS = {
+    '비타민': ['종합비타민', '멀티비타민'],
+}
+
+# 한글 비타민 표기 → 영문 (공백 제거한 질문에서 매칭)
+HF_KOREAN_VITAMIN_MAP = {
+    '비타민씨': '비타민C',
+    '비타민디': '비타민D',
+    '비타민비': '비타민B',
+    '비타민이': '비타민E',
+    '비타민에이': '비타민A',
+}
+
+# 주요 미네랄
+HF_MINERAL_KEYWORDS = {
+    '아연': ['아연'],
+    '엽산': ['엽산'],
+    '칼슘': ['칼슘'],
+    '마그네슘': ['마그네슘'],
+    '철분': ['철분', '철'],
+    '셀레늄': ['셀레늄', '셀렌'],
+    '크롬': ['크롬'],
+    '요오드': ['요오드'],
+    '망간': ['망간'],
+    '구리': ['구리'],
+    '비오틴': ['비오틴'],
+}
+
+# 주요 성분 (대소문자 무시)
+HF_COMPONENT_KEYWORDS = {
+    # 오메가
+    '오메가3': ['오메가3', '오메가-3', '오메가 3', '알티지'],
+    'DHA': ['dha', 'DHA'],
+    'EPA': ['epa', 'EPA'],
+
+    # 유산균
+    '유산균': ['유산균', '프로바이오틱스', '락토바실러스', '비피더스'],
+
+    # 눈 건강
+    '루테인': ['루테인'],
+    '지아잔틴': ['지아잔틴'],
+
+    # 관절
+    '글루코사민': ['글루코사민'],
+    'MSM': ['msm', 'MSM', '엠에스엠'],
+    '콘드로이틴': ['콘드로이틴'],
+    '콜라겐': ['콜라겐'],
+
+    # 항산화
+    '코엔자임': ['코엔자임', 'Q10', 'q10', '큐텐'],
+
+    # 간 건강
+    '밀크씨슬': ['밀크씨슬', '실리마린'],
+
+    # 에너지
+    '홍삼': ['홍삼'],
+    '인삼': ['인삼', '고려인삼'],
+
+    # 기타
+    '프로폴리스': ['프로폴리스'],
+    '로얄젤리': ['로얄젤리'],
+    '키토산': ['키토산'],
+    '식이섬유': ['식이섬유'],
+    '가르시니아': ['가르시니아'],
+    '쏘팔메토': ['쏘팔메토'],
+}
+
+# 신체 부위 / 기능
+HF_BODY_FUNCTION_KEYWORDS = {
+    # 신체 부위 - 정확한 매칭
+    '관절': ['관절'],
+    '뼈': ['뼈', '골다공증', '골밀도'],
+    '눈': ['눈', '시력', '안구'],
+    '간': ['간 ', '간기능', '간 건강', '간건강'],  # ✅ '간 ' 띄어쓰기 추가
+    '위': ['위 ', '위장', '위 건강'],  # ✅ '위 ' 띄어쓰기 추가
+    '장': ['장 건강', '장건강', '장 ', '장내', '프로바이오틱스', '유산균', '장'],  # ✅ 구체적으로
+    '혈관': ['혈관', '혈행', '혈액순환'],
+    '심장': ['심장', '심혈관'],
+    '뇌': ['뇌', '기억력', '인지기능'],
+    '피부': ['피부', '피부건강'],
+    '모발': ['모발', '머리카락', '탈모'],
+    '손톱': ['손톱'],
+
+    # 신체 기능
+    '면역': ['면역', '면역력', '면역기능'],
+    '항산화': ['항산화', '항산화작용'],
+    '에너지': ['에너지', '에너지생성'],
+    '대사': ['대사', '신진대사'],
+    '배변': ['배변', '배변활동'],
+    '소화': ['소화'],
+}
+
+# 증상 / 목적
+HF_PURPOSE_KEYWORDS = {
+    '피로': ['피로', '피로회복', '피곤'],
+    '숙면': ['수면', '숙면', '불면'],
+    '집중': ['집중', '집중력'],
+    '스트레스': ['스트레스'],
+    '다이어트': ['다이어트', '체중감량', '감량', '체지방'],  # ✅ 추가
+    '성장': ['성장', '키성장'],
+    '갱년기': ['갱년기'],
+    '임신': ['임신', '임산부'],
+    '노화': ['노화', '항노화'],
+}
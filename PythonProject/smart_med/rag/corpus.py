@@ -0,0 +1,32 @@
+# rag/corpus.py
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Chunk
+
+CORPUS_VERSION_KEY = "rag:corpus_version"
+
+
+def get_corpus_version() -> str:
+    """
+    Chunk 테이블 버전 스탬프
+    - 적재/재색인 후 bump_corpus_version()으로 갱신
+    - 캐시가 비어 있으면 (행 수, 최대 id)로 초기값을 만든다
+    """
+    version = cache.get(CORPUS_VERSION_KEY)
+    if version is None:
+        agg = Chunk.objects.aggregate(n=Count("id"), max_id=Max("id"))
+        version = f"{agg['n']}-{agg['max_id'] or 0}"
+        cache.add(CORPUS_VERSION_KEY, version, timeout=None)
+        version = cache.get(CORPUS_VERSION_KEY, version)
+    return version
+
+
+def bump_corpus_version() -> str:
+    """Chunk 데이터가 바뀌었음을 알림 → 벡터 엔진/캐시가 새 버전으로 갱신됨"""
+    version = uuid.uuid4().hex[:12]
+    cache.set(CORPUS_VERSION_KEY, version, timeout=None)
+    print(f"[CORPUS] version → {version}")
+    return version
@@ -17,6 +17,7 @@ rag_query_docs = extend_schema(
 약학 데이터 기반 RAG 검색 API입니다.
 - mode=async: Celery 활용 비동기 처리 (기본)
 - mode=sync: 즉시 RAG 처리 후 답변 반환
+- 같은(또는 매우 유사한) 질문의 답변이 캐시에 있으면 모드와 상관없이 즉시 반환 (cached=true)
 """,
     request={
         "application/json": {
@@ -48,6 +49,7 @@ rag_query_docs = extend_schema(
                     "Sync Example",
                     value={
                         "status": "done",
+                        "cached": False,
                         "result": {
                             "answer": "답변 내용...",
                             "contexts": [
@@ -91,6 +93,7 @@ rag_result_docs = extend_schema(
                     "Success",
                     value={
                         "status": "done",
+                        "cached": False,
                         "result": {
                             "answer": "결과 텍스트...",
                             "contexts": []
@@ -0,0 +1,20 @@
+# rag/embed_worker.py
+"""
+적재용 임베딩 프로세스 풀 워커 (rag.ingest)
+
+spawn 된 자식 프로세스는 Django 설정 없이 이 모듈만 import 하므로
+models / settings 를 import 하지 않는다.
+"""
+from typing import List
+
+
+def init_worker(torch_threads: int):
+    import torch
+
+    torch.set_num_threads(torch_threads)
+
+
+def encode_texts(texts: List[str], batch_size: int):
+    from .embeddings import get_embeddings
+
+    return get_embeddings(texts, batch_size=batch_size)
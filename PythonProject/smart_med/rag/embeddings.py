@@ -1,19 +1,179 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 EMD_DIM = 384
 
-_model = None
+# 질의 임베딩 캐시 (1차: 프로세스 내 LRU, 2차: Redis(django_redis)에 float16 bytes)
+EMB_CACHE_PREFIX = "rag:emb:"
+EMB_CACHE_STATS_EVERY = 100  # N번 조회마다 hit/miss 로그
+
+
+def load_embedder():
+    """rag.registry 로더 (sentence_transformers/torch 는 여기서만 import)"""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(MODEL_NAME)
+
 
 def _get_model():
-    global _model
-    if _model is None:
-        _model = SentenceTransformer(MODEL_NAME)
-    return _model
+    from .registry import EMBEDDER, get_registry
+
+    return get_registry().get(EMBEDDER)
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+class _EmbeddingCache:
+    def __init__(self):
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+
+    @staticmethod
+    def _settings(name: str, default):
+        from django.conf import settings
+
+        return getattr(settings, name, default)
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha1(f"{MODEL_NAME}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+            total = sum(self.stats.values())
+        if total % EMB_CACHE_STATS_EVERY == 0:
+            print(f"[EMB-CACHE] {embedding_cache_stats()}")
+
+    # ---------- 1차: LRU ----------
+    def lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            emb = self._lru.get(key)
+            if emb is not None:
+                self._lru.move_to_end(key)
+            return emb
+
+    def lru_put(self, key: str, emb: List[float]):
+        maxsize = self._settings("RAG_EMBED_CACHE_SIZE", 2048)
+        with self._lock:
+            self._lru[key] = emb
+            self._lru.move_to_end(key)
+            while len(self._lru) > maxsize:
+                self._lru.popitem(last=False)
+
+    # ---------- 2차: Redis ----------
+    def redis_get(self, key: str) -> Optional[List[float]]:
+        from django.core.cache import cache
+
+        try:
+            raw = cache.get(EMB_CACHE_PREFIX + key)
+        except Exception as e:
+            print(f"[EMB-CACHE] redis get 실패: {e}")
+            return None
+        if raw is None:
+            return None
+        return np.frombuffer(raw, dtype=np.float16).astype(np.float32).tolist()
+
+    def redis_put(self, key: str, emb: List[float]):
+        from django.core.cache import cache
+
+        ttl = self._settings("RAG_EMBED_CACHE_TTL", 60 * 60 * 24 * 7)
+        try:
+            cache.set(EMB_CACHE_PREFIX + key, np.asarray(emb, dtype=np.float16).tobytes(), timeout=ttl)
+        except Exception as e:
+            print(f"[EMB-CACHE] redis set 실패: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            for k in self.stats:
+                self.stats[k] = 0
+
+
+_cache = _EmbeddingCache()
+
 
 def get_embedding(text: str) -> list[float]:
-    text = " ".join(text.split())
+    """질의 임베딩 (LRU → Redis → 모델 인코딩 순서로 조회)"""
+    text = _normalize_text(text)
+    key = _cache.make_key(text)
+
+    emb = _cache.lru_get(key)
+    if emb is not None:
+        _cache.count("lru_hits")
+        return emb
+
+    emb = _cache.redis_get(key)
+    if emb is not None:
+        _cache.count("redis_hits")
+        _cache.lru_put(key, emb)
+        return emb
+
+    _cache.count("misses")
+    model = _get_model()
+    emb = model.encode(text, normalize_embeddings=True).tolist()
+
+    _cache.lru_put(key, emb)
+    _cache.redis_put(key, emb)
+    return emb
+
+
+def get_query_embeddings(texts: List[str], batch_size: int = 64) -> List[List[float]]:
+    """
+    질의 여러 개 임베딩 (배치 질의용)
+    캐시(LRU → Redis)에서 찾고, 없는 것만 모아 model.encode 1번 → 캐시에 저장
+    """
+    keys = [_cache.make_key(_normalize_text(t)) for t in texts]
+    embs: List[Optional[List[float]]] = []
+    for key in keys:
+        emb = _cache.lru_get(key)
+        if emb is not None:
+            _cache.count("lru_hits")
+        else:
+            emb = _cache.redis_get(key)
+            if emb is not None:
+                _cache.count("redis_hits")
+                _cache.lru_put(key, emb)
+        embs.append(emb)
+
+    missing = [i for i, emb in enumerate(embs) if emb is None]
+    if missing:
+        encoded = get_embeddings([texts[i] for i in missing], batch_size=batch_size)
+        for i, vec in zip(missing, encoded):
+            emb = vec.tolist()
+            _cache.count("misses")
+            _cache.lru_put(keys[i], emb)
+            _cache.redis_put(keys[i], emb)
+            embs[i] = emb
+
+    return embs
+
+
+def embedding_cache_stats() -> dict:
+    """질의 임베딩 캐시 hit/miss 카운터 (프로세스 단위)"""
+    stats = dict(_cache.stats)
+    total = sum(stats.values())
+    stats["lru_size"] = len(_cache._lru)
+    stats["hit_rate"] = round((stats["lru_hits"] + stats["redis_hits"]) / total, 3) if total else 0.0
+    return stats
+
+
+def get_embeddings(texts: List[str], batch_size: int = 64):
+    """여러 문장을 한 번에 인코딩 (적재용, 캐시 사용 안 함) → (len(texts), 384) float32 ndarray"""
+    texts = [_normalize_text(t) for t in texts]
     model = _get_model()
-    emb = model.encode(text, normalize_embeddings=True)
-    return emb.tolist()
\ No newline at end of file
+    return model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
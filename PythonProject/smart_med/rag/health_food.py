@@ -1,13 +1,24 @@
 # rag/health_food.py
 import re
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Optional
 from collections import OrderedDict
-from django.db.models import Q
-from pgvector.django import CosineDistance
 
-from .models import Chunk
+from .models import Chunk, SectionKind, HF_SECTION_KINDS
 from .embeddings import get_embedding
-from .utils import normalize, short
+from .search import hybrid_search_chunks, search_chunks
+from .utils import short
+from . import keyword_matcher as km
+from .constants import (
+    HF_KOREAN_VITAMIN_MAP,
+    HF_MULTIVITAMIN_KEYWORDS,
+    HF_MINERAL_KEYWORDS,
+    HF_COMPONENT_KEYWORDS,
+    HF_BODY_FUNCTION_KEYWORDS,
+    HF_PURPOSE_KEYWORDS,
+)
+
+if TYPE_CHECKING:
+    from .analysis import QueryAnalysis
 
 
 def extract_specific_keywords(query: str) -> List[str]:
@@ -20,138 +31,20 @@ def extract_specific_keywords(query: str) -> List[str]:
     for letter in vitamin_matches:
         keywords.append(f"비타민{letter.upper()}")
     
-    # ✅ 패턴 2: 한글 비타민
-    q_norm = normalize(query)
-    korean_vitamin_map = {
-        '비타민씨': '비타민C',
-        '비타민디': '비타민D',
-        '비타민비': '비타민B',
-        '비타민이': '비타민E',
-        '비타민에이': '비타민A',
-    }
-    for korean, english in korean_vitamin_map.items():
-        if korean in q_norm:
-            keywords.append(english)
-    
-    # ✅ 패턴 3: 비타민 복합
-    if '종합비타민' in query or '멀티비타민' in query:
-        keywords.append('비타민')
-    
-    # ✅ 패턴 4: 주요 미네랄
-    minerals = {
-        '아연': ['아연'],
-        '엽산': ['엽산'],
-        '칼슘': ['칼슘'],
-        '마그네슘': ['마그네슘'],
-        '철분': ['철분', '철'],
-        '셀레늄': ['셀레늄', '셀렌'],
-        '크롬': ['크롬'],
-        '요오드': ['요오드'],
-        '망간': ['망간'],
-        '구리': ['구리'],
-        '비오틴': ['비오틴'],
-    }
-    
-    for mineral, variants in minerals.items():
-        for variant in variants:
-            if variant in query:
-                keywords.append(mineral)
-                break
-    
-    # ✅ 패턴 5: 주요 성분
-    major_components = {
-        # 오메가
-        '오메가3': ['오메가3', '오메가-3', '오메가 3', '알티지'],
-        'DHA': ['dha', 'DHA'],
-        'EPA': ['epa', 'EPA'],
-        
-        # 유산균
-        '유산균': ['유산균', '프로바이오틱스', '락토바실러스', '비피더스'],
-        
-        # 눈 건강
-        '루테인': ['루테인'],
-        '지아잔틴': ['지아잔틴'],
-        
-        # 관절
-        '글루코사민': ['글루코사민'],
-        'MSM': ['msm', 'MSM', '엠에스엠'],
-        '콘드로이틴': ['콘드로이틴'],
-        '콜라겐': ['콜라겐'],
-        
-        # 항산화
-        '코엔자임': ['코엔자임', 'Q10', 'q10', '큐텐'],
-        
-        # 간 건강
-        '밀크씨슬': ['밀크씨슬', '실리마린'],
-        
-        # 에너지
-        '홍삼': ['홍삼'],
-        '인삼': ['인삼', '고려인삼'],
-        
-        # 기타
-        '프로폴리스': ['프로폴리스'],
-        '로얄젤리': ['로얄젤리'],
-        '키토산': ['키토산'],
-        '식이섬유': ['식이섬유'],
-        '가르시니아': ['가르시니아'],
-        '쏘팔메토': ['쏘팔메토'],
-    }
-    
-    for component, variants in major_components.items():
-        for variant in variants:
-            if variant.lower() in query.lower():
-                keywords.append(component)
-                break
-    
-    # ✅ 패턴 6: 신체 부위 / 기능
-    body_parts_and_functions = {
-        # 신체 부위 - 정확한 매칭
-        '관절': ['관절'],
-        '뼈': ['뼈', '골다공증', '골밀도'],
-        '눈': ['눈', '시력', '안구'],
-        '간': ['간 ', '간기능', '간 건강', '간건강'],  # ✅ '간 ' 띄어쓰기 추가
-        '위': ['위 ', '위장', '위 건강'],  # ✅ '위 ' 띄어쓰기 추가
-        '장': ['장 건강', '장건강', '장 ', '장내', '프로바이오틱스', '유산균', '장'],  # ✅ 구체적으로
-        '혈관': ['혈관', '혈행', '혈액순환'],
-        '심장': ['심장', '심혈관'],
-        '뇌': ['뇌', '기억력', '인지기능'],
-        '피부': ['피부', '피부건강'],
-        '모발': ['모발', '머리카락', '탈모'],
-        '손톱': ['손톱'],
-
-        # 신체 기능
-        '면역': ['면역', '면역력', '면역기능'],
-        '항산화': ['항산화', '항산화작용'],
-        '에너지': ['에너지', '에너지생성'],
-        '대사': ['대사', '신진대사'],
-        '배변': ['배변', '배변활동'],
-        '소화': ['소화'],
-    }
-    
-    for keyword, variants in body_parts_and_functions.items():
-        for variant in variants:
-            if variant in query:
-                keywords.append(keyword)
-                break
-    
-    # ✅ 패턴 7: 증상 / 목적
-    symptoms_and_purposes = {
-        '피로': ['피로', '피로회복', '피곤'],
-        '숙면': ['수면', '숙면', '불면'],
-        '집중': ['집중', '집중력'],
-        '스트레스': ['스트레스'],
-        '다이어트': ['다이어트', '체중감량', '감량', '체지방'],  # ✅ 추가
-        '성장': ['성장', '키성장'],
-        '갱년기': ['갱년기'],
-        '임신': ['임신', '임산부'],
-        '노화': ['노화', '항노화'],
-    }
-    
-    for symptom, variants in symptoms_and_purposes.items():
-        for variant in variants:
-            if variant in query:
-                keywords.append(symptom)
-                break
+    # ✅ 패턴 2~7: 한글 비타민 / 비타민 복합 / 미네랄 / 성분 / 신체 부위·기능 / 증상·목적
+    # 키워드 오토마톤 결과를 매핑 순서대로 (rag/constants.py HF_* 테이블)
+    hits = km.analyze_keywords(query)
+    ordered = [
+        (km.HF_VITAMIN, HF_KOREAN_VITAMIN_MAP.values()),
+        (km.HF_MULTIVITAMIN, HF_MULTIVITAMIN_KEYWORDS),
+        (km.HF_MINERAL, HF_MINERAL_KEYWORDS),
+        (km.HF_COMPONENT, HF_COMPONENT_KEYWORDS),
+        (km.HF_BODY, HF_BODY_FUNCTION_KEYWORDS),
+        (km.HF_PURPOSE, HF_PURPOSE_KEYWORDS),
+    ]
+    for category, values in ordered:
+        matched = hits.get(category)
+        keywords.extend(v for v in values if v in matched)
     
     # 중복 제거
     keywords = list(dict.fromkeys(keywords))
@@ -159,43 +52,42 @@ def extract_specific_keywords(query: str) -> List[str]:
     return keywords
 
 
-def search_health_food_chunks(query: str, k: int = 10, max_distance: float = 0.6) -> List[Chunk]:
+def search_health_food_chunks(
+    query: str,
+    k: int = 10,
+    max_distance: float = 0.6,
+    ef_search: Optional[int] = None,
+    analysis: Optional["QueryAnalysis"] = None,
+) -> List[Chunk]:
     """건강기능식품 검색 - 임베딩 유사도 + 키워드 필터링"""
-    q_emb = get_embedding(query)
-    
-    keywords = extract_specific_keywords(query)
+    q_emb = analysis.embedding if analysis else get_embedding(query)
     
-    qs = Chunk.objects.filter(section__startswith="hf_function")
+    keywords = analysis.hf_keywords if analysis else extract_specific_keywords(query)
     
+    hf_function = [SectionKind.HF_FUNCTION]
+    chunks: List[Chunk] = []
+
     if keywords:
-        keyword_q = Q()
-        for kw in keywords:
-            keyword_q |= Q(text__icontains=kw) | Q(item_name__icontains=kw)
-        
-        filtered_qs = qs.filter(keyword_q)
-        
-        if filtered_qs.exists():
-            qs = filtered_qs
-            print(f"[HF-RAG] Filtered by keywords: {keywords}")
-        else:
-            print(f"[HF-RAG] No results for keywords: {keywords}, using all")
+        # 키워드 매칭(trigram 인덱스) + 임베딩 순위를 RRF 로 합침 (키워드 매칭이 없으면 임베딩 순위만)
+        chunks = hybrid_search_chunks(q_emb, k, section_kinds=hf_function, keyword_terms=keywords, ef_search=ef_search)
+        print(f"[HF-RAG] Hybrid by keywords: {keywords}")
     else:
         print(f"[HF-RAG] No specific keywords found, using embedding similarity only")
+        chunks = search_chunks(q_emb, k, section_kinds=hf_function, ef_search=ef_search)
     
-    if not qs.exists():
-        qs = Chunk.objects.filter(section__startswith="hf_")
-    
-    qs = qs.annotate(distance=CosineDistance("embedding", q_emb)).order_by("distance")[:k]
-    
-    chunks = list(qs)
+    if not chunks:
+        chunks = search_chunks(q_emb, k, section_kinds=HF_SECTION_KINDS, ef_search=ef_search)
+
     if not chunks:
         return []
     
-    first_dist = float(chunks[0].distance) if chunks[0].distance is not None else None
-    print(f"[HF-RAG] top_k={len(chunks)}, first_dist={first_dist}, keywords={keywords}")
+    # 하이브리드 결과는 키워드 일치 행이 먼저라 chunks[0] 이 가장 가까운 행이 아닐 수 있음 → 최소 거리로 판단
+    distances = [float(c.distance) for c in chunks if c.distance is not None]
+    min_dist = min(distances) if distances else None
+    print(f"[HF-RAG] top_k={len(chunks)}, min_dist={min_dist}, keywords={keywords}")
     
-    if first_dist is not None and first_dist > max_distance:
-        print(f"[HF-RAG] distance too far ({first_dist} > {max_distance}) → 사용 안 함")
+    if min_dist is not None and min_dist > max_distance:
+        print(f"[HF-RAG] distance too far ({min_dist} > {max_distance}) → 사용 안 함")
         return []
     
     return chunks
@@ -220,7 +112,7 @@ def collect_hf_products(chunks: List[Chunk]) -> "Dict[str, dict]":
 
     missing = [n for n, d in products.items() if not d["function"]]
     if missing:
-        extra = Chunk.objects.filter(item_name__in=missing, section__startswith="hf_function")
+        extra = Chunk.objects.filter(item_name__in=missing, section_kind=SectionKind.HF_FUNCTION)
         for c in extra:
             name = (c.item_name or "").strip()
             if products[name]["function"]:
@@ -0,0 +1,209 @@
+# rag/inference.py
+"""
+프로세스 내 LLM 배치 추론 서비스
+
+여러 스레드(Celery threads pool / gunicorn threads)에서 들어온 프롬프트를 큐에 모아
+최대 RAG_LLM_MAX_BATCH_SIZE 개, 최대 RAG_LLM_BATCH_WAIT_MS 만큼 기다린 뒤
+left padding + greedy decoding 으로 한 번에 generate 한다.
+각 호출자는 자기 Future로 결과를 받는다.
+timeout 을 준 요청은 deadline 이 지나면 generate 를 중단(StoppingCriteria)하고 TimeoutError 로 끝낸다
+(큐에서 기다리다 이미 deadline 이 지난 요청은 생성하지 않고 바로 실패).
+배치에 요청이 1개뿐이면 padding 없이 rag.llm.prepare_inputs 경로
+(draft 모델 speculative decoding 또는 고정 prefix KV cache)로 생성한다.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from django.conf import settings
+
+
+@dataclass
+class GenerationRequest:
+    prompt: str
+    static_prefix: Optional[str] = None
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.time)
+    deadline: Optional[float] = None
+
+
+@dataclass
+class GenerationResult:
+    text: str
+    input_tokens: int
+    output_tokens: int
+    prefix_tokens: int
+    batch_size: int
+    queue_wait: float
+    elapsed: float
+
+
+class BatchingGenerator:
+    def __init__(self, max_batch_size: int, max_wait_ms: int):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[GenerationRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "last_batch_size": 0, "max_batch_size_seen": 0}
+
+    # ----------------------------------------------
+    # 클라이언트 API
+    # ----------------------------------------------
+    def submit(
+        self, prompt: str, static_prefix: Optional[str] = None, deadline: Optional[float] = None
+    ) -> Future:
+        self._ensure_worker()
+        req = GenerationRequest(prompt=prompt, static_prefix=static_prefix, deadline=deadline)
+        self._queue.put(req)
+        return req.future
+
+    def generate(
+        self, prompt: str, static_prefix: Optional[str] = None, timeout: Optional[float] = None
+    ) -> GenerationResult:
+        deadline = time.time() + timeout if timeout else None
+        return self.submit(prompt, static_prefix, deadline).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            s = dict(self._stats)
+        s["queue_depth"] = self._queue.qsize()
+        s["avg_batch_size"] = round(s["requests"] / s["batches"], 2) if s["batches"] else 0.0
+        return s
+
+    # ----------------------------------------------
+    # 워커 스레드
+    # ----------------------------------------------
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="llm-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self) -> List[GenerationRequest]:
+        batch = [self._queue.get()]
+        deadline = time.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _drop_expired(self, batch: List[GenerationRequest]) -> List[GenerationRequest]:
+        """큐에서 기다리는 동안 deadline 이 지난 요청은 생성하지 않고 TimeoutError 로 종료"""
+        now = time.time()
+        alive = []
+        for req in batch:
+            if req.deadline is not None and req.deadline <= now:
+                req.future.set_exception(TimeoutError("LLM 대기 시간 초과"))
+            else:
+                alive.append(req)
+        if len(alive) < len(batch):
+            print(f"[LLM-BATCH] 대기 중 시간 초과 {len(batch) - len(alive)}건 건너뜀")
+        return alive
+
+    def _loop(self):
+        while True:
+            batch = self._drop_expired(self._collect_batch())
+            if not batch:
+                continue
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                print(f"[LLM-BATCH] generate 실패: {e}")
+                for req in batch:
+                    if not req.future.done():
+                        req.future.set_exception(e)
+
+    def _run_batch(self, batch: List[GenerationRequest]):
+        from .llm import _load_model, deadline_stopping_criteria, generate_ids, prepare_inputs, MAX_PROMPT_TOKENS
+
+        tokenizer, model = _load_model()
+        started = time.time()
+
+        if len(batch) == 1:
+            inputs, extra, prefix_tokens = prepare_inputs(tokenizer, model, batch[0].prompt, batch[0].static_prefix)
+        else:
+            # decoder-only 모델 배치 생성은 left padding 이어야 마지막 토큰 위치가 맞음
+            tokenizer.padding_side = "left"
+            inputs = tokenizer(
+                [r.prompt for r in batch],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=MAX_PROMPT_TOKENS,
+            )
+            inputs = {k: v.to(model.device) for k, v in inputs.items()}
+            extra, prefix_tokens = {}, 0
+
+        input_len = inputs["input_ids"].shape[1]
+
+        # 배치 전체가 같은 generate 이므로 가장 늦은 deadline 까지만 생성 (deadline 없는 요청이 있으면 제한 없음)
+        gen_kwargs = {}
+        deadlines = [r.deadline for r in batch]
+        if all(d is not None for d in deadlines):
+            gen_kwargs["stopping_criteria"] = deadline_stopping_criteria(max(deadlines))
+
+        outputs = generate_ids(tokenizer, model, inputs, extra, **gen_kwargs)
+
+        elapsed = time.time() - started
+        attention = inputs["attention_mask"]
+
+        for i, req in enumerate(batch):
+            generated_ids = outputs[i][input_len:]
+            text = tokenizer.decode(generated_ids, skip_special_tokens=True) if len(generated_ids) else ""
+            req.future.set_result(
+                GenerationResult(
+                    text=text,
+                    input_tokens=int(attention[i].sum()),
+                    output_tokens=int((generated_ids != tokenizer.pad_token_id).sum()),
+                    prefix_tokens=prefix_tokens,
+                    batch_size=len(batch),
+                    queue_wait=started - req.enqueued_at,
+                    elapsed=elapsed,
+                )
+            )
+
+        with self._stats_lock:
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["max_batch_size_seen"] = max(self._stats["max_batch_size_seen"], len(batch))
+
+        print(
+            f"[LLM-BATCH] batch_size={len(batch)}, queue_depth={self._queue.qsize()}, "
+            f"input_len={input_len}, elapsed={elapsed:.2f}s"
+        )
+
+
+_generator: Optional[BatchingGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def get_generator() -> BatchingGenerator:
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = BatchingGenerator(
+                    max_batch_size=getattr(settings, "RAG_LLM_MAX_BATCH_SIZE", 8),
+                    max_wait_ms=getattr(settings, "RAG_LLM_BATCH_WAIT_MS", 20),
+                )
+    return _generator
+
+
+def inference_stats() -> dict:
+    """큐 길이 / 배치 크기 지표 (프로세스 단위)"""
+    return get_generator().stats()
@@ -0,0 +1,285 @@
+# rag/ingest.py
+"""
+Chunk 적재 파이프라인 (load_chunks / load_healthfood 공용)
+
+JSON 스트리밍 읽기 → chunk 텍스트 생성 → 배치 임베딩(선택: 프로세스 풀) → bulk_create 배치 저장
+메모리에는 인코딩 중인 배치와 저장 대기 중인 Chunk만 올라간다.
+
+재색인(reindex_chunks)은 chunk_id가 (제품, 섹션, 순번, 본문 해시)에서 결정되므로
+새로 생기거나 바뀐 chunk만 임베딩/upsert 하고, 사라진 chunk는 마지막에 삭제한다.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+from .embed_worker import encode_texts, init_worker
+from .models import Chunk, section_kind_of
+
+READ_BUFFER_CHARS = 1 << 16
+DELETE_BATCH = 1000
+
+# upsert 시 갱신할 컬럼 (chunk_id 충돌 = 같은 내용이지만 --full 재임베딩 등)
+UPSERT_FIELDS = ["item_name", "section", "section_kind", "chunk_index", "text", "embedding"]
+
+
+def make_chunk_id(prefix: str, item_name: str, section: str, chunk_index: int, text: str) -> str:
+    """(제품, 섹션, 순번, 본문)이 같으면 항상 같은 chunk_id → 재적재 시 변경분만 찾을 수 있음"""
+    text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    key = f"{item_name}\x1f{section}\x1f{chunk_index}\x1f{text_hash}"
+    return f"{prefix}_{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+
+@dataclass
+class ChunkRecord:
+    chunk_id: str
+    item_name: str
+    section: str
+    chunk_index: int
+    text: str
+
+
+def iter_json_array(path: Path) -> Iterator[dict]:
+    """최상위 JSON 배열을 원소 단위로 읽음 (파일 전체를 메모리에 올리지 않음)"""
+    decoder = json.JSONDecoder()
+
+    with open(path, encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        started = False
+        eof = False
+
+        while True:
+            # 공백 / 구분자 건너뛰기
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,\ufeff":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                buf, pos = f.read(READ_BUFFER_CHARS), 0
+                eof = not buf
+
+            if pos >= len(buf):
+                return
+
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"JSON 배열이 아닙니다: {path}")
+                started = True
+                pos += 1
+                continue
+
+            if buf[pos] == "]":
+                return
+
+            # 원소 하나 디코딩 (버퍼가 부족하면 더 읽고 재시도)
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    more = f.read(READ_BUFFER_CHARS)
+                    if not more:
+                        raise
+                    buf, pos = buf[pos:] + more, 0
+
+            yield obj
+            buf, pos = buf[end:], 0
+
+
+# ==================================================
+# 임베딩 (단일 프로세스 / 프로세스 풀)
+# ==================================================
+def _batched(records: Iterable[ChunkRecord], size: int) -> Iterator[List[ChunkRecord]]:
+    batch: List[ChunkRecord] = []
+    for r in records:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _encode_stream(records: Iterable[ChunkRecord], batch_size: int, workers: int):
+    """(records, embeddings) 배치를 순서대로 생성"""
+    if workers <= 1:
+        for batch in _batched(records, batch_size):
+            yield batch, encode_texts([r.text for r in batch], batch_size)
+        return
+
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    ctx = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=init_worker,
+        initargs=(torch_threads,),
+    ) as pool:
+        pending = deque()
+        for batch in _batched(records, batch_size):
+            pending.append((batch, pool.submit(encode_texts, [r.text for r in batch], batch_size)))
+            # 진행 중인 배치 수 제한 → 메모리 상한 유지
+            if len(pending) >= workers * 2:
+                done_batch, fut = pending.popleft()
+                yield done_batch, fut.result()
+        while pending:
+            done_batch, fut = pending.popleft()
+            yield done_batch, fut.result()
+
+
+# ==================================================
+# 저장
+# ==================================================
+class IngestStats:
+    def __init__(self, label: str):
+        self.label = label
+        self.chunks = 0
+        self.started = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    @property
+    def rate(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self, final: bool = False):
+        tag = "DONE" if final else "INGEST"
+        print(
+            f"[{tag}] {self.label}: chunk {self.chunks}개, "
+            f"elapsed={self.elapsed:.1f}s, {self.rate:.1f} chunks/sec"
+        )
+
+
+def ingest_chunks(
+    records: Iterable[ChunkRecord],
+    label: str = "chunks",
+    batch_size: Optional[int] = None,
+    write_batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> IngestStats:
+    """ChunkRecord 스트림을 임베딩해서 Chunk 테이블에 bulk_create"""
+    batch_size = batch_size or getattr(settings, "RAG_EMBED_BATCH_SIZE", 64)
+    write_batch_size = write_batch_size or getattr(settings, "RAG_INGEST_WRITE_BATCH", 1000)
+    workers = getattr(settings, "RAG_EMBED_WORKERS", 0) if workers is None else workers
+
+    stats = IngestStats(label)
+    pending: List[Chunk] = []
+
+    for batch, embs in _encode_stream(records, batch_size, workers):
+        for r, emb in zip(batch, embs):
+            pending.append(
+                Chunk(
+                    chunk_id=r.chunk_id,
+                    item_name=r.item_name,
+                    section=r.section,
+                    section_kind=section_kind_of(r.section),
+                    chunk_index=r.chunk_index,
+                    text=r.text,
+                    embedding=emb,
+                )
+            )
+
+        if len(pending) >= write_batch_size:
+            _upsert(pending, write_batch_size)
+            stats.chunks += len(pending)
+            pending = []
+            stats.report()
+
+    if pending:
+        _upsert(pending, write_batch_size)
+        stats.chunks += len(pending)
+
+    stats.report(final=True)
+    return stats
+
+
+def _upsert(chunks: List[Chunk], batch_size: int):
+    Chunk.objects.bulk_create(
+        chunks,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["chunk_id"],
+        update_fields=UPSERT_FIELDS,
+    )
+
+
+class ReindexStats:
+    def __init__(self, label: str):
+        self.label = label
+        self.embedded = 0
+        self.unchanged = 0
+        self.deleted = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.embedded or self.deleted)
+
+    def report(self):
+        print(
+            f"[REINDEX] {self.label}: 신규/변경 {self.embedded}개, "
+            f"유지 {self.unchanged}개, 삭제 {self.deleted}개"
+        )
+
+
+def reindex_chunks(
+    records: Iterable[ChunkRecord],
+    scope: QuerySet,
+    label: str = "chunks",
+    full: bool = False,
+    batch_size: Optional[int] = None,
+    write_batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> ReindexStats:
+    """
+    scope(예: 의약품 chunk 전체) 안에서 records 기준으로 차분 재색인
+    1) 기존 chunk_id와 같으면 임베딩 생략
+    2) 새 chunk_id만 임베딩 → upsert
+    3) records에 없는 기존 chunk 삭제 (마지막에 수행 → 재색인 중에도 검색 가능)
+    full=True 이면 모든 chunk를 다시 임베딩해서 upsert (임베딩 모델 교체 시)
+    """
+    stats = ReindexStats(label)
+    existing = set() if full else set(scope.values_list("chunk_id", flat=True))
+    seen: set = set()
+
+    def changed_records() -> Iterator[ChunkRecord]:
+        for r in records:
+            if r.chunk_id in seen:
+                continue  # 같은 내용 중복 (같은 배치 안 ON CONFLICT 충돌 방지)
+            seen.add(r.chunk_id)
+
+            if r.chunk_id in existing:
+                stats.unchanged += 1
+                continue
+            yield r
+
+    stats.embedded = ingest_chunks(
+        changed_records(),
+        label=label,
+        batch_size=batch_size,
+        write_batch_size=write_batch_size,
+        workers=workers,
+    ).chunks
+
+    # 사라진 chunk 삭제
+    if full:
+        existing = set(scope.values_list("chunk_id", flat=True))
+    orphans = list(existing - seen)
+    for start in range(0, len(orphans), DELETE_BATCH):
+        deleted, _ = Chunk.objects.filter(chunk_id__in=orphans[start : start + DELETE_BATCH]).delete()
+        stats.deleted += deleted
+
+    stats.report()
+    return stats
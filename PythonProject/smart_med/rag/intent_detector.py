@@ -7,41 +7,31 @@ from .constants import (
     INTENT_WARNING,
     INTENT_SYMPTOM,
     INTENT_GENERAL,
-    SIDE_EFFECT_KEYS,
-    EFFICACY_KEYS,
-    DOSAGE_KEYS,
-    INTERACTION_KEYS,
-    WARNING_KEYS,
-    HEALTH_FOOD_KEYS,
-    FOLLOWUP_INCLUDE_KEYS,
 )
-from .utils import normalize
-from .symptom import SYMPTOM_KEYWORDS
+from . import keyword_matcher as km
 
+# 앞에서부터 먼저 걸리는 intent 사용
+INTENT_PRIORITY = [
+    (km.SIDE_EFFECT, INTENT_SIDE_EFFECT),
+    (km.EFFICACY, INTENT_EFFICACY),
+    (km.DOSAGE, INTENT_DOSAGE),
+    (km.INTERACTION, INTENT_INTERACTION),
+    (km.WARNING, INTENT_WARNING),
+    (km.HEALTH_FOOD, INTENT_EFFICACY),
+]
 
-def detect_intent(question: str) -> str:
-    q = normalize(question)
 
-    if any(k in q for k in SIDE_EFFECT_KEYS):
-        return INTENT_SIDE_EFFECT
-    if any(k in q for k in EFFICACY_KEYS):
-        return INTENT_EFFICACY
-    if any(k in q for k in DOSAGE_KEYS):
-        return INTENT_DOSAGE
-    if any(k in q for k in INTERACTION_KEYS):
-        return INTENT_INTERACTION
-    if any(k in q for k in WARNING_KEYS):
-        return INTENT_WARNING
+def detect_intent(question: str) -> str:
+    hits = km.analyze_keywords(question)
 
-    if any(h in q for h in HEALTH_FOOD_KEYS):
-        return INTENT_EFFICACY
+    for category, intent in INTENT_PRIORITY:
+        if hits.has(category):
+            return intent
 
-    if any(sym in q for sym in SYMPTOM_KEYWORDS) and any(
-        k in q for k in FOLLOWUP_INCLUDE_KEYS
-    ):
+    if hits.has(km.SYMPTOM) and hits.has(km.FOLLOWUP):
         return INTENT_EFFICACY
 
-    if any(sym in q for sym in SYMPTOM_KEYWORDS):
+    if hits.has(km.SYMPTOM):
         return INTENT_SYMPTOM
 
-    return INTENT_GENERAL
\ No newline at end of file
+    return INTENT_GENERAL
@@ -1,6 +1,6 @@
 # rag/intents.py
 import re
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 from .models import Chunk
 
@@ -27,11 +27,19 @@ def _pick_target_chunk(
     question: str,
     chunks: List[Chunk],
     prefer_sections: Optional[List[str]] = None,
+    products: Optional[Iterable[str]] = None,
 ) -> Optional[Chunk]:
     """질문에 포함된 약 이름 + 섹션 우선순위로 1개 선택."""
     if not chunks:
         return None
 
+    # 0) 제품명 사전(rag.product_index)으로 찾은 정식 제품명과 완전일치
+    if products:
+        wanted = set(products)
+        for c in chunks:
+            if c.item_name in wanted:
+                return c
+
     q = _normalize(question)
 
     # 1) 질문에 약 이름 일부가 들어간 경우 우선
@@ -53,11 +61,12 @@ def _pick_target_chunk(
     return chunks[0]
 
 
-def build_side_effect_answer(question: str, chunks: List[Chunk]) -> str:
+def build_side_effect_answer(question: str, chunks: List[Chunk], products: Optional[Iterable[str]] = None) -> str:
     c = _pick_target_chunk(
         question,
         chunks,
         prefer_sections=["부작용", "이상반응"],
+        products=products,
     )
     if not c:
         return "참고 문서에서 해당 약의 부작용 정보를 찾지 못했습니다."
@@ -98,11 +107,12 @@ def build_side_effect_answer(question: str, chunks: List[Chunk]) -> str:
     return "\n".join(lines)
 
 
-def build_efficacy_answer(question: str, chunks: List[Chunk]) -> str:
+def build_efficacy_answer(question: str, chunks: List[Chunk], products: Optional[Iterable[str]] = None) -> str:
     c = _pick_target_chunk(
         question,
         chunks,
         prefer_sections=["효능효과", "효능"],
+        products=products,
     )
 
     if not c:
@@ -118,11 +128,12 @@ def build_efficacy_answer(question: str, chunks: List[Chunk]) -> str:
     return core
 
 
-def build_dosage_answer(question: str, chunks: List[Chunk]) -> str:
+def build_dosage_answer(question: str, chunks: List[Chunk], products: Optional[Iterable[str]] = None) -> str:
     c = _pick_target_chunk(
         question,
         chunks,
         prefer_sections=["용법용량"],
+        products=products,
     )
     if not c:
         return "참고 문서에서 해당 약의 용법·용량 정보를 찾지 못했습니다."
@@ -138,11 +149,12 @@ def build_dosage_answer(question: str, chunks: List[Chunk]) -> str:
     return core
 
 
-def build_interaction_answer(question: str, chunks: List[Chunk]) -> str:
+def build_interaction_answer(question: str, chunks: List[Chunk], products: Optional[Iterable[str]] = None) -> str:
     c = _pick_target_chunk(
         question,
         chunks,
         prefer_sections=["상호작용"],
+        products=products,
     )
     if not c:
         return "참고 문서에서 해당 약의 약물 상호작용 정보를 찾지 못했습니다."
@@ -157,11 +169,12 @@ def build_interaction_answer(question: str, chunks: List[Chunk]) -> str:
     return core
 
 
-def build_warning_answer(question: str, chunks: List[Chunk]) -> str:
+def build_warning_answer(question: str, chunks: List[Chunk], products: Optional[Iterable[str]] = None) -> str:
     c = _pick_target_chunk(
         question,
         chunks,
         prefer_sections=["사용상 주의사항", "주의사항", "주의", "경고"],
+        products=products,
     )
     if not c:
         return "참고 문서에서 해당 약의 주의사항·경고 정보를 찾지 못했습니다."
@@ -0,0 +1,228 @@
+# rag/keyword_matcher.py
+"""
+질문 키워드 매칭 (Aho–Corasick 오토마톤)
+
+detect_intent / is_medical_question / is_greeting / extract_symptoms / extract_specific_keywords 가
+키워드 리스트마다 `any(k in q for k in LIST)` 로 같은 질문을 수십 번 다시 훑던 것을
+import 시 한 번 만든 오토마톤으로 질문 1회 순회 → 카테고리별 매칭 결과로 바꿈.
+
+- 기존 함수들은 서로 다른 형태의 질문 문자열에서 매칭했으므로, 순회 한 번에 상태 3개를 같이 진행
+    raw  : 소문자화한 원문 (띄어쓰기 포함)         → 약품명 힌트, 건강기능식품 세부 키워드
+    norm : raw 에서 공백(" ") 제거                 → intent / 의료 필터 / 인사 / 한글 비타민 표기
+    ko   : 한글·공백문자만 남긴 뒤 공백(" ") 제거   → 증상 카테고리 (extract_symptoms)
+- 패턴은 모두 소문자로 등록 (한글은 영향 없음, 성분명 영문만 대소문자 무시 → 기존과 같음)
+- analyze_keywords(question) 는 같은 질문에 대해 캐시된 결과를 돌려주므로
+  한 요청 안에서 여러 분류 함수가 호출돼도 실제 매칭은 한 번
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from .constants import (
+    SIDE_EFFECT_KEYS,
+    EFFICACY_KEYS,
+    DOSAGE_KEYS,
+    INTERACTION_KEYS,
+    WARNING_KEYS,
+    MED_NAME_HINT,
+    FOLLOWUP_INCLUDE_KEYS,
+    HEALTH_FOOD_KEYS,
+    MEDICAL_KEYWORDS,
+    NON_MEDICAL_KEYWORDS,
+    GREETING_KEYWORDS,
+    HF_MULTIVITAMIN_KEYWORDS,
+    HF_KOREAN_VITAMIN_MAP,
+    HF_MINERAL_KEYWORDS,
+    HF_COMPONENT_KEYWORDS,
+    HF_BODY_FUNCTION_KEYWORDS,
+    HF_PURPOSE_KEYWORDS,
+)
+from .symptom import SYMPTOM_CATEGORY_MAP, SYMPTOM_KEYWORDS
+
+# ========== 매칭 대상 문자열 형태 ==========
+TEXT_RAW = 0
+TEXT_NORM = 1
+TEXT_KO = 2
+TEXT_FORMS = (TEXT_RAW, TEXT_NORM, TEXT_KO)
+
+# ========== 카테고리 ==========
+SIDE_EFFECT = "side_effect"
+EFFICACY = "efficacy"
+DOSAGE = "dosage"
+INTERACTION = "interaction"
+WARNING = "warning"
+HEALTH_FOOD = "health_food"
+FOLLOWUP = "followup"
+SYMPTOM = "symptom"
+MEDICAL = "medical"
+NON_MEDICAL = "non_medical"
+GREETING = "greeting"
+MED_HINT = "med_hint"
+SYMPTOM_BASE = "symptom_base"  # 값 = SYMPTOM_CATEGORY_MAP 키 (두통, 속쓰림 ...)
+HF_VITAMIN = "hf_vitamin"
+HF_MULTIVITAMIN = "hf_multivitamin"
+HF_MINERAL = "hf_mineral"
+HF_COMPONENT = "hf_component"
+HF_BODY = "hf_body"
+HF_PURPOSE = "hf_purpose"
+
+# (문자열 형태, 카테고리, 패턴, 매칭 시 돌려줄 값)
+Entry = Tuple[int, str, str, str]
+
+
+def _keys(form: int, category: str, keys: Iterable[str]) -> List[Entry]:
+    return [(form, category, k, k) for k in keys]
+
+
+def _mapping(form: int, category: str, mapping: Dict[str, List[str]]) -> List[Entry]:
+    return [(form, category, variant, value) for value, variants in mapping.items() for variant in variants]
+
+
+def default_entries() -> List[Entry]:
+    """rag/constants.py, symptom.py 키워드 테이블 → 매칭 항목"""
+    symptom_map = {base: [base, *words] for base, words in SYMPTOM_CATEGORY_MAP.items()}
+    return [
+        *_keys(TEXT_NORM, SIDE_EFFECT, SIDE_EFFECT_KEYS),
+        *_keys(TEXT_NORM, EFFICACY, EFFICACY_KEYS),
+        *_keys(TEXT_NORM, DOSAGE, DOSAGE_KEYS),
+        *_keys(TEXT_NORM, INTERACTION, INTERACTION_KEYS),
+        *_keys(TEXT_NORM, WARNING, WARNING_KEYS),
+        *_keys(TEXT_NORM, HEALTH_FOOD, HEALTH_FOOD_KEYS),
+        *_keys(TEXT_NORM, FOLLOWUP, FOLLOWUP_INCLUDE_KEYS),
+        *_keys(TEXT_NORM, SYMPTOM, SYMPTOM_KEYWORDS),
+        *_keys(TEXT_NORM, MEDICAL, MEDICAL_KEYWORDS),
+        *_keys(TEXT_NORM, NON_MEDICAL, NON_MEDICAL_KEYWORDS),
+        *_keys(TEXT_NORM, GREETING, GREETING_KEYWORDS),
+        *[(TEXT_NORM, HF_VITAMIN, k, v) for k, v in HF_KOREAN_VITAMIN_MAP.items()],
+        *_keys(TEXT_RAW, MED_HINT, MED_NAME_HINT),
+        *_mapping(TEXT_RAW, HF_MULTIVITAMIN, HF_MULTIVITAMIN_KEYWORDS),
+        *_mapping(TEXT_RAW, HF_MINERAL, HF_MINERAL_KEYWORDS),
+        *_mapping(TEXT_RAW, HF_COMPONENT, HF_COMPONENT_KEYWORDS),
+        *_mapping(TEXT_RAW, HF_BODY, HF_BODY_FUNCTION_KEYWORDS),
+        *_mapping(TEXT_RAW, HF_PURPOSE, HF_PURPOSE_KEYWORDS),
+        *_mapping(TEXT_KO, SYMPTOM_BASE, symptom_map),
+    ]
+
+
+def text_forms(text: str) -> Tuple[str, str, str]:
+    """오토마톤 세 상태가 보는 문자열 (기존 함수들이 만들던 문자열과 같음, 벤치마크/검증용)"""
+    raw = text.lower()
+    norm = raw.replace(" ", "")
+    ko = "".join(ch for ch in raw if _is_ko(ch))
+    return raw, norm, ko
+
+
+def _is_ko(ch: str) -> bool:
+    # re.sub(r"[^가-힣\s]", " ", q) 후 공백 제거한 결과에 남는 문자
+    return "가" <= ch <= "힣" or (ch != " " and ch.isspace())
+
+
+class KeywordHits:
+    """카테고리 → 매칭된 값 집합"""
+
+    __slots__ = ("_hits",)
+
+    def __init__(self, hits: Dict[str, FrozenSet[str]]):
+        self._hits = hits
+
+    def has(self, category: str) -> bool:
+        return category in self._hits
+
+    def get(self, category: str) -> FrozenSet[str]:
+        return self._hits.get(category, frozenset())
+
+    def as_dict(self) -> Dict[str, FrozenSet[str]]:
+        return dict(self._hits)
+
+    def __repr__(self):
+        return f"KeywordHits({ {k: sorted(v) for k, v in self._hits.items()} })"
+
+
+class KeywordMatcher:
+    """Aho–Corasick 오토마톤 (goto / fail / output), 한 번 만들고 읽기 전용으로 공유"""
+
+    def __init__(self, entries: Iterable[Entry]):
+        self.entries: List[Entry] = list(entries)
+        self._goto: List[Dict[str, int]] = [{}]
+        # 노드별 출력: 문자열 형태마다 (카테고리, 값) 튜플
+        outputs: List[Tuple[set, set, set]] = [(set(), set(), set())]
+
+        for form, category, pattern, value in self.entries:
+            pattern = pattern.lower()
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    outputs.append((set(), set(), set()))
+                node = nxt
+            outputs[node][form].add((category, value))
+
+        # BFS 로 fail 링크 계산 + fail 노드의 출력 합치기
+        self._fail: List[int] = [0] * len(self._goto)
+        q = deque(self._goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, nxt in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                for form in TEXT_FORMS:
+                    outputs[nxt][form].update(outputs[self._fail[nxt]][form])
+                q.append(nxt)
+
+        self._out: List[Tuple[tuple, tuple, tuple]] = [tuple(tuple(o) for o in out) for out in outputs]
+
+    @property
+    def size(self) -> int:
+        return len(self._goto)
+
+    def _step(self, state: int, ch: str) -> int:
+        goto, fail = self._goto, self._fail
+        while True:
+            nxt = goto[state].get(ch)
+            if nxt is not None:
+                return nxt
+            if not state:
+                return 0
+            state = fail[state]
+
+    def scan(self, text: str) -> KeywordHits:
+        """문자열을 한 번 순회하며 raw / norm / ko 세 상태를 같이 진행"""
+        step, out = self._step, self._out
+        found: Dict[str, set] = {}
+        raw = norm = ko = 0
+
+        for ch in text.lower():
+            raw = step(raw, ch)
+            for category, value in out[raw][TEXT_RAW]:
+                found.setdefault(category, set()).add(value)
+            if ch == " ":
+                continue
+
+            prev, norm = norm, step(norm, ch)
+            for category, value in out[norm][TEXT_NORM]:
+                found.setdefault(category, set()).add(value)
+            if not _is_ko(ch):
+                continue
+
+            # 같은 오토마톤이므로 상태가 같으면 다음 상태도 같음 (한글만 있는 구간은 다시 계산하지 않음)
+            ko = norm if ko == prev else step(ko, ch)
+            for category, value in out[ko][TEXT_KO]:
+                found.setdefault(category, set()).add(value)
+
+        return KeywordHits({k: frozenset(v) for k, v in found.items()})
+
+
+KEYWORD_MATCHER = KeywordMatcher(default_entries())
+
+
+@lru_cache(maxsize=1024)
+def analyze_keywords(question: str) -> KeywordHits:
+    """질문 1개 → 카테고리별 매칭 결과 (같은 질문은 캐시, 결과는 읽기 전용)"""
+    return KEYWORD_MATCHER.scan(question)
@@ -1,69 +1,157 @@
+# torch / transformers 는 실제로 모델을 다룰 때만 import (RAG 를 안 쓰는 프로세스는 torch 를 올리지 않음)
+import copy
+import functools
+import hashlib
+import threading
 import time
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from contextlib import contextmanager
+from typing import Optional
 
 MODEL_PATH = "/models/merged_qwen25-3b-med"
 #MODEL_PATH = r"C:\Users\s\Desktop\qwen_sft\merged_qwen25-3b-med"
 #MODEL_PATH = r"C:\Users\user\Desktop\qwen_sft\merged_qwen25-3b-med"
 
-_tokenizer = None
-_model = None
-
 # ⭐ 최적화된 설정
 MAX_INSTRUCTION_CHARS = 2000  # 3000 → 2000 (입력 짧게)
 MAX_PROMPT_TOKENS = 512       # 768 → 512 (입력 토큰 감소)
 MAX_NEW_TOKENS = 320          # 256 → 320 (적절한 중간값)
 
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
-def _load_model():
-    global _tokenizer, _model
+@functools.lru_cache(maxsize=None)
+def get_device() -> str:
+    import torch
 
-    # 이미 한 번 로드됐으면 다시 로드 안 함
-    if _model is not None and _tokenizer is not None:
-        return _tokenizer, _model
+    return "cuda" if torch.cuda.is_available() else "cpu"
 
-    print("Qwen 병합 모델 로드 중...")
-    t0 = time.time()
 
-    _tokenizer = AutoTokenizer.from_pretrained(
-        MODEL_PATH,
-        trust_remote_code=True,
-        local_files_only=True,   # ← 추가
-    )
+# Alpaca 프롬프트 고정 머리말 (prefix KV cache 대상)
+ALPACA_HEADER = (
+    "Below is an instruction that describes a task. "
+    "Write a response that appropriately completes the request.\n\n"
+    "### Instruction:\n"
+)
 
-    # pad_token 없으면 eos로 맞춰 두기 (generate 시 경고 방지)
-    if _tokenizer.pad_token is None:
-        _tokenizer.pad_token = _tokenizer.eos_token
-
-    if DEVICE == "cuda":
-        # GPU + float16
-        _model = AutoModelForCausalLM.from_pretrained(
-            MODEL_PATH,
-            dtype=torch.float16,
-            trust_remote_code=True,
-            local_files_only=True,  # ← 추가
-        ).to(DEVICE)
+# 고정 prefix 의 past_key_values 캐시 {prefix sha1: (prefix input_ids, cache)}
+PREFIX_CACHE_MAX = 8
+_prefix_cache = {}
+_prefix_lock = threading.Lock()
+
+# 로드 정밀도 (settings.RAG_LLM_PRECISION)
+PRECISION_AUTO = "auto"                    # GPU float16 / CPU float32 (기존 동작)
+PRECISION_FP32 = "fp32"
+PRECISION_BF16 = "bf16"                    # CPU가 bf16 연산을 지원할 때만, 아니면 fp32
+PRECISION_INT8 = "int8"                    # CPU: Linear 레이어 동적 int8 양자화 (로드 시 변환)
+PRECISION_INT8_ARTIFACT = "int8_artifact"  # CPU: quantize_llm 명령으로 미리 저장한 int8 모델
+PRECISIONS = [PRECISION_AUTO, PRECISION_FP32, PRECISION_BF16, PRECISION_INT8, PRECISION_INT8_ARTIFACT]
+
+QUANTIZED_MODEL_FILE = "model_int8.pt"
+
+
+def get_precision() -> str:
+    from django.conf import settings
+
+    return getattr(settings, "RAG_LLM_PRECISION", PRECISION_AUTO)
+
+
+def _cpu_supports_bf16() -> bool:
+    import torch
+
+    checks = ["_is_avx512_bf16_supported", "_is_amx_tile_supported"]
+    return any(getattr(torch.cpu, name, lambda: False)() for name in checks)
+
+
+def quantize_int8(model):
+    """Linear 레이어만 동적 int8 양자화 (가중치 int8, 활성값은 실행 시 양자화) → CPU 전용"""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_model_with_precision(precision: str, model_path: str = MODEL_PATH):
+    """지정 정밀도로 (tokenizer, model) 로드 (전역 캐시 없이, 품질 비교/양자화 명령에서도 사용)"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"지원하지 않는 RAG_LLM_PRECISION: {precision} (가능: {PRECISIONS})")
+
+    device = get_device()
+
+    if device == "cuda" and precision in (PRECISION_INT8, PRECISION_INT8_ARTIFACT):
+        print(f"[LLM] {precision} 은 CPU 전용 → GPU에서는 float16 으로 로드")
+        precision = PRECISION_AUTO
+
+    if precision == PRECISION_BF16 and device == "cpu" and not _cpu_supports_bf16():
+        print("[LLM] CPU가 bf16을 지원하지 않음 → float32 로 로드")
+        precision = PRECISION_FP32
+
+    if precision == PRECISION_INT8_ARTIFACT:
+        from django.conf import settings
+
+        artifact_dir = getattr(settings, "RAG_LLM_QUANTIZED_PATH", "")
+        tokenizer = AutoTokenizer.from_pretrained(artifact_dir, trust_remote_code=True, local_files_only=True)
+        # quantize_llm 이 저장한 모듈 전체 (신뢰하는 로컬 파일만)
+        model = torch.load(f"{artifact_dir}/{QUANTIZED_MODEL_FILE}", weights_only=False)
     else:
-        # CPU 환경이면 float32
-        _model = AutoModelForCausalLM.from_pretrained(
-            MODEL_PATH,
-            dtype=torch.float32,
+        tokenizer = AutoTokenizer.from_pretrained(
+            model_path,
+            trust_remote_code=True,
+            local_files_only=True,   # ← 추가
+        )
+
+        if precision == PRECISION_BF16:
+            dtype = torch.bfloat16
+        elif precision == PRECISION_AUTO and device == "cuda":
+            # GPU + float16
+            dtype = torch.float16
+        else:
+            # CPU 환경이면 float32 (int8 은 float32 로 읽은 뒤 변환)
+            dtype = torch.float32
+
+        model = AutoModelForCausalLM.from_pretrained(
+            model_path,
+            dtype=dtype,
             trust_remote_code=True,
             local_files_only=True,  # ← 추가
         )
+        if device == "cuda":
+            model = model.to(device)
 
-    _model.eval()
+        if precision == PRECISION_INT8:
+            model = quantize_int8(model)
+
+    # pad_token 없으면 eos로 맞춰 두기 (generate 시 경고 방지)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    model.eval()
+    return tokenizer, model
+
+
+def load_llm():
+    """rag.registry 로더: settings 정밀도로 Qwen 로드 → (tokenizer, model)"""
+    precision = get_precision()
+    print(f"Qwen 병합 모델 로드 중... (precision={precision})")
+    t0 = time.time()
+
+    tokenizer, model = load_model_with_precision(precision)
 
     # 실제로 어디에 올라갔는지 확인용 로그
     try:
-        any_param = next(_model.parameters())
+        any_param = next(model.parameters())
         print(f"Qwen device: {any_param.device}, dtype: {any_param.dtype}")
     except StopIteration:
         print("Qwen device: <no parameters?>")
 
     print(f"Qwen 로드 완료, elapsed={time.time() - t0:.2f}s")
-    return _tokenizer, _model
+    return tokenizer, model
+
+
+def _load_model():
+    """(tokenizer, model) — 프로세스 공용 캐시는 rag.registry 하나만 사용"""
+    from .registry import LLM, get_registry
+
+    return get_registry().get(LLM)
 
 
 def _build_alpaca_prompt(instruction: str) -> str:
@@ -71,19 +159,237 @@ def _build_alpaca_prompt(instruction: str) -> str:
     if len(instruction) > MAX_INSTRUCTION_CHARS:
         instruction = instruction[:MAX_INSTRUCTION_CHARS]
 
-    return f"""Below is an instruction that describes a task. Write a response that appropriately completes the request.
-
-### Instruction:
-{instruction}
+    return f"""{ALPACA_HEADER}{instruction}
 
 ### Response:
 """
 
-def generate_answer(instruction: str) -> str:
-    """LLM으로 답변 생성"""
-    tokenizer, model = _load_model()
 
-    alpaca_prompt = _build_alpaca_prompt(instruction)
+# ==================================================
+# 고정 prefix KV cache
+# ==================================================
+def _prefix_enabled() -> bool:
+    from django.conf import settings
+
+    return getattr(settings, "RAG_LLM_PREFIX_CACHE", True)
+
+
+def _get_prefix_kv(tokenizer, model, prefix_text: str):
+    """prefix_text 를 한 번만 prefill 해서 (input_ids, past_key_values) 보관 (프롬프트 템플릿별 키)"""
+    key = hashlib.sha1(prefix_text.encode("utf-8")).hexdigest()
+
+    with _prefix_lock:
+        hit = _prefix_cache.get(key)
+        if hit is not None:
+            return hit
+
+        import torch
+
+        t0 = time.time()
+        prefix_ids = tokenizer(prefix_text, return_tensors="pt")["input_ids"].to(model.device)
+        with torch.inference_mode():
+            out = model(input_ids=prefix_ids, use_cache=True)
+
+        if len(_prefix_cache) >= PREFIX_CACHE_MAX:
+            _prefix_cache.pop(next(iter(_prefix_cache)))
+        _prefix_cache[key] = (prefix_ids, out.past_key_values)
+
+        print(f"[LLM-PREFIX] prefix 캐시 생성: tokens={prefix_ids.shape[1]}, elapsed={time.time() - t0:.2f}s")
+        return _prefix_cache[key]
+
+
+# ==================================================
+# Speculative decoding (draft 모델)
+# ==================================================
+_NO_DRAFT = object()
+_draft_model = None
+_draft_lock = threading.Lock()
+
+_spec_lock = threading.Lock()
+_spec_stats = {"generations": 0, "new_tokens": 0, "target_calls": 0, "draft_calls": 0, "elapsed": 0.0}
+
+
+class _ForwardCounter:
+    """모델 forward 호출 수를 스레드별로 셈 (동시에 여러 generate 가 돌아도 섞이지 않게)"""
+
+    def __init__(self):
+        self._counts = {}
+
+    def hook(self, module, args, output):
+        tid = threading.get_ident()
+        if tid in self._counts:
+            self._counts[tid] += 1
+
+    @contextmanager
+    def counting(self):
+        tid = threading.get_ident()
+        self._counts[tid] = 0
+        try:
+            yield lambda: self._counts[tid]
+        finally:
+            self._counts.pop(tid, None)
+
+
+def _forward_counter(model) -> _ForwardCounter:
+    counter = getattr(model, "_rag_forward_counter", None)
+    if counter is None:
+        counter = _ForwardCounter()
+        model.register_forward_hook(counter.hook)
+        model._rag_forward_counter = counter
+    return counter
+
+
+def get_draft_model(tokenizer, model):
+    """
+    RAG_DRAFT_MODEL_PATH 의 작은 draft 모델 (본 모델 tokenizer 와 같은 vocab 필수)
+    경로가 없거나, 로드 실패, tokenizer 불일치면 None → 일반 greedy decoding
+    """
+    global _draft_model
+    from django.conf import settings
+
+    if _draft_model is not None:
+        return None if _draft_model is _NO_DRAFT else _draft_model
+
+    with _draft_lock:
+        if _draft_model is not None:
+            return None if _draft_model is _NO_DRAFT else _draft_model
+
+        path = getattr(settings, "RAG_DRAFT_MODEL_PATH", "")
+        if not path:
+            _draft_model = _NO_DRAFT
+            return None
+
+        try:
+            import torch
+            from transformers import AutoTokenizer, AutoModelForCausalLM
+
+            draft_tokenizer = AutoTokenizer.from_pretrained(path, trust_remote_code=True, local_files_only=True)
+            if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+                print(f"[LLM-SPEC] draft tokenizer 불일치 → speculative decoding 사용 안 함: {path}")
+                _draft_model = _NO_DRAFT
+                return None
+
+            dtype = next(model.parameters()).dtype
+            draft = AutoModelForCausalLM.from_pretrained(
+                path,
+                dtype=dtype if dtype in (torch.float16, torch.bfloat16) else torch.float32,
+                trust_remote_code=True,
+                local_files_only=True,
+            )
+            if get_device() == "cuda":
+                draft = draft.to("cuda")
+            draft.eval()
+            draft.generation_config.num_assistant_tokens = getattr(settings, "RAG_DRAFT_NUM_TOKENS", 5)
+            _draft_model = draft
+            print(f"[LLM-SPEC] draft 모델 로드 완료: {path}")
+        except Exception as e:
+            print(f"[LLM-SPEC] draft 모델 로드 실패 → speculative decoding 사용 안 함: {e}")
+            _draft_model = _NO_DRAFT
+
+    return None if _draft_model is _NO_DRAFT else _draft_model
+
+
+def speculative_stats() -> dict:
+    """draft 토큰 채택률 / tokens/sec (프로세스 단위)"""
+    with _spec_lock:
+        s = dict(_spec_stats)
+    accepted = s["new_tokens"] - s["target_calls"]
+    s["acceptance_rate"] = round(accepted / s["draft_calls"], 3) if s["draft_calls"] else 0.0
+    s["tokens_per_sec"] = round(s["new_tokens"] / s["elapsed"], 2) if s["elapsed"] else 0.0
+    return s
+
+
+def deadline_stopping_criteria(deadline: Optional[float], cancel: Optional[threading.Event] = None):
+    """
+    deadline(time.time() 기준)이 지나거나 cancel 이 set 되면 generate 중단
+    (호출자가 timeout 으로 포기했거나 스트리밍 클라이언트가 끊긴 뒤 GPU 를 계속 쓰지 않도록)
+    """
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _DeadlineCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            stop = (deadline is not None and time.time() >= deadline) or (cancel is not None and cancel.is_set())
+            return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([_DeadlineCriteria()])
+
+
+_stream_slots: Optional[threading.BoundedSemaphore] = None
+_stream_slots_lock = threading.Lock()
+
+
+def _get_stream_slots() -> threading.BoundedSemaphore:
+    """동시 스트리밍 generate 수 제한 (배치 추론 스레드와 같은 모델을 쓰므로)"""
+    global _stream_slots
+    if _stream_slots is None:
+        from django.conf import settings
+
+        with _stream_slots_lock:
+            if _stream_slots is None:
+                _stream_slots = threading.BoundedSemaphore(max(1, getattr(settings, "RAG_STREAM_MAX_CONCURRENCY", 2)))
+    return _stream_slots
+
+
+def generate_ids(tokenizer, model, inputs: dict, extra: dict, max_new_tokens: int = MAX_NEW_TOKENS, **kwargs):
+    """greedy generate (extra 에 assistant_model 이 있으면 채택률/속도 측정)"""
+    import torch
+
+    gen_kwargs = dict(
+        max_new_tokens=max_new_tokens,
+        do_sample=False,
+        num_beams=1,
+        use_cache=True,
+        eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+        **kwargs,
+        **extra,
+    )
+
+    draft = extra.get("assistant_model")
+    if draft is None:
+        with torch.inference_mode():
+            return model.generate(**inputs, **gen_kwargs)
+
+    t0 = time.time()
+    with _forward_counter(model).counting() as target_calls, _forward_counter(draft).counting() as draft_calls:
+        with torch.inference_mode():
+            outputs = model.generate(**inputs, **gen_kwargs)
+        # target 1회 호출마다 (채택된 draft 토큰 + 1) 개가 생성됨
+        new_tokens = outputs.shape[1] - inputs["input_ids"].shape[1]
+        t_calls, d_calls = target_calls(), draft_calls()
+    elapsed = time.time() - t0
+
+    with _spec_lock:
+        _spec_stats["generations"] += 1
+        _spec_stats["new_tokens"] += new_tokens
+        _spec_stats["target_calls"] += t_calls
+        _spec_stats["draft_calls"] += d_calls
+        _spec_stats["elapsed"] += elapsed
+
+    acceptance = (new_tokens - t_calls) / d_calls if d_calls else 0.0
+    print(
+        f"[LLM-SPEC] new_tokens={new_tokens}, target_calls={t_calls}, draft_calls={d_calls}, "
+        f"acceptance={acceptance:.1%}, {new_tokens / elapsed if elapsed else 0:.1f} tokens/sec"
+    )
+    return outputs
+
+
+def prepare_inputs(
+    tokenizer,
+    model,
+    alpaca_prompt: str,
+    static_prefix: Optional[str] = None,
+    use_draft: bool = True,
+):
+    """
+    단일 프롬프트 입력 + generate 추가 kwargs
+    - draft 모델이 있으면 assistant_model (speculative decoding, prefix KV cache 와 같이 쓰지 않음)
+    - 없으면 (가능할 때) 고정 prefix 의 past_key_values
+    static_prefix: instruction 앞부분의 템플릿 고정 문구 (ALPACA_HEADER 뒤에 붙음)
+    return: (inputs, generate 추가 kwargs, 재사용한 prefix 토큰 수)
+    """
+    import torch
 
     inputs = tokenizer(
         alpaca_prompt,
@@ -91,45 +397,138 @@ def generate_answer(instruction: str) -> str:
         truncation=True,
         max_length=MAX_PROMPT_TOKENS,
     )
-
     inputs = {k: v.to(model.device) for k, v in inputs.items()}
-    input_len = inputs["input_ids"].shape[1]
 
-    t0 = time.time()
-    with torch.inference_mode():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=MAX_NEW_TOKENS,
-            do_sample=False,
-            num_beams=1,
-            use_cache=True,
-            eos_token_id=tokenizer.eos_token_id,
-            pad_token_id=tokenizer.pad_token_id,
-            # ⭐ 문장 끝에서 자연스럽게 종료
-            early_stopping=True,
-        )
-    gen_elapsed = time.time() - t0
+    draft = get_draft_model(tokenizer, model) if use_draft else None
+    if draft is not None:
+        return inputs, {"assistant_model": draft}, 0
+
+    if not _prefix_enabled():
+        return inputs, {}, 0
+
+    prefix_text = ALPACA_HEADER + (static_prefix or "")
+    if not alpaca_prompt.startswith(prefix_text):
+        return inputs, {}, 0
+
+    prefix_ids, prefix_kv = _get_prefix_kv(tokenizer, model, prefix_text)
+    n = prefix_ids.shape[1]
+    input_ids = inputs["input_ids"]
+
+    # 경계에서 토큰이 다르게 합쳐지면 재사용하지 않음 (출력이 달라지지 않도록)
+    if input_ids.shape[1] <= n or not torch.equal(input_ids[0, :n], prefix_ids[0]):
+        return inputs, {}, 0
+
+    # generate 가 cache 를 이어서 채우므로 요청마다 복사본 사용
+    return inputs, {"past_key_values": copy.deepcopy(prefix_kv)}, n
+
+
+def generate_answer(instruction: str, static_prefix: Optional[str] = None) -> str:
+    """
+    LLM으로 답변 생성 (rag.inference 배치 추론 서비스에 요청하고 결과만 받음)
+    static_prefix: instruction 이 항상 이 문구로 시작하면 해당 부분 KV cache 재사용
+    """
+    from django.conf import settings
+
+    from .inference import get_generator
+    from .streaming import current_cancel_event, current_token_sink
+
+    alpaca_prompt = _build_alpaca_prompt(instruction)
+    timeout = getattr(settings, "RAG_LLM_TIMEOUT", None)
+
+    # mode=stream 요청: 배치 없이 단독 generate 하면서 토큰을 바로 흘려보냄
+    # (동시 스트림이 RAG_STREAM_MAX_CONCURRENCY 개를 넘으면 아래 배치 경로로 생성 후 한 번에 전달)
+    sink = current_token_sink()
+    if sink is not None:
+        slots = _get_stream_slots()
+        if slots.acquire(blocking=False):
+            deadline = time.time() + timeout if timeout else None
+            text = _stream_generate(alpaca_prompt, sink, static_prefix, deadline, current_cancel_event(), slots)
+            return _truncate_to_sentence(text.strip()) if text else ""
+        print("[LLM-STREAM] 동시 스트림 한도 초과 → 배치 generate")
 
-    output_ids = outputs[0]
-    generated_ids = output_ids[input_len:]
+    result = get_generator().generate(alpaca_prompt, static_prefix, timeout=timeout)
 
     print(
-        f"[LLM] input_tokens={input_len}, "
-        f"output_tokens={len(generated_ids)}, "
-        f"elapsed={gen_elapsed:.2f}s"
+        f"[LLM] input_tokens={result.input_tokens}, "
+        f"output_tokens={result.output_tokens}, "
+        f"prefix_reused={result.prefix_tokens}, "
+        f"batch_size={result.batch_size}, "
+        f"queue_wait={result.queue_wait:.2f}s, "
+        f"elapsed={result.elapsed:.2f}s"
     )
 
-    if len(generated_ids) == 0:
+    if not result.text:
         return ""
 
-    answer = tokenizer.decode(generated_ids, skip_special_tokens=True)
+    if sink is not None:
+        sink(result.text)
 
     # ⭐ 문장 단위로 깔끔하게 끊기
-    answer = _truncate_to_sentence(answer.strip())
+    answer = _truncate_to_sentence(result.text.strip())
 
     return answer
 
 
+def _stream_generate(
+    alpaca_prompt: str,
+    on_token,
+    static_prefix: Optional[str] = None,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+    slot: Optional[threading.BoundedSemaphore] = None,
+) -> str:
+    """
+    TextIteratorStreamer 로 생성하면서 토큰 조각마다 on_token 호출 (streamer는 batch 1만 지원)
+    deadline 이 지나거나 cancel(클라이언트 연결 끊김)이 set 되면 생성 중단, slot 은 generate 가 끝나면 반환
+    """
+    from threading import Thread
+    from transformers import TextIteratorStreamer
+
+    try:
+        tokenizer, model = _load_model()
+        inputs, extra, prefix_tokens = prepare_inputs(tokenizer, model, alpaca_prompt, static_prefix)
+    except Exception:
+        if slot is not None:
+            slot.release()
+        raise
+    input_len = inputs["input_ids"].shape[1]
+
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    stopping = deadline_stopping_criteria(deadline, cancel)
+
+    def run():
+        try:
+            generate_ids(tokenizer, model, inputs, extra, streamer=streamer, stopping_criteria=stopping)
+        except Exception as e:
+            print(f"[LLM-STREAM] generate 실패: {e}")
+            streamer.end()  # 대기 중인 소비자 깨우기
+        finally:
+            if slot is not None:
+                slot.release()
+
+    t0 = time.time()
+    first_token_at = None
+    pieces = []
+
+    Thread(target=run, name="llm-stream", daemon=True).start()
+    for piece in streamer:
+        if not piece:
+            continue
+        if first_token_at is None:
+            first_token_at = time.time() - t0
+        pieces.append(piece)
+        on_token(piece)
+
+    ttft = f"{first_token_at:.2f}s" if first_token_at is not None else "-"
+    print(
+        f"[LLM-STREAM] input_tokens={input_len}, "
+        f"prefix_reused={prefix_tokens}, "
+        f"first_token={ttft}, "
+        f"elapsed={time.time() - t0:.2f}s"
+    )
+    return "".join(pieces)
+
+
 def _truncate_to_sentence(text: str) -> str:
     """
     답변이 중간에 끊겼다면 마지막 완전한 문장까지만 사용
@@ -172,7 +571,3 @@ def _truncate_to_sentence(text: str) -> str:
     # 최후: 원본 그대로
     return text
 
-
-def preload_qwen():
-    """서버 시작 시 미리 모델 로드"""
-    _load_model()
@@ -1,19 +1,19 @@
 # rag/load_chunks.py
-import json
-import uuid
 from pathlib import Path
+from typing import Iterator, List, Optional
 
-from rag.models import Chunk
-from rag.embeddings import get_embedding  # EMB_DIM=384 벡터 리턴
+from rag.models import Chunk, HF_SECTION_KINDS
+from rag.corpus import bump_corpus_version
+from rag.ingest import ChunkRecord, iter_json_array, make_chunk_id, reindex_chunks
 
 # manage.py 기준 경로
 JSON_PATH = Path("data/drb_easy_drug.json")
 MAX_CHARS = 800  # 한 chunk 최대 길이
 
 
-def _add_chunks(item_name: str, section_name: str, full_text: str, start_index: int, bulk: list) -> int:
+def _add_chunks(item_name: str, section_name: str, full_text: str, start_index: int, out: List[ChunkRecord]) -> int:
     """
-    긴 텍스트를 MAX_CHARS 단위로 잘라서 여러 Chunk 생성.
+    긴 텍스트를 MAX_CHARS 단위로 잘라서 여러 ChunkRecord 생성 (임베딩은 파이프라인에서 배치 처리).
     start_index: 이 약에서 시작할 chunk_index
     return: 다음에 쓸 chunk_index
     """
@@ -26,20 +26,16 @@ def _add_chunks(item_name: str, section_name: str, full_text: str, start_index:
     for start in range(0, len(text), MAX_CHARS):
         chunk_text = text[start : start + MAX_CHARS]
 
-        # 384차원 임베딩 생성
-        emb = get_embedding(chunk_text)
+        # ★ 내용 기반 chunk_id ("drug_" + sha1 40자) → 재적재 시 바뀐 chunk만 다시 임베딩
+        chunk_id = make_chunk_id("drug", item_name, section_name, idx, chunk_text)
 
-        # ★ chunk_id는 짧게(uuid만 사용) → max_length=128 안에 항상 들어감
-        chunk_id = uuid.uuid4().hex  # 32자
-
-        bulk.append(
-            Chunk(
+        out.append(
+            ChunkRecord(
                 chunk_id=chunk_id,
                 item_name=item_name,
                 section=section_name,
                 chunk_index=idx,
                 text=chunk_text,
-                embedding=emb,
             )
         )
         idx += 1
@@ -47,20 +43,9 @@ def _add_chunks(item_name: str, section_name: str, full_text: str, start_index:
     return idx
 
 
-def load_chunks():
-    if not JSON_PATH.exists():
-        print("ERROR: JSON 파일 없음:", JSON_PATH)
-        return
-
-    data = json.loads(JSON_PATH.read_text(encoding="utf-8"))
-    print("총 JSON 개수:", len(data))
-
-    # 기존 Chunk 모두 삭제
-    Chunk.objects.all().delete()
-
-    bulk: list[Chunk] = []
-
-    for item in data:
+def iter_drug_records(json_path: Path = JSON_PATH) -> Iterator[ChunkRecord]:
+    """e약은요 JSON → 약 단위로 ChunkRecord 생성 (스트리밍)"""
+    for item in iter_json_array(json_path):
         name = (item.get("ITEM_NAME") or "").strip()
         if not name:
             continue
@@ -73,21 +58,51 @@ def load_chunks():
         intrc = item.get("INTRC_QESITM")      # 상호작용
         se = item.get("SE_QESITM")            # 부작용
 
+        records: List[ChunkRecord] = []
         idx = 0
 
         if eff:
-            idx = _add_chunks(name, "효능효과", eff, idx, bulk)
+            idx = _add_chunks(name, "효능효과", eff, idx, records)
         if dose:
-            idx = _add_chunks(name, "용법용량", dose, idx, bulk)
+            idx = _add_chunks(name, "용법용량", dose, idx, records)
         if se:
-            idx = _add_chunks(name, "부작용", se, idx, bulk)
+            idx = _add_chunks(name, "부작용", se, idx, records)
         if warn1:
-            idx = _add_chunks(name, "사용상 주의사항", warn1, idx, bulk)
+            idx = _add_chunks(name, "사용상 주의사항", warn1, idx, records)
         if warn2:
-            idx = _add_chunks(name, "사용상 주의사항", warn2, idx, bulk)
+            idx = _add_chunks(name, "사용상 주의사항", warn2, idx, records)
         if intrc:
-            idx = _add_chunks(name, "상호작용", intrc, idx, bulk)
+            idx = _add_chunks(name, "상호작용", intrc, idx, records)
+
+        yield from records
+
+
+def load_chunks(
+    json_path: Path = JSON_PATH,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    full: bool = False,
+):
+    """
+    의약품 Chunk 차분 재색인
+    - 바뀌거나 새로 생긴 chunk만 임베딩 후 upsert, 사라진 chunk는 삭제
+    - 건강기능식품(hf_*) chunk는 건드리지 않음
+    - full=True: 전체 재임베딩 (임베딩 모델 변경 시)
+    """
+    json_path = Path(json_path)
+    if not json_path.exists():
+        print("ERROR: JSON 파일 없음:", json_path)
+        return
 
-    # 한 번에 insert
-    Chunk.objects.bulk_create(bulk)
-    print("저장 완료:", len(bulk))
\ No newline at end of file
+    stats = reindex_chunks(
+        iter_drug_records(json_path),
+        scope=Chunk.objects.exclude(section_kind__in=HF_SECTION_KINDS),
+        label="drug",
+        full=full,
+        batch_size=batch_size,
+        workers=workers,
+    )
+    print("저장 완료:", stats.embedded)
+
+    if stats.changed:
+        bump_corpus_version()
@@ -1,145 +1,159 @@
 # rag/load_healthfood.py
 
 from pathlib import Path
-import json
-from django.db import transaction
+from typing import Iterator, List, Optional
 
-from rag.models import HealthFood, Chunk
-from rag.embeddings import get_embedding
+from rag.models import HealthFood, Chunk, HF_SECTION_KINDS
+from rag.corpus import bump_corpus_version
+from rag.ingest import ChunkRecord, iter_json_array, make_chunk_id, reindex_chunks
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_PATH = BASE_DIR / "data" / "health_food_data.json"
 
-
-def load_healthfood(json_path: str | Path = DEFAULT_PATH):
+# HealthFood upsert를 몇 개 제품씩 묶어서 할지
+PRODUCT_BATCH = 500
+
+
+def _upsert_products(rows: List[dict]) -> List[HealthFood]:
+    """HealthFood 일괄 upsert (manufacturer, product_name 기준) → pk가 채워진 객체 반환 (Django 5.0+)"""
+    objs = [
+        HealthFood(
+            manufacturer=r["ent"],
+            product_name=r["name"],
+            serve_use=r["srv_use"] or None,
+            intake_hint=r["hint"] or None,
+            main_function=r["fn"] or None,
+        )
+        for r in rows
+    ]
+    return HealthFood.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["manufacturer", "product_name"],
+        update_fields=["serve_use", "intake_hint", "main_function"],
+    )
+
+
+def _hf_record(item_name: str, section: str, text: str) -> ChunkRecord:
+    # 제품당 섹션별 chunk 1개 (chunk_index=0), chunk_id는 내용 기반
+    return ChunkRecord(make_chunk_id("hf", item_name, section, 0, text), item_name, section, 0, text)
+
+
+def _product_records(hf: HealthFood) -> Iterator[ChunkRecord]:
+    """제품 1개 → hf_usage / hf_caution / hf_function ChunkRecord"""
+    item_name = (
+        f"{hf.manufacturer} - {hf.product_name}"
+        if hf.manufacturer
+        else hf.product_name
+    )
+
+    # usage chunk
+    if hf.serve_use:
+        text = (
+            f"제품명: {hf.product_name}\n"
+            f"제조사: {hf.manufacturer}\n"
+            f"섭취 방법: {hf.serve_use}"
+        ).strip()
+        yield _hf_record(item_name, "hf_usage", text)
+
+    # caution chunk
+    if hf.intake_hint:
+        text = (
+            f"제품명: {hf.product_name}\n"
+            f"주의사항: {hf.intake_hint}"
+        ).strip()
+        yield _hf_record(item_name, "hf_caution", text)
+
+    # function chunk
+    if hf.main_function:
+        text = (
+            f"제품명: {hf.product_name}\n"
+            f"기능성: {hf.main_function}"
+        ).strip()
+        yield _hf_record(item_name, "hf_function", text)
+
+
+def iter_healthfood_records(json_path: Path, counter: dict) -> Iterator[ChunkRecord]:
+    """
+    건강기능식품 JSON 스트리밍 → HealthFood upsert(배치) → ChunkRecord
+    counter: {"items": 읽은 JSON 수, "products": 중복 제거 후 처리한 제품 수}
+    """
+    # 같은 (제조사, 제품명) 중복 방지용
+    processed_keys: set[tuple[str, str]] = set()
+    rows: List[dict] = []
+
+    def flush():
+        for hf in _upsert_products(rows):
+            yield from _product_records(hf)
+        counter["products"] += len(rows)
+        print(f"  ... {counter['products']}개 제품 처리")
+        rows.clear()
+
+    for item in iter_json_array(json_path):
+        counter["items"] += 1
+
+        ent = (item.get("ENTRPS") or "").strip()
+        name = (item.get("PRDUCT") or "").strip()
+
+        if not name:
+            continue
+
+        key = (ent, name)
+        if key in processed_keys:
+            # 같은 제조사/제품명은 한 번만 처리
+            continue
+        processed_keys.add(key)
+
+        rows.append({
+            "ent": ent,
+            "name": name,
+            "srv_use": (item.get("SRV_USE") or "").strip(),
+            "hint": (item.get("INTAKE_HINT1") or "").strip(),
+            "fn": (item.get("MAIN_FNCTN") or "").strip(),
+        })
+
+        if len(rows) >= PRODUCT_BATCH:
+            yield from flush()
+
+    if rows:
+        yield from flush()
+
+
+def load_healthfood(
+    json_path: str | Path = DEFAULT_PATH,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    full: bool = False,
+):
     """
     건강기능식품 JSON 파일을 읽어서
-    - HealthFood 테이블 채우고
-    - Chunk(hf_usage / hf_caution / hf_function) 생성
+    - HealthFood 테이블 upsert
+    - Chunk(hf_usage / hf_caution / hf_function) 차분 재색인
+      (바뀐 chunk만 임베딩, 사라진 hf_* chunk 삭제, 기존 chunk는 끝까지 검색 가능)
     """
     json_path = Path(json_path)
 
     if not json_path.exists():
         raise FileNotFoundError(f"JSON 파일 없음: {json_path}")
 
-    with open(json_path, encoding="utf-8") as f:
-        items = json.load(f)
-
-    print(f"[LOAD] 총 {len(items)}개 제품 로드 시작")
+    print(f"[LOAD] 건강기능식품 로드 시작: {json_path}")
 
-    chunk_objs: list[Chunk] = []
-    processed = 0
+    counter = {"items": 0, "products": 0}
 
-    # 같은 (제조사, 제품명) 중복 방지용
-    processed_keys: set[tuple[str, str]] = set()
+    stats = reindex_chunks(
+        iter_healthfood_records(json_path, counter),
+        scope=Chunk.objects.filter(section_kind__in=HF_SECTION_KINDS),
+        label="healthfood",
+        full=full,
+        batch_size=batch_size,
+        workers=workers,
+    )
 
-    with transaction.atomic():
-        # 1) 기존 건강기능식품용 Chunk(hf_*) 전부 삭제
-        deleted = Chunk.objects.filter(section__startswith="hf_").delete()
-        print(f"[LOAD] 기존 hf_* Chunk 삭제: {deleted}")
-
-        # 2) HealthFood upsert + Chunk 객체 메모리에 모으기
-        for idx, item in enumerate(items):
-            ent = (item.get("ENTRPS") or "").strip()
-            name = (item.get("PRDUCT") or "").strip()
-            srv_use = (item.get("SRV_USE") or "").strip()
-            hint = (item.get("INTAKE_HINT1") or "").strip()
-            fn = (item.get("MAIN_FNCTN") or "").strip()
-
-            if not name:
-                continue
-
-            key = (ent, name)
-            if key in processed_keys:
-                # 같은 제조사/제품명은 한 번만 처리
-                continue
-            processed_keys.add(key)
-
-            hf, _created = HealthFood.objects.update_or_create(
-                manufacturer=ent,
-                product_name=name,
-                defaults={
-                    "serve_use": srv_use or None,
-                    "intake_hint": hint or None,
-                    "main_function": fn or None,
-                },
-            )
-
-            item_name = (
-                f"{hf.manufacturer} - {hf.product_name}"
-                if hf.manufacturer
-                else hf.product_name
-            )
-
-            # usage chunk
-            if srv_use:
-                text = (
-                    f"제품명: {hf.product_name}\n"
-                    f"제조사: {hf.manufacturer}\n"
-                    f"섭취 방법: {srv_use}"
-                ).strip()
-                emb = get_embedding(text)
-                chunk_objs.append(
-                    Chunk(
-                        chunk_id=f"hf_{hf.id}_usage",
-                        item_name=item_name,
-                        section="hf_usage",
-                        chunk_index=0,
-                        text=text,
-                        embedding=emb,
-                    )
-                )
-
-            # caution chunk
-            if hint:
-                text = (
-                    f"제품명: {hf.product_name}\n"
-                    f"주의사항: {hint}"
-                ).strip()
-                emb = get_embedding(text)
-                chunk_objs.append(
-                    Chunk(
-                        chunk_id=f"hf_{hf.id}_caution",
-                        item_name=item_name,
-                        section="hf_caution",
-                        chunk_index=0,
-                        text=text,
-                        embedding=emb,
-                    )
-                )
-
-            # function chunk
-            if fn:
-                text = (
-                    f"제품명: {hf.product_name}\n"
-                    f"기능성: {fn}"
-                ).strip()
-                emb = get_embedding(text)
-                chunk_objs.append(
-                    Chunk(
-                        chunk_id=f"hf_{hf.id}_function",
-                        item_name=item_name,
-                        section="hf_function",
-                        chunk_index=0,
-                        text=text,
-                        embedding=emb,
-                    )
-                )
-
-            processed += 1
-            if processed % 100 == 0:
-                print(
-                    f"  ... {processed}개 제품 처리 "
-                    f"(현재까지 chunk {len(chunk_objs)}개 준비)"
-                )
-
-        # 3) 모아둔 Chunk 한 번에 INSERT
-        if chunk_objs:
-            Chunk.objects.bulk_create(chunk_objs, batch_size=1000)
-        print(f"[LOAD] bulk_create로 Chunk {len(chunk_objs)}개 INSERT")
+    if stats.changed:
+        bump_corpus_version()
 
     print(
-        f"[DONE] JSON {len(items)}개 중 "
-        f"중복 제거 후 {processed}개 제품 처리 완료"
-    )
\ No newline at end of file
+        f"[DONE] JSON {counter['items']}개 중 "
+        f"중복 제거 후 {counter['products']}개 제품 처리 완료"
+    )
@@ -0,0 +1,14 @@
+# rag/management/commands/build_vector_store.py
+from django.core.management.base import BaseCommand
+
+from rag.corpus import get_corpus_version
+from rag.vector_store import build_vector_store
+
+
+class Command(BaseCommand):
+    help = "NumPy 검색 백엔드용 임베딩 행렬 파일을 현재 Chunk 버전으로 미리 생성합니다."
+
+    def handle(self, *args, **options):
+        version = get_corpus_version()
+        path = build_vector_store(version)
+        self.stdout.write(self.style.SUCCESS(f"vector store 준비 완료: {path} (version={version})"))
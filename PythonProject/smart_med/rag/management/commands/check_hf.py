@@ -1,6 +1,6 @@
 # rag/management/commands/check_hf_fatigue.py
 from django.core.management.base import BaseCommand
-from rag.models import Chunk
+from rag.models import Chunk, SectionKind
 
 
 FATIGUE_KEYWORDS = [
@@ -25,7 +25,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         qs = (
             Chunk.objects
-            .filter(section__startswith="hf_function")
+            .filter(section_kind=SectionKind.HF_FUNCTION)
             .order_by("item_name", "chunk_index")
         )
 
@@ -0,0 +1,41 @@
+# rag/management/commands/load_rag_data.py
+from django.core.management.base import BaseCommand
+
+from rag.load_chunks import JSON_PATH, load_chunks
+from rag.load_healthfood import DEFAULT_PATH, load_healthfood
+
+
+class Command(BaseCommand):
+    help = "의약품(e약은요) / 건강기능식품 JSON 기준으로 Chunk 테이블을 차분 재색인합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            choices=["drug", "healthfood", "all"],
+            default="all",
+            help="적재할 데이터 (기본 all)",
+        )
+        parser.add_argument("--drug-path", default=str(JSON_PATH))
+        parser.add_argument("--healthfood-path", default=str(DEFAULT_PATH))
+        parser.add_argument("--batch-size", type=int, default=None, help="임베딩 배치 크기 (기본 RAG_EMBED_BATCH_SIZE)")
+        parser.add_argument("--workers", type=int, default=None, help="임베딩 프로세스 수 (0/1 = 단일 프로세스)")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="변경 여부와 상관없이 전체 재임베딩 (임베딩 모델 변경 시)",
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        kwargs = {
+            "batch_size": options["batch_size"],
+            "workers": options["workers"],
+            "full": options["full"],
+        }
+
+        if source in ("drug", "all"):
+            load_chunks(options["drug_path"], **kwargs)
+        if source in ("healthfood", "all"):
+            load_healthfood(options["healthfood_path"], **kwargs)
+
+        self.stdout.write(self.style.SUCCESS("적재 완료"))
@@ -0,0 +1,52 @@
+# rag/management/commands/quantize_llm.py
+import os
+import time
+from pathlib import Path
+
+import torch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rag.llm import MODEL_PATH, PRECISION_FP32, QUANTIZED_MODEL_FILE, load_model_with_precision, quantize_int8
+
+
+def _size_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / (1 << 20)
+
+
+class Command(BaseCommand):
+    help = (
+        "Qwen 모델을 CPU용 int8(Linear 동적 양자화)로 변환해 저장합니다. "
+        "RAG_LLM_PRECISION=int8_artifact, RAG_LLM_QUANTIZED_PATH=<out> 으로 사용합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model-path", default=MODEL_PATH, help="원본(fp32) 모델 경로")
+        parser.add_argument(
+            "--out",
+            default=getattr(settings, "RAG_LLM_QUANTIZED_PATH", ""),
+            help="저장 디렉터리 (기본 RAG_LLM_QUANTIZED_PATH)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["out"]:
+            raise CommandError("--out 또는 RAG_LLM_QUANTIZED_PATH 가 필요합니다.")
+
+        out = Path(options["out"])
+        out.mkdir(parents=True, exist_ok=True)
+
+        t0 = time.time()
+        tokenizer, model = load_model_with_precision(PRECISION_FP32, options["model_path"])
+        model = quantize_int8(model.cpu())
+
+        tmp = out / f"{QUANTIZED_MODEL_FILE}.tmp"
+        torch.save(model, tmp)
+        os.replace(tmp, out / QUANTIZED_MODEL_FILE)
+        tokenizer.save_pretrained(out)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"int8 모델 저장 완료: {out} ({_size_mb(out):.0f}MB, "
+                f"원본 {_size_mb(Path(options['model_path'])):.0f}MB), elapsed={time.time() - t0:.1f}s"
+            )
+        )
@@ -0,0 +1,182 @@
+# rag/management/commands/rag_batch.py
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rag.analysis import analyze_query
+from rag.answer_cache import get_cached_answer
+from rag.embeddings import get_query_embeddings
+from rag.inference import inference_stats
+from rag.services import answer_question, retrieve_top_chunks_many
+from rag.utils import get_greeting_response, get_non_medical_response
+
+
+def _read_records(stream):
+    """JSONL({"question": ..., 그 외 필드는 결과에 그대로}) 또는 질문 한 줄씩"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            record = json.loads(line)
+            if not record.get("question"):
+                raise CommandError(f"question 필드가 없습니다: {line[:80]}")
+            yield record
+        else:
+            yield {"question": line}
+
+
+def _blocks(iterable, size):
+    it = iter(iterable)
+    while True:
+        block = list(islice(it, size))
+        if not block:
+            return
+        yield block
+
+
+class Command(BaseCommand):
+    help = (
+        "질문 여러 개(JSONL 또는 한 줄에 질문 하나)를 한 번에 처리해 결과를 JSONL 로 출력합니다. "
+        "블록 단위로 임베딩 1회 배치 인코딩 → 검색 SQL 1회(약품명 없는 질문) → LLM 배치 추론 순서로 처리하고, "
+        "답변은 답변 캐시에 저장되므로 야간 평가와 캐시 예열에 같이 씁니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--input", default="-", help="입력 파일 (기본 - = stdin)")
+        parser.add_argument("--output", default="-", help="출력 JSONL 파일 (기본 - = stdout)")
+        parser.add_argument("--k", type=int, default=5, help="top-k (기본 5)")
+        parser.add_argument("--batch-size", type=int, default=32, help="한 번에 임베딩/검색할 질문 수 (기본 32)")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="동시에 답변을 생성할 스레드 수 (기본 RAG_LLM_MAX_BATCH_SIZE → LLM 배치 추론으로 묶임)",
+        )
+        parser.add_argument("--fresh", action="store_true", help="답변 캐시를 조회하지 않고 다시 생성 (결과는 캐시에 덮어씀)")
+
+    def handle(self, *args, **options):
+        k = options["k"]
+        workers = options["workers"] or getattr(settings, "RAG_LLM_MAX_BATCH_SIZE", 8)
+        check_cache = not options["fresh"]
+
+        src = sys.stdin if options["input"] == "-" else open(options["input"], encoding="utf-8")
+        out = self.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8")
+
+        counts = {"done": 0, "cached": 0, "rejected": 0, "failed": 0}
+        timings = {"embed": 0.0, "retrieve": 0.0, "generate": 0.0}
+        index = 0
+        t_start = time.perf_counter()
+
+        def emit(row: dict):
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-batch") as pool:
+                for block in _blocks(_read_records(src), options["batch_size"]):
+                    pending = []
+
+                    for record in block:
+                        question = record["question"]
+                        analysis = analyze_query(question)
+                        row = {"index": index, **record}
+                        index += 1
+
+                        if analysis.is_greeting:
+                            counts["done"] += 1
+                            emit({**row, "status": "done", "cached": False, "answer": get_greeting_response(), "contexts": []})
+                        elif not analysis.is_medical:
+                            counts["rejected"] += 1
+                            emit({**row, "status": "rejected", "cached": False, "answer": get_non_medical_response(), "contexts": []})
+                        else:
+                            pending.append((row, analysis))
+
+                    if not pending:
+                        continue
+
+                    # 1) 임베딩: 캐시에 없는 질문만 모아 한 번에 인코딩
+                    t0 = time.perf_counter()
+                    embs = get_query_embeddings([a.question for _, a in pending])
+                    for (_, analysis), emb in zip(pending, embs):
+                        analysis.embedding = emb
+                    timings["embed"] += time.perf_counter() - t0
+
+                    # 2) 답변 캐시
+                    if check_cache:
+                        remaining = []
+                        for row, analysis in pending:
+                            cached = get_cached_answer(analysis.question, analysis=analysis)
+                            if cached is None:
+                                remaining.append((row, analysis))
+                                continue
+                            counts["cached"] += 1
+                            emit({
+                                **row,
+                                "status": "done",
+                                "cached": True,
+                                "answer": cached.get("answer", ""),
+                                "contexts": cached.get("contexts", []),
+                            })
+                        pending = remaining
+                        if not pending:
+                            continue
+
+                    # 3) 검색: 약품명 없는 질문은 SQL 1회
+                    t0 = time.perf_counter()
+                    chunk_lists = retrieve_top_chunks_many(
+                        [a.question for _, a in pending], [a for _, a in pending], k=k
+                    )
+                    timings["retrieve"] += time.perf_counter() - t0
+
+                    # 4) 답변 생성: 스레드들이 동시에 generate_answer → rag.inference 가 배치로 묶음
+                    t0 = time.perf_counter()
+                    futures = {
+                        pool.submit(
+                            answer_question,
+                            analysis.question,
+                            k=k,
+                            check_cache=False,
+                            analysis=analysis,
+                            chunks=chunks,
+                        ): row
+                        for (row, analysis), chunks in zip(pending, chunk_lists)
+                    }
+                    for future in as_completed(futures):
+                        row = futures[future]
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            counts["failed"] += 1
+                            emit({**row, "status": "failed", "error": str(e)})
+                            continue
+                        counts["done"] += 1
+                        emit({
+                            **row,
+                            "status": "done",
+                            "cached": False,
+                            "answer": result["answer"],
+                            "contexts": result["contexts"],
+                        })
+                    timings["generate"] += time.perf_counter() - t0
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            if out is not self.stdout:
+                out.close()
+
+        elapsed = time.perf_counter() - t_start
+        self.stderr.write(
+            f"[RAG-BATCH] questions={index} done={counts['done']} cached={counts['cached']} "
+            f"rejected={counts['rejected']} failed={counts['failed']} "
+            f"elapsed={elapsed:.1f}s ({index / elapsed if elapsed else 0.0:.2f} q/s)"
+        )
+        self.stderr.write(
+            f"[RAG-BATCH] embed={timings['embed']:.1f}s retrieve={timings['retrieve']:.1f}s "
+            f"generate={timings['generate']:.1f}s llm={inference_stats()}"
+        )
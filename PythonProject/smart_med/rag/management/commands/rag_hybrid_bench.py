@@ -0,0 +1,107 @@
+# rag/management/commands/rag_hybrid_bench.py
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from rag.embeddings import get_embedding
+from rag.models import Chunk, SectionKind
+from rag.product_index import get_product_index
+from rag.search import hybrid_search_chunks, search_chunks
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def _name_term(item_name: str) -> str:
+    # "타이레놀정500밀리그람(아세트아미노펜)" → "타이레놀정500밀리그람"
+    return re.split(r"[(\[\s]", item_name.strip(), maxsplit=1)[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "제품명이 들어간 질의로 기존 검색(약품명 ILIKE 필터 → 없으면 재검색)과 "
+        "하이브리드 검색(trigram + 벡터 RRF, SQL 1회), 제품명 사전 변환 후 완전일치 필터 검색(resolved)의 "
+        "지연 시간과 제품명 정확도를 비교합니다. "
+        "top1 = 1위 결과가 질의한 제품인 비율, precision@k = 결과 중 제품명이 들어간 비율"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, default=5, help="top-k (기본 5)")
+        parser.add_argument("--samples", type=int, default=30, help="샘플 제품 수 (기본 30)")
+        parser.add_argument("--section", default=SectionKind.SIDE_EFFECT, choices=SectionKind.values)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def _legacy(self, q_emb, k, section_kinds, term):
+        chunks = search_chunks(q_emb, k, section_kinds=section_kinds, name_terms=[term])
+        if not chunks:
+            chunks = search_chunks(q_emb, k, section_kinds=section_kinds)
+        return chunks
+
+    def _hybrid(self, q_emb, k, section_kinds, term):
+        return hybrid_search_chunks(q_emb, k, section_kinds=section_kinds, name_terms=[term])
+
+    def _resolved(self, q_emb, k, section_kinds, term):
+        products = get_product_index().resolve_names(term)
+        chunks = []
+        if products:
+            chunks = search_chunks(q_emb, k, section_kinds=section_kinds, item_names=products)
+        if not chunks:
+            chunks = self._hybrid(q_emb, k, section_kinds, term)
+        return chunks
+
+    def handle(self, *args, **options):
+        k = options["k"]
+        section_kinds = [options["section"]]
+        label = SectionKind(options["section"]).label
+
+        names = list(
+            Chunk.objects.filter(section_kind=options["section"])
+            .values_list("item_name", flat=True)
+            .distinct()
+        )
+        if not names:
+            self.stdout.write(self.style.WARNING("Chunk 데이터가 없습니다."))
+            return
+        random.Random(options["seed"]).shuffle(names)
+
+        cases = []
+        for name in names[: options["samples"]]:
+            term = _name_term(name)
+            if len(term) >= 2:
+                cases.append((name, term, get_embedding(f"{term} {label} 알려줘")))
+
+        if not cases:
+            self.stdout.write(self.style.WARNING("비교할 제품명이 없습니다."))
+            return
+
+        index = get_product_index()
+        t0 = time.perf_counter()
+        for _, term, _ in cases:
+            index.resolve_names(f"{term} {label} 알려줘")
+        resolve_us = (time.perf_counter() - t0) / len(cases) * 1e6
+
+        self.stdout.write(f"제품 수: {len(cases)} / 섹션: {label} / k={k}")
+        self.stdout.write(f"제품명 사전: {index.size}개 키, 변환 {resolve_us:.1f}us/질문")
+        for title, fn in (("legacy", self._legacy), ("hybrid", self._hybrid), ("resolved", self._resolved)):
+            times, hits, total, top1 = [], 0, 0, 0
+            for name, term, q_emb in cases:
+                t0 = time.perf_counter()
+                chunks = fn(q_emb, k, section_kinds, term)
+                times.append((time.perf_counter() - t0) * 1000)
+
+                hits += sum(1 for c in chunks if term in (c.item_name or ""))
+                total += len(chunks)
+                top1 += bool(chunks) and chunks[0].item_name == name
+
+            precision = hits / total if total else 0.0
+            self.stdout.write(
+                f"[{title}] top1={top1 / len(cases):.3f} precision@{k}={precision:.3f} "
+                f"p50={_percentile(times, 50):.1f}ms p99={_percentile(times, 99):.1f}ms"
+            )
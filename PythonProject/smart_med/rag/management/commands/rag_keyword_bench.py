@@ -0,0 +1,85 @@
+# rag/management/commands/rag_keyword_bench.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from rag.health_food import extract_specific_keywords
+from rag.intent_detector import detect_intent
+from rag.keyword_matcher import KEYWORD_MATCHER, KeywordHits, analyze_keywords, text_forms
+from rag.symptom import extract_symptoms
+from rag.utils import is_medical_question
+
+DEFAULT_QUESTIONS = [
+    "타이레놀 복용 시 주의사항 알려줘",
+    "두통이 심한데 무슨 약 먹어야 해?",
+    "비타민D는 언제 먹는 게 좋아?",
+    "눈 건강에 좋은 영양제 추천해줘, 루테인도 포함돼?",
+    "감기약 먹고 술 마셔도 돼?",
+    "속이 쓰리고 소화가 안 되는데 약 있어?",
+    "오늘 날씨 어때?",
+    "안녕하세요",
+]
+
+
+def legacy_scan(question: str) -> KeywordHits:
+    """기존 방식: 키워드마다 `k in q` 로 질문 문자열을 다시 훑음"""
+    forms = text_forms(question)
+    found = {}
+    for form, category, pattern, value in KEYWORD_MATCHER.entries:
+        if pattern and pattern.lower() in forms[form]:
+            found.setdefault(category, set()).add(value)
+    return KeywordHits({k: frozenset(v) for k, v in found.items()})
+
+
+def classify(question: str):
+    return (
+        is_medical_question(question),
+        detect_intent(question),
+        extract_symptoms(question),
+        extract_specific_keywords(question),
+    )
+
+
+class Command(BaseCommand):
+    help = "키워드 매칭: 리스트별 any() 스캔 vs Aho–Corasick 오토마톤 1회 순회 속도를 비교하고 결과가 같은지 확인합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--question", action="append", default=[], help="질문 (여러 번 지정 가능)")
+        parser.add_argument("--repeat", type=int, default=2000, help="질문 세트 반복 횟수 (기본 2000)")
+
+    def _per_question_us(self, fn, questions, repeat) -> float:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for q in questions:
+                fn(q)
+        return (time.perf_counter() - t0) / (repeat * len(questions)) * 1e6
+
+    def handle(self, *args, **options):
+        questions = options["question"] or DEFAULT_QUESTIONS
+        repeat = options["repeat"]
+
+        mismatches = [q for q in questions if legacy_scan(q).as_dict() != KEYWORD_MATCHER.scan(q).as_dict()]
+
+        legacy_us = self._per_question_us(legacy_scan, questions, repeat)
+        automaton_us = self._per_question_us(KEYWORD_MATCHER.scan, questions, repeat)
+
+        def classify_cold(q):
+            analyze_keywords.cache_clear()
+            return classify(q)
+
+        cold_us = self._per_question_us(classify_cold, questions, repeat)
+        warm_us = self._per_question_us(classify, questions, repeat)
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"질문 수: {len(questions)} / 반복: {repeat} / "
+            f"패턴: {len(KEYWORD_MATCHER.entries)}개 / 오토마톤 노드: {KEYWORD_MATCHER.size}개"
+        )
+        self.stdout.write(f"[any() 스캔]   {legacy_us:.1f}us/질문")
+        self.stdout.write(f"[오토마톤]     {automaton_us:.1f}us/질문 ({legacy_us / automaton_us:.2f}x)")
+        self.stdout.write(f"[분류 함수 4개] 캐시 없음 {cold_us:.1f}us/질문, 캐시 hit {warm_us:.1f}us/질문")
+
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"매칭 결과 불일치: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("매칭 결과 일치"))
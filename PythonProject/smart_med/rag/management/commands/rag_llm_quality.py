@@ -0,0 +1,161 @@
+# rag/management/commands/rag_llm_quality.py
+import difflib
+import json
+import resource
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rag.llm import (
+    PRECISIONS,
+    MAX_NEW_TOKENS,
+    MAX_PROMPT_TOKENS,
+    _build_alpaca_prompt,
+    _truncate_to_sentence,
+    generate_ids,
+    get_draft_model,
+    load_model_with_precision,
+    speculative_stats,
+)
+from rag.services import build_general_prompt
+
+# 고정 질문 세트 (검색 없이 참고 문서 없는 일반 답변 프롬프트 → DB 상태와 무관하게 비교 가능)
+QUALITY_QUESTIONS = [
+    "타이레놀 복용 시 주의사항 알려줘",
+    "감기약 먹고 술 마셔도 돼?",
+    "두통이 자주 있을 때 먹을 수 있는 약은?",
+    "비타민D는 언제 먹는 게 좋아?",
+    "소화제와 진통제를 같이 먹어도 되나요?",
+    "임산부가 먹으면 안 되는 약이 있어?",
+    "이부프로펜 하루 최대 복용량은?",
+    "항생제를 먹다가 중간에 끊어도 되나요?",
+    "오메가3의 효능이 뭐야?",
+    "수면제를 오래 먹으면 부작용이 있나요?",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "고정 질문 세트로 지정 정밀도의 답변/속도/메모리를 측정합니다. "
+        "--save 로 fp32 기준 답변을 저장하고, --compare 로 다른 정밀도와 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--precision", choices=PRECISIONS, default="fp32")
+        parser.add_argument("--save", help="결과(JSON) 저장 경로 (기준 답변 만들 때)")
+        parser.add_argument("--compare", help="비교할 기준 결과(JSON) 경로")
+        parser.add_argument("--limit", type=int, default=0, help="질문 수 제한 (0 = 전체)")
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="RAG_DRAFT_MODEL_PATH draft 모델로 speculative decoding (기준과 완전 일치해야 정상)",
+        )
+
+    def _generate(self, tokenizer, model, question: str, extra: dict) -> dict:
+        instruction, _ = build_general_prompt(question, [])
+        inputs = tokenizer(
+            _build_alpaca_prompt(instruction),
+            return_tensors="pt",
+            truncation=True,
+            max_length=MAX_PROMPT_TOKENS,
+        )
+        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+        input_len = inputs["input_ids"].shape[1]
+
+        t0 = time.perf_counter()
+        outputs = generate_ids(tokenizer, model, inputs, extra, max_new_tokens=MAX_NEW_TOKENS)
+        elapsed = time.perf_counter() - t0
+
+        generated_ids = outputs[0][input_len:]
+        text = tokenizer.decode(generated_ids, skip_special_tokens=True)
+        return {
+            "question": question,
+            "answer": _truncate_to_sentence(text.strip()),
+            "tokens": len(generated_ids),
+            "elapsed": elapsed,
+        }
+
+    def handle(self, *args, **options):
+        questions = QUALITY_QUESTIONS[: options["limit"]] if options["limit"] else QUALITY_QUESTIONS
+
+        t0 = time.time()
+        tokenizer, model = load_model_with_precision(options["precision"])
+        load_elapsed = time.time() - t0
+        # Linux ru_maxrss 는 KB 단위
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        extra = {}
+        label = options["precision"]
+        if options["speculative"]:
+            draft = get_draft_model(tokenizer, model)
+            if draft is None:
+                raise CommandError("draft 모델이 없습니다. RAG_DRAFT_MODEL_PATH 를 확인하세요.")
+            extra = {"assistant_model": draft}
+            label += "+speculative"
+
+        results = []
+        for q in questions:
+            r = self._generate(tokenizer, model, q, extra)
+            results.append(r)
+            self.stdout.write(f"- {q} ({r['tokens']} tokens, {r['elapsed']:.1f}s)")
+
+        tokens = sum(r["tokens"] for r in results)
+        elapsed = sum(r["elapsed"] for r in results)
+        summary = {
+            "precision": label,
+            "load_seconds": round(load_elapsed, 1),
+            "peak_rss_mb": round(rss_mb),
+            "tokens_per_sec": round(tokens / elapsed, 2) if elapsed else 0.0,
+            "results": results,
+        }
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"[{summary['precision']}] load={summary['load_seconds']}s "
+            f"peak_rss={summary['peak_rss_mb']}MB tokens/sec={summary['tokens_per_sec']}"
+        )
+        if extra:
+            self.stdout.write(f"speculative: {speculative_stats()}")
+
+        if options["save"]:
+            Path(options["save"]).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"저장: {options['save']}"))
+
+        if options["compare"]:
+            self._compare(summary, options["compare"])
+
+    def _compare(self, summary: dict, baseline_path: str):
+        path = Path(baseline_path)
+        if not path.exists():
+            raise CommandError(f"기준 결과 파일 없음: {path}")
+
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+        base_answers = {r["question"]: r["answer"] for r in baseline["results"]}
+
+        exact = 0
+        ratios = []
+        for r in summary["results"]:
+            base = base_answers.get(r["question"])
+            if base is None:
+                continue
+            if r["answer"] == base:
+                exact += 1
+            ratios.append(difflib.SequenceMatcher(None, base, r["answer"]).ratio())
+
+        if not ratios:
+            raise CommandError("기준 결과와 겹치는 질문이 없습니다.")
+
+        speedup = summary["tokens_per_sec"] / baseline["tokens_per_sec"] if baseline["tokens_per_sec"] else 0.0
+
+        self.stdout.write("")
+        self.stdout.write(f"기준: {baseline['precision']} / 비교: {summary['precision']} / 질문 {len(ratios)}개")
+        self.stdout.write(f"완전 일치: {exact}/{len(ratios)}")
+        self.stdout.write(
+            f"문자 유사도: 평균 {statistics.mean(ratios):.3f}, 최소 {min(ratios):.3f}"
+        )
+        self.stdout.write(
+            f"peak_rss: {baseline['peak_rss_mb']}MB → {summary['peak_rss_mb']}MB, "
+            f"tokens/sec: {baseline['tokens_per_sec']} → {summary['tokens_per_sec']} ({speedup:.2f}x)"
+        )
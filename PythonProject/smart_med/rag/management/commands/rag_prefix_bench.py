@@ -0,0 +1,93 @@
+# rag/management/commands/rag_prefix_bench.py
+import statistics
+import time
+
+import torch
+from django.core.management.base import BaseCommand
+
+from rag.llm import _build_alpaca_prompt, _load_model, prepare_inputs, MAX_PROMPT_TOKENS
+from rag.services import build_general_prompt, retrieve_top_chunks
+
+DEFAULT_QUESTIONS = [
+    "타이레놀 복용 시 주의사항 알려줘",
+    "감기약 먹고 술 마셔도 돼?",
+    "두통이 자주 있을 때 먹을 수 있는 약은?",
+    "비타민D는 언제 먹는 게 좋아?",
+    "소화제와 진통제를 같이 먹어도 되나요?",
+]
+
+
+class Command(BaseCommand):
+    help = "고정 prefix KV cache 사용 전/후 prefill 시간(첫 토큰까지)을 비교하고 출력이 같은지 확인합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--question", action="append", default=[], help="질문 (여러 번 지정 가능)")
+        parser.add_argument("--repeat", type=int, default=3, help="질문당 반복 횟수 (기본 3)")
+        parser.add_argument("--check-tokens", type=int, default=32, help="출력 일치 확인용 생성 토큰 수 (기본 32)")
+        parser.add_argument("--no-context", action="store_true", help="검색 없이 참고 문서 없는 프롬프트만 사용")
+
+    def _generate(self, tokenizer, model, inputs, extra, max_new_tokens):
+        with torch.inference_mode():
+            return model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                num_beams=1,
+                use_cache=True,
+                eos_token_id=tokenizer.eos_token_id,
+                pad_token_id=tokenizer.pad_token_id,
+                **extra,
+            )
+
+    def handle(self, *args, **options):
+        questions = options["question"] or DEFAULT_QUESTIONS
+        tokenizer, model = _load_model()
+
+        prompts = []
+        for q in questions:
+            chunks = [] if options["no_context"] else retrieve_top_chunks(q, k=5)
+            instruction, static_prefix = build_general_prompt(q, chunks)
+            prompts.append((_build_alpaca_prompt(instruction), static_prefix))
+
+        # prefix cache 생성 비용은 프로세스당 1회 → 측정에서 제외
+        for prompt, static_prefix in prompts:
+            prepare_inputs(tokenizer, model, prompt, static_prefix, use_draft=False)
+
+        base_times, cached_times = [], []
+        reused, mismatches = [], 0
+
+        for prompt, static_prefix in prompts:
+            plain = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=MAX_PROMPT_TOKENS)
+            plain = {k: v.to(model.device) for k, v in plain.items()}
+
+            for _ in range(options["repeat"]):
+                t0 = time.perf_counter()
+                self._generate(tokenizer, model, plain, {}, 1)
+                base_times.append((time.perf_counter() - t0) * 1000)
+
+                t0 = time.perf_counter()
+                inputs, extra, n = prepare_inputs(tokenizer, model, prompt, static_prefix, use_draft=False)
+                self._generate(tokenizer, model, inputs, extra, 1)
+                cached_times.append((time.perf_counter() - t0) * 1000)
+                reused.append(n / plain["input_ids"].shape[1])
+
+            # greedy 출력이 같은지 확인
+            base_out = self._generate(tokenizer, model, plain, {}, options["check_tokens"])
+            inputs, extra, _ = prepare_inputs(tokenizer, model, prompt, static_prefix, use_draft=False)
+            cached_out = self._generate(tokenizer, model, inputs, extra, options["check_tokens"])
+            if not torch.equal(base_out, cached_out):
+                mismatches += 1
+
+        base_p50 = statistics.median(base_times)
+        cached_p50 = statistics.median(cached_times)
+
+        self.stdout.write("")
+        self.stdout.write(f"질문 수: {len(prompts)} / 반복: {options['repeat']} / device: {model.device}")
+        self.stdout.write(f"prefix 재사용 비율(평균): {statistics.mean(reused):.1%} of prompt tokens")
+        self.stdout.write(f"[no prefix cache] 첫 토큰 p50={base_p50:.1f}ms")
+        self.stdout.write(f"[prefix cache]    첫 토큰 p50={cached_p50:.1f}ms ({base_p50 / cached_p50:.2f}x)")
+
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"출력 불일치: {mismatches}/{len(prompts)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("출력 일치 (greedy)"))
@@ -0,0 +1,98 @@
+# rag/management/commands/rag_recall.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from rag.embeddings import get_embedding
+from rag.models import Chunk
+from rag.search import exact_search_chunks, pgvector_search
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+class Command(BaseCommand):
+    help = "HNSW 검색 결과를 전체 스캔(정확한 top-k)과 비교해 recall@k와 지연 시간을 출력합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--k", type=int, default=5, help="top-k (기본 5)")
+        parser.add_argument("--samples", type=int, default=50, help="샘플 질의 수 (기본 50)")
+        parser.add_argument(
+            "--ef-search",
+            type=int,
+            nargs="+",
+            default=[20, 40, 80, 160],
+            help="비교할 ef_search 값 목록",
+        )
+        parser.add_argument(
+            "--query",
+            action="append",
+            default=[],
+            help="직접 지정할 질의 문장 (지정하지 않으면 저장된 Chunk 임베딩을 질의로 사용)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def _sample_queries(self, samples: int, seed: int) -> list:
+        ids = list(Chunk.objects.values_list("id", flat=True))
+        if not ids:
+            return []
+        random.Random(seed).shuffle(ids)
+        picked = ids[:samples]
+        return [
+            list(emb)
+            for emb in Chunk.objects.filter(id__in=picked).values_list("embedding", flat=True)
+        ]
+
+    def handle(self, *args, **options):
+        k = options["k"]
+
+        if options["query"]:
+            queries = [get_embedding(q) for q in options["query"]]
+        else:
+            queries = self._sample_queries(options["samples"], options["seed"])
+
+        if not queries:
+            self.stdout.write(self.style.WARNING("Chunk 데이터가 없습니다."))
+            return
+
+        qs = Chunk.objects.all()
+
+        # 1) 기준값: 전체 스캔 top-k
+        exact_ids = []
+        exact_times = []
+        for q_emb in queries:
+            t0 = time.perf_counter()
+            exact_ids.append({c.id for c in exact_search_chunks(qs, q_emb, k)})
+            exact_times.append((time.perf_counter() - t0) * 1000)
+
+        self.stdout.write("")
+        self.stdout.write(f"총 Chunk 수: {qs.count()} / 질의 수: {len(queries)} / k={k}")
+        self.stdout.write(
+            f"[exact] p50={_percentile(exact_times, 50):.1f}ms "
+            f"p99={_percentile(exact_times, 99):.1f}ms"
+        )
+
+        # 2) ef_search 별 HNSW recall@k
+        for ef in options["ef_search"]:
+            hits = 0
+            total = 0
+            times = []
+            for q_emb, truth in zip(queries, exact_ids):
+                t0 = time.perf_counter()
+                found = {c.id for c in pgvector_search(qs, q_emb, k, ef_search=ef)}
+                times.append((time.perf_counter() - t0) * 1000)
+
+                hits += len(found & truth)
+                total += len(truth)
+
+            recall = hits / total if total else 0.0
+            self.stdout.write(
+                f"[hnsw ef_search={ef}] recall@{k}={recall:.3f} "
+                f"p50={_percentile(times, 50):.1f}ms p99={_percentile(times, 99):.1f}ms"
+            )
@@ -0,0 +1,22 @@
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rag", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chunk",
+            index=pgvector.django.indexes.HnswIndex(
+                ef_construction=64,
+                fields=["embedding"],
+                m=16,
+                name="chunk_embedding_hnsw_idx",
+                opclasses=["vector_cosine_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+import pgvector.django.indexes
+from django.db import migrations, models
+from django.db.models import Q
+
+
+SECTION_KINDS = [
+    "efficacy",
+    "dosage",
+    "side_effect",
+    "warning",
+    "interaction",
+    "hf_function",
+    "hf_usage",
+    "hf_caution",
+]
+
+# 우선순위 순서대로 적용 (rag.models.section_kind_of 와 동일한 규칙)
+BACKFILL_RULES = [
+    ("hf_function", Q(section__startswith="hf_function")),
+    ("hf_usage", Q(section__startswith="hf_usage")),
+    ("hf_caution", Q(section__startswith="hf_caution")),
+    ("side_effect", Q(section__contains="부작용") | Q(section__contains="이상반응")),
+    ("efficacy", Q(section__contains="효능")),
+    ("dosage", Q(section__contains="용법용량")),
+    ("interaction", Q(section__contains="상호작용")),
+    ("warning", Q(section__contains="주의") | Q(section__contains="경고")),
+]
+
+
+def backfill_section_kind(apps, schema_editor):
+    Chunk = apps.get_model("rag", "Chunk")
+    for kind, cond in BACKFILL_RULES:
+        Chunk.objects.filter(cond, section_kind="other").update(section_kind=kind)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rag", "0002_chunk_embedding_hnsw_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chunk",
+            name="section_kind",
+            field=models.CharField(
+                choices=[
+                    ("efficacy", "효능효과"),
+                    ("dosage", "용법용량"),
+                    ("side_effect", "부작용"),
+                    ("warning", "사용상 주의사항"),
+                    ("interaction", "상호작용"),
+                    ("hf_function", "건강기능식품 기능성"),
+                    ("hf_usage", "건강기능식품 섭취 방법"),
+                    ("hf_caution", "건강기능식품 주의사항"),
+                    ("other", "기타"),
+                ],
+                db_index=True,
+                default="other",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(backfill_section_kind, migrations.RunPython.noop),
+    ] + [
+        migrations.AddIndex(
+            model_name="chunk",
+            index=pgvector.django.indexes.HnswIndex(
+                condition=Q(section_kind=kind),
+                ef_construction=64,
+                fields=["embedding"],
+                m=16,
+                name=f"chunk_hnsw_{kind}",
+                opclasses=["vector_cosine_ops"],
+            ),
+        )
+        for kind in SECTION_KINDS
+    ]
@@ -0,0 +1,30 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rag", "0003_chunk_section_kind"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="chunk",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["item_name"],
+                name="chunk_item_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chunk",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["text"],
+                name="chunk_text_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -1,16 +1,97 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from pgvector.django import VectorField
+from pgvector.django import VectorField, HnswIndex
 
 EMB_DIM = 384
 
+# HNSW 인덱스 빌드 파라미터 (검색 시 ef_search는 settings.RAG_HNSW_EF_SEARCH)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+
+class SectionKind(models.TextChoices):
+    EFFICACY = "efficacy", "효능효과"
+    DOSAGE = "dosage", "용법용량"
+    SIDE_EFFECT = "side_effect", "부작용"
+    WARNING = "warning", "사용상 주의사항"
+    INTERACTION = "interaction", "상호작용"
+    HF_FUNCTION = "hf_function", "건강기능식품 기능성"
+    HF_USAGE = "hf_usage", "건강기능식품 섭취 방법"
+    HF_CAUTION = "hf_caution", "건강기능식품 주의사항"
+    OTHER = "other", "기타"
+
+
+# 건강기능식품 Chunk 종류
+HF_SECTION_KINDS = [SectionKind.HF_FUNCTION, SectionKind.HF_USAGE, SectionKind.HF_CAUTION]
+
+# 벡터 부분 인덱스를 만드는 섹션 종류 (OTHER 제외)
+INDEXED_SECTION_KINDS = [k for k in SectionKind if k != SectionKind.OTHER]
+
+
+def section_kind_of(section: str) -> str:
+    """load_chunks / load_healthfood가 쓰는 section 문자열 → SectionKind"""
+    sec = (section or "").strip()
+
+    if sec.startswith("hf_function"):
+        return SectionKind.HF_FUNCTION
+    if sec.startswith("hf_usage"):
+        return SectionKind.HF_USAGE
+    if sec.startswith("hf_caution"):
+        return SectionKind.HF_CAUTION
+    if "부작용" in sec or "이상반응" in sec:
+        return SectionKind.SIDE_EFFECT
+    if "효능" in sec:
+        return SectionKind.EFFICACY
+    if "용법용량" in sec:
+        return SectionKind.DOSAGE
+    if "상호작용" in sec:
+        return SectionKind.INTERACTION
+    if "주의" in sec or "경고" in sec:
+        return SectionKind.WARNING
+    return SectionKind.OTHER
+
+
 class Chunk(models.Model):
     chunk_id = models.CharField(max_length=128, unique=True)
     item_name = models.CharField(max_length=1024, db_index=True)
     section = models.CharField(max_length=64, db_index=True)
+    section_kind = models.CharField(
+        max_length=20,
+        choices=SectionKind.choices,
+        default=SectionKind.OTHER,
+        db_index=True,
+    )
     chunk_index = models.IntegerField()
     text = models.TextField()
     embedding = VectorField(dimensions=EMB_DIM)
 
+    class Meta:
+        indexes = [
+            # 코사인 거리 ANN 검색용 (CosineDistance → vector_cosine_ops)
+            HnswIndex(
+                name="chunk_embedding_hnsw_idx",
+                fields=["embedding"],
+                m=HNSW_M,
+                ef_construction=HNSW_EF_CONSTRUCTION,
+                opclasses=["vector_cosine_ops"],
+            ),
+        ] + [
+            # 섹션 종류별 부분 인덱스: WHERE section_kind = '...' 검색이 해당 인덱스를 사용
+            HnswIndex(
+                name=f"chunk_hnsw_{kind.value}",
+                fields=["embedding"],
+                m=HNSW_M,
+                ef_construction=HNSW_EF_CONSTRUCTION,
+                opclasses=["vector_cosine_ops"],
+                condition=models.Q(section_kind=kind.value),
+            )
+            for kind in INDEXED_SECTION_KINDS
+        ] + [
+            # 약품명/키워드 부분일치(ILIKE '%..%') 및 similarity() 용 trigram 인덱스 (rag.search.hybrid_search_chunks)
+            GinIndex(name="chunk_item_name_trgm", fields=["item_name"], opclasses=["gin_trgm_ops"]),
+            GinIndex(name="chunk_text_trgm", fields=["text"], opclasses=["gin_trgm_ops"]),
+        ]
+
     def __str__(self):
         return f"{self.item_name} ({self.section}#{self.chunk_index})"
 
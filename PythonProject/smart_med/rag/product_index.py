@@ -0,0 +1,142 @@
+# rag/product_index.py
+"""
+제품명 사전 (Chunk.item_name distinct 값 → 질문 속 약품명을 정식 제품명으로 변환)
+
+- 키: 공백 제거 + 소문자 제품명, 정렬 리스트 + bisect 로 접두어 조회
+    "타이레놀은" → 가장 긴 접두어 "타이레놀" 로 시작하는 제품들 (조사/접미어는 자연히 잘림)
+- 접두어로 못 찾은 약품명 힌트 토큰(정/캡슐/시럽 ...)은 같은 첫 글자 제품 줄기(stem)에서 difflib 근사 매칭
+    "타이래놀" → "타이레놀..."
+- 너무 많은 제품에 걸리는 일반 단어(예: "어린이")는 무시 (RAG_PRODUCT_MAX_MATCHES)
+- 결과 제품명으로 검색 시 item_name IN (...) 완전일치 필터 (btree 인덱스) 사용
+- Chunk 버전(rag.corpus)이 바뀌면 다시 만듦 (RAG_PRODUCT_INDEX_CHECK_SECONDS 간격으로 확인)
+"""
+import bisect
+import difflib
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .constants import MED_NAME_HINT
+from .corpus import get_corpus_version
+from .models import Chunk
+
+# 약품명 힌트(정/캡슐/시럽 ...)가 있는 토큰은 2글자 접두어까지, 없는 토큰은 3글자 이상만 인정
+MIN_PREFIX_LEN = 2
+MIN_PLAIN_PREFIX_LEN = 3
+FUZZY_CUTOFF = 0.8
+
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", "", s or "").lower()
+
+
+def _stem(key: str) -> str:
+    # "타이레놀정500밀리그람(아세트아미노펜)" → "타이레놀정"
+    return re.split(r"[\d(\[]", key, maxsplit=1)[0]
+
+
+class ProductIndex:
+    def __init__(self, version: str, names: Optional[List[str]] = None):
+        self.version = version
+        if names is None:
+            names = Chunk.objects.values_list("item_name", flat=True).distinct()
+
+        by_key: Dict[str, List[str]] = {}
+        for name in names:
+            key = _norm(name)
+            if key:
+                by_key.setdefault(key, []).append(name.strip())
+
+        self.keys: List[str] = sorted(by_key)
+        self.names: List[List[str]] = [by_key[k] for k in self.keys]
+
+        # 근사 매칭 후보: 첫 글자별 제품 줄기 → 그 줄기로 시작하는 키가 있으므로 접두어 조회로 다시 찾음
+        self.stems: Dict[str, List[str]] = {}
+        for stem in dict.fromkeys(_stem(k) for k in self.keys):
+            if len(stem) >= MIN_PREFIX_LEN:
+                self.stems.setdefault(stem[0], []).append(stem)
+
+    @property
+    def size(self) -> int:
+        return len(self.keys)
+
+    def _prefix_range(self, prefix: str, limit: int) -> Optional[range]:
+        """prefix 로 시작하는 키 위치 (없으면 None, limit 초과면 빈 range)"""
+        lo = bisect.bisect_left(self.keys, prefix)
+        if lo >= len(self.keys) or not self.keys[lo].startswith(prefix):
+            return None
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        return range(lo, hi) if hi - lo <= limit else range(0)
+
+    def _names(self, positions: range) -> List[str]:
+        # 짧은 제품명(기본 제품) 먼저
+        found = [name for i in positions for name in self.names[i]]
+        return sorted(dict.fromkeys(found), key=len)
+
+    def lookup(self, token: str, limit: int) -> List[str]:
+        """토큰 1개 → 제품명 목록 (가장 긴 일치 접두어 기준)"""
+        key = _norm(token)
+        hinted = any(h in token for h in MED_NAME_HINT)
+        min_len = MIN_PREFIX_LEN if hinted else MIN_PLAIN_PREFIX_LEN
+        for end in range(len(key), min_len - 1, -1):
+            positions = self._prefix_range(key[:end], limit)
+            if positions is not None:
+                return self._names(positions)
+
+        if hinted and len(key) >= MIN_PLAIN_PREFIX_LEN:
+            stems = [s for s in self.stems.get(key[0], []) if abs(len(s) - len(key)) <= 2]
+            for stem in difflib.get_close_matches(key, stems, n=1, cutoff=FUZZY_CUTOFF):
+                positions = self._prefix_range(stem, limit)
+                if positions:
+                    return self._names(positions)
+        return []
+
+    def resolve(self, question: str, limit: Optional[int] = None) -> Dict[str, List[str]]:
+        """질문 → {언급된 토큰: [정식 제품명, ...]} (질문 등장 순서)"""
+        limit = limit or getattr(settings, "RAG_PRODUCT_MAX_MATCHES", 30)
+        resolved: Dict[str, List[str]] = {}
+        for tok in re.split(r"[^\w가-힣]+", question):
+            if len(tok) < MIN_PREFIX_LEN or tok in resolved:
+                continue
+            names = self.lookup(tok, limit)
+            if names:
+                resolved[tok] = names
+        return resolved
+
+    def resolve_names(self, question: str, limit: Optional[int] = None) -> List[str]:
+        """질문 속 약품명 → 정식 제품명 목록 (중복 제거, 먼저 언급된 약 순서)"""
+        return list(dict.fromkeys(n for names in self.resolve(question, limit).values() for n in names))
+
+
+_index: Optional[ProductIndex] = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_product_index() -> ProductIndex:
+    global _index, _index_checked_at
+
+    interval = getattr(settings, "RAG_PRODUCT_INDEX_CHECK_SECONDS", 30)
+    if _index is not None and time.time() - _index_checked_at < interval:
+        return _index
+
+    with _index_lock:
+        if _index is not None and time.time() - _index_checked_at < interval:
+            return _index
+
+        version = get_corpus_version()
+        if _index is None or _index.version != version:
+            t0 = time.time()
+            _index = ProductIndex(version)
+            print(f"[PRODUCT-INDEX] build version={version}, products={_index.size}, elapsed={time.time() - t0:.2f}s")
+
+        _index_checked_at = time.time()
+
+    return _index
+
+
+def resolve_products(question: str) -> List[str]:
+    return get_product_index().resolve_names(question)
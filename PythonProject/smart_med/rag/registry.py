@@ -0,0 +1,202 @@
+# rag/registry.py
+"""
+RAG 모델 레지스트리 (LLM / 임베딩 모델의 프로세스 공용 캐시)
+
+- 모델별로 한 번만 로드 (스레드 안전), 상태: not_loaded / loading / ready / failed
+- 로더 함수 안에서만 torch / transformers 를 import → RAG 를 안 쓰는 프로세스는 torch 를 올리지 않음
+- preload_from_settings(): 서버 시작 시 RAG_PRELOAD_MODE 에 따라 미리 로드
+    off        : 첫 요청 때 로드 (기본값)
+    background : 백그라운드 스레드에서 로드, readiness() / /api/rag/ready/ 로 확인
+    sync       : 시작 시 바로 로드 → gunicorn --preload 와 함께 쓰면 fork 전에 로드되어
+                 워커들이 가중치 메모리를 copy-on-write 로 공유
+- RAG_PRELOAD_MODELS(기본 임베딩 모델)만 위 방식으로 로드하고,
+  RAG_DEFERRED_MODELS(기본 없음, rag 워커는 LLM)는 항상 백그라운드로 로드
+    sync 모드에서는 fork 된 워커 안에서 시작 (마스터 부팅을 LLM 로드가 막지 않도록),
+    fork 하지 않는 프로세스(runserver 등)는 첫 요청 때 로드
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+LLM = "llm"
+EMBEDDER = "embedder"
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+PRELOAD_OFF = "off"
+PRELOAD_BACKGROUND = "background"
+PRELOAD_SYNC = "sync"
+
+
+def _load_llm():
+    from .llm import load_llm
+
+    return load_llm()
+
+
+def _load_embedder():
+    from .embeddings import load_embedder
+
+    return load_embedder()
+
+
+LOADERS: Dict[str, Callable] = {
+    LLM: _load_llm,
+    EMBEDDER: _load_embedder,
+}
+
+
+class _Entry:
+    def __init__(self):
+        self.state = NOT_LOADED
+        self.value = None
+        self.error: Optional[str] = None
+        self.elapsed: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    def __init__(self, loaders: Dict[str, Callable]):
+        self._loaders = loaders
+        self._entries = {name: _Entry() for name in loaders}
+        self._after_fork: List[str] = []
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def get(self, name: str):
+        """로드된 모델 반환 (아직이면 로드 / 다른 스레드가 로드 중이면 끝날 때까지 대기)"""
+        entry = self._entries[name]
+        if entry.state != READY:
+            self._load(name)
+        if entry.state != READY:
+            raise RuntimeError(f"{name} 모델 로드 실패: {entry.error}")
+        return entry.value
+
+    def is_ready(self, name: str) -> bool:
+        return self._entries[name].state == READY
+
+    def _load(self, name: str):
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.state == READY:
+                return
+
+            entry.state = LOADING
+            entry.error = None
+            t0 = time.time()
+            print(f"[MODEL] {name} 로드 시작 (pid={os.getpid()})")
+
+            try:
+                entry.value = self._loaders[name]()
+                entry.state = READY
+            except Exception as e:
+                # 다음 get() 때 다시 시도
+                entry.state = FAILED
+                entry.error = str(e)
+                print(f"[MODEL] {name} 로드 실패: {e}")
+
+            entry.elapsed = time.time() - t0
+            if entry.state == READY:
+                print(f"[MODEL] {name} 로드 완료, elapsed={entry.elapsed:.2f}s")
+
+    def start_background_load(self, names: Iterable[str]) -> threading.Thread:
+        names = list(names)
+
+        def run():
+            for name in names:
+                self._load(name)
+
+        thread = threading.Thread(target=run, name="rag-model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def load(self, names: Iterable[str]):
+        for name in names:
+            self._load(name)
+
+    def load_after_fork(self, names: Iterable[str]):
+        """fork 된 자식 프로세스(gunicorn 워커 등)에서 백그라운드 로드 시작"""
+        self._after_fork = list(names)
+
+    def readiness(self, required: Iterable[str]) -> dict:
+        required = list(required)
+        models = {
+            name: {
+                "state": entry.state,
+                "elapsed": round(entry.elapsed, 2) if entry.elapsed is not None else None,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+        return {
+            "ready": all(self._entries[name].state == READY for name in required),
+            "required": required,
+            "models": models,
+        }
+
+    def _reset_after_fork(self):
+        # fork 시점에 로드 중이던 스레드는 자식에 없음 → 잠금/상태 초기화 (로드 끝난 모델은 그대로 공유)
+        for entry in self._entries.values():
+            entry.lock = threading.Lock()
+            if entry.state != READY:
+                entry.state = NOT_LOADED
+                entry.value = None
+
+        pending = [name for name in self._after_fork if self._entries[name].state != READY]
+        if pending:
+            self.start_background_load(pending)
+
+
+_registry = ModelRegistry(LOADERS)
+
+
+def get_registry() -> ModelRegistry:
+    return _registry
+
+
+def preload_models() -> List[str]:
+    """RAG_PRELOAD_MODE 방식으로 미리 로드할 모델 (RAG_PRELOAD_MODE=off 면 없음)"""
+    from django.conf import settings
+
+    if getattr(settings, "RAG_PRELOAD_MODE", PRELOAD_OFF) == PRELOAD_OFF:
+        return []
+    return [name for name in getattr(settings, "RAG_PRELOAD_MODELS", [EMBEDDER]) if name in LOADERS]
+
+
+def deferred_models() -> List[str]:
+    """항상 백그라운드로 로드할 모델 (RAG_PRELOAD_MODE=off 면 없음)"""
+    from django.conf import settings
+
+    if getattr(settings, "RAG_PRELOAD_MODE", PRELOAD_OFF) == PRELOAD_OFF:
+        return []
+    preload = preload_models()
+    return [
+        name for name in getattr(settings, "RAG_DEFERRED_MODELS", [])
+        if name in LOADERS and name not in preload
+    ]
+
+
+def required_models() -> List[str]:
+    """이 프로세스가 준비해야 하는 모델 (readiness probe 기준)"""
+    return preload_models() + deferred_models()
+
+
+def preload_from_settings():
+    from django.conf import settings
+
+    mode = getattr(settings, "RAG_PRELOAD_MODE", PRELOAD_OFF)
+    names = preload_models()
+    deferred = deferred_models()
+    if not names and not deferred:
+        return
+
+    print(f"[MODEL] preload mode={mode}, models={names}, deferred={deferred}")
+    if mode == PRELOAD_SYNC:
+        _registry.load(names)
+        # 지정된 모델(RAG_DEFERRED_MODELS)은 마스터에서 로드하지 않음 → fork 된 워커마다 백그라운드 로드
+        _registry.load_after_fork(deferred)
+    else:
+        _registry.start_background_load(names + deferred)
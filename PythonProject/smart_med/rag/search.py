@@ -0,0 +1,396 @@
+# rag/search.py
+import re
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from pgvector.django import CosineDistance
+
+from .models import Chunk
+
+BACKEND_PGVECTOR = "pgvector"
+BACKEND_NUMPY = "numpy"
+
+# pg_trgm 은 3글자 단위로 색인 → 이보다 짧은 검색어(눈, 간, 장, 아연 ...)는 trigram 인덱스를 못 씀
+TRGM_MIN_TERM_LENGTH = 3
+
+
+def get_ef_search(ef_search: Optional[int] = None, k: int = 0) -> int:
+    """요청별 ef_search 결정 (top-k보다 작으면 결과가 k개 미만이 될 수 있으므로 k 이상 보장)"""
+    ef = ef_search or getattr(settings, "RAG_HNSW_EF_SEARCH", 40)
+    return max(int(ef), k)
+
+
+def set_ef_search(ef_search: int) -> None:
+    """현재 트랜잭션에만 hnsw.ef_search 적용 (SET LOCAL → 커밋/롤백 시 원복)"""
+    iterative_scan = getattr(settings, "RAG_HNSW_ITERATIVE_SCAN", "")
+
+    with connection.cursor() as cur:
+        cur.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+        # section_kind 부분 인덱스 + item_name 같은 추가 필터가 붙으면
+        # ef_search 후보만으로는 k개를 못 채울 수 있음 → 반복 탐색 허용 (pgvector 0.8+, 설정한 경우만)
+        if iterative_scan in ("strict_order", "relaxed_order"):
+            cur.execute(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}")
+
+
+def pgvector_search(
+    qs: QuerySet,
+    q_emb: List[float],
+    k: int,
+    ef_search: Optional[int] = None,
+) -> List[Chunk]:
+    """
+    코사인 거리 top-k 검색 (HNSW 인덱스 사용)
+    - 결과 Chunk에는 distance 속성이 붙음
+    - ef_search는 이 쿼리에만 적용됨
+    """
+    ef = get_ef_search(ef_search, k)
+    qs = qs.annotate(distance=CosineDistance("embedding", q_emb)).order_by("distance")[:k]
+
+    with transaction.atomic():
+        set_ef_search(ef)
+        return list(qs)
+
+
+def exact_search_chunks(qs: QuerySet, q_emb: List[float], k: int) -> List[Chunk]:
+    """인덱스를 끄고 전체 스캔으로 정확한 top-k 계산 (recall 측정 기준값)"""
+    qs = qs.annotate(distance=CosineDistance("embedding", q_emb)).order_by("distance")[:k]
+
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            cur.execute("SET LOCAL enable_indexscan = off")
+        return list(qs)
+
+
+def is_short_term(term: str) -> bool:
+    return len(term) < TRGM_MIN_TERM_LENGTH
+
+
+def word_start_regex(term: str) -> str:
+    """
+    짧은 검색어용 정규식: 단어 첫머리에 오는 경우만 일치 ('간' → '간 건강', '간기능' O / '시간' X)
+    부분일치(ILIKE '%간%')는 인덱스도 못 쓰고 엉뚱한 단어까지 걸리므로 대신 사용
+    """
+    return f"(^|[^가-힣A-Za-z0-9]){re.escape(term)}"
+
+
+def _term_q(field: str, term: str) -> Q:
+    lookup = "iregex" if is_short_term(term) else "icontains"
+    value = word_start_regex(term) if is_short_term(term) else term
+    return Q(**{f"{field}__{lookup}": value})
+
+
+def _filtered_queryset(
+    section_kinds: Optional[List[str]] = None,
+    name_terms: Optional[List[str]] = None,
+    keyword_terms: Optional[List[str]] = None,
+    item_names: Optional[List[str]] = None,
+) -> QuerySet:
+    qs = Chunk.objects.all()
+
+    if item_names:
+        qs = qs.filter(item_name__in=item_names)
+
+    if section_kinds:
+        if len(section_kinds) == 1:
+            qs = qs.filter(section_kind=section_kinds[0])
+        else:
+            qs = qs.filter(section_kind__in=section_kinds)
+
+    if name_terms:
+        name_q = Q()
+        for m in name_terms:
+            name_q |= _term_q("item_name", m)
+        qs = qs.filter(name_q)
+
+    if keyword_terms:
+        keyword_q = Q()
+        for kw in keyword_terms:
+            keyword_q |= _term_q("text", kw) | _term_q("item_name", kw)
+        qs = qs.filter(keyword_q)
+
+    return qs
+
+
+def get_backend() -> str:
+    return getattr(settings, "RAG_RETRIEVAL_BACKEND", BACKEND_PGVECTOR)
+
+
+def search_chunks(
+    q_emb: List[float],
+    k: int,
+    section_kinds: Optional[List[str]] = None,
+    name_terms: Optional[List[str]] = None,
+    keyword_terms: Optional[List[str]] = None,
+    ef_search: Optional[int] = None,
+    item_names: Optional[List[str]] = None,
+) -> List[Chunk]:
+    """
+    검색 백엔드 공통 진입점 (settings.RAG_RETRIEVAL_BACKEND)
+    - section_kinds: section_kind 완전일치
+    - name_terms:    item_name 부분일치 (OR)
+    - keyword_terms: text 또는 item_name 부분일치 (OR)
+      (pgvector 백엔드에서 3글자 미만 검색어는 단어 첫머리 일치, word_start_regex)
+    - item_names:    item_name 완전일치 (rag.product_index 로 찾은 정식 제품명)
+    """
+    if get_backend() == BACKEND_NUMPY:
+        from .vector_store import get_vector_store
+
+        return get_vector_store().search(
+            q_emb,
+            k,
+            section_kinds=section_kinds,
+            name_terms=name_terms,
+            keyword_terms=keyword_terms,
+            item_names=item_names,
+        )
+
+    qs = _filtered_queryset(section_kinds, name_terms, keyword_terms, item_names)
+    return pgvector_search(qs, q_emb, k, ef_search=ef_search)
+
+
+# ==================================================
+# 배치 질의 검색 (질의 여러 개 → SQL 1회 / 행렬곱 1회)
+# ==================================================
+def _multi_query_sql(section_kinds_list: List[Optional[List[str]]], params: Dict[str, object]) -> str:
+    """
+    질의마다 (섹션 필터 + HNSW top-k) 서브쿼리를 UNION ALL 로 묶음
+    - 섹션 조건이 서브쿼리마다 상수로 들어가므로 섹션별 HNSW 부분 인덱스를 그대로 사용
+    - q_ord: 결과가 속한 질의 위치
+    """
+    table = Chunk._meta.db_table
+    parts = []
+    for i, kinds in enumerate(section_kinds_list):
+        if kinds:
+            names = []
+            for j, kind in enumerate(kinds):
+                params[f"sk{i}_{j}"] = str(kind)
+                names.append(f"%(sk{i}_{j})s")
+            where = f"section_kind IN ({', '.join(names)})" if len(names) > 1 else f"section_kind = {names[0]}"
+        else:
+            where = "TRUE"
+
+        parts.append(
+            f"""(
+    SELECT c.*, {i} AS q_ord, c.embedding <=> %(q{i})s::vector AS distance
+    FROM {table} c
+    WHERE {where}
+    ORDER BY c.embedding <=> %(q{i})s::vector
+    LIMIT %(k)s
+)"""
+        )
+    return "\nUNION ALL\n".join(parts)
+
+
+def search_chunks_many(
+    q_embs: List[List[float]],
+    k: int,
+    section_kinds_list: Optional[List[Optional[List[str]]]] = None,
+    ef_search: Optional[int] = None,
+) -> List[List[Chunk]]:
+    """
+    여러 질의의 top-k 를 한 번에 (배치 질의 / 캐시 예열용)
+    - section_kinds_list[i]: i번째 질의의 section_kind 필터 (None 이면 전체)
+    - 결과는 질의 순서대로, 각 리스트는 search_chunks(q_embs[i], k, section_kinds_list[i]) 와 같음
+    """
+    if not q_embs:
+        return []
+    section_kinds_list = section_kinds_list or [None] * len(q_embs)
+
+    if get_backend() == BACKEND_NUMPY:
+        from .vector_store import get_vector_store
+
+        return get_vector_store().search_many(q_embs, k, section_kinds_list)
+
+    params: Dict[str, object] = {"k": k}
+    for i, q_emb in enumerate(q_embs):
+        params[f"q{i}"] = _vector_literal(q_emb)
+    sql = _multi_query_sql(section_kinds_list, params)
+
+    results: List[List[Chunk]] = [[] for _ in q_embs]
+    with transaction.atomic():
+        set_ef_search(get_ef_search(ef_search, k))
+        for c in Chunk.objects.raw(sql, params):
+            results[c.q_ord].append(c)
+
+    for chunks in results:
+        chunks.sort(key=lambda c: c.distance)
+    return results
+
+
+# ==================================================
+# 하이브리드 검색 (어휘 trigram + 벡터, Reciprocal Rank Fusion)
+# ==================================================
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _term_match(column: str, term: str, param: str, params: Dict[str, object]) -> str:
+    """column 이 검색어를 포함하는지 (3글자 이상 ILIKE → trigram 인덱스 / 미만은 단어 첫머리 정규식)"""
+    if is_short_term(term):
+        params[param] = word_start_regex(term)
+        return f"{column} ~* %({param})s"
+    params[param] = _like_pattern(term)
+    return f"{column} ILIKE %({param})s"
+
+
+def _vector_literal(q_emb: List[float]) -> str:
+    return "[" + ",".join(str(float(x)) for x in q_emb) + "]"
+
+
+def _hybrid_sql(
+    section_kinds: Optional[List[str]],
+    name_terms: List[str],
+    keyword_terms: List[str],
+    params: Dict[str, object],
+) -> str:
+    """
+    vec : 섹션 필터 + HNSW top-N (코사인 거리 순위)
+    lex : 섹션 필터 + item_name/text ILIKE (pg_trgm GIN 인덱스) top-N
+          점수 = 약품명 trigram similarity + 키워드가 들어간 필드 수
+          3글자 미만 검색어는 trigram 인덱스를 못 쓰므로 단어 첫머리 정규식(~*)으로 비교
+          → 섹션 필터(section_kind 인덱스)로 줄인 행만 훑음
+    두 순위를 RRF 로 합친 뒤, 어휘 조건에 맞는 행을 먼저 → 나머지는 빈자리만 벡터 순위로 채움
+    (벡터 top-N 에 섞인 관계없는 제품이 약품명/키워드 일치 행보다 앞서지 않도록)
+    고른 k개는 (어휘 일치, 거리) 순으로 반환 → chunks[0] 은 어휘 일치 행 중 가장 가까운 행
+    """
+    table = Chunk._meta.db_table
+
+    if section_kinds:
+        names = []
+        for i, kind in enumerate(section_kinds):
+            params[f"sk{i}"] = str(kind)
+            names.append(f"%(sk{i})s")
+        section_where = f"section_kind IN ({', '.join(names)})" if len(names) > 1 else f"section_kind = {names[0]}"
+    else:
+        section_where = "TRUE"
+
+    conds, scores = [], []
+    for i, term in enumerate(name_terms):
+        params[f"nt{i}"] = term
+        conds.append(_term_match("item_name", term, f"np{i}", params))
+        scores.append(f"similarity(item_name, %(nt{i})s)")
+    for i, term in enumerate(keyword_terms):
+        in_text = _term_match("text", term, f"kp{i}", params)
+        in_name = _term_match("item_name", term, f"kp{i}", params)
+        conds.append(f"{in_text} OR {in_name}")
+        scores.append(f"({in_text})::int + ({in_name})::int")
+    lexical_match = " OR ".join(f"({c})" for c in conds)
+
+    return f"""
+WITH vec AS (
+    SELECT id, row_number() OVER (ORDER BY distance) AS rnk
+    FROM (
+        SELECT id, embedding <=> %(q)s::vector AS distance
+        FROM {table}
+        WHERE {section_where}
+        ORDER BY embedding <=> %(q)s::vector
+        LIMIT %(pool)s
+    ) v
+),
+lex AS (
+    SELECT id, lexical_score, row_number() OVER (ORDER BY lexical_score DESC, id) AS rnk
+    FROM (
+        SELECT id, ({" + ".join(scores)}) AS lexical_score
+        FROM {table}
+        WHERE {section_where} AND ({lexical_match})
+        ORDER BY lexical_score DESC, id
+        LIMIT %(pool)s
+    ) l
+),
+fused AS (
+    SELECT
+        COALESCE(vec.id, lex.id) AS id,
+        COALESCE(1.0 / (%(rrf_k)s + vec.rnk), 0)
+            + %(lex_weight)s * COALESCE(1.0 / (%(rrf_k)s + lex.rnk), 0) AS rrf_score,
+        COALESCE(lex.lexical_score, 0) AS lexical_score
+    FROM vec FULL OUTER JOIN lex ON vec.id = lex.id
+)
+SELECT * FROM (
+    SELECT c.*, c.embedding <=> %(q)s::vector AS distance, fused.rrf_score, fused.lexical_score,
+        ({lexical_match}) AS lexical_match
+    FROM fused JOIN {table} c ON c.id = fused.id
+    ORDER BY lexical_match DESC, fused.rrf_score DESC, distance
+    LIMIT %(k)s
+) top
+ORDER BY lexical_match DESC, distance
+"""
+
+
+def rrf_fuse(
+    ranked_lists: List[List[Chunk]],
+    k: int,
+    rrf_k: int,
+    weights: List[float],
+    first_ids: Optional[set] = None,
+) -> List[Chunk]:
+    """
+    순위 리스트들 → RRF 점수 순 top-k (numpy 백엔드용, Chunk 에 rrf_score 속성 추가)
+    first_ids 에 든 Chunk(어휘 일치)는 점수와 관계없이 앞에 둠
+    """
+    first_ids = first_ids or set()
+    scores: Dict[int, float] = {}
+    by_id: Dict[int, Chunk] = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, c in enumerate(ranked, start=1):
+            scores[c.id] = scores.get(c.id, 0.0) + weight / (rrf_k + rank)
+            by_id.setdefault(c.id, c)
+
+    fused = sorted(
+        by_id.values(),
+        key=lambda c: (c.id not in first_ids, -scores[c.id], c.distance if c.distance is not None else 2.0),
+    )[:k]
+    for c in fused:
+        c.rrf_score = scores[c.id]
+    return fused
+
+
+def hybrid_search_chunks(
+    q_emb: List[float],
+    k: int,
+    section_kinds: Optional[List[str]] = None,
+    name_terms: Optional[List[str]] = None,
+    keyword_terms: Optional[List[str]] = None,
+    ef_search: Optional[int] = None,
+) -> List[Chunk]:
+    """
+    약품명/키워드 어휘 매칭과 벡터 유사도를 RRF 로 합친 top-k
+    - 필터 검색 → 결과 없으면 필터 없이 재검색 하던 2회 조회를 1회로 대체
+      (어휘 매칭된 행이 항상 먼저, k개에 못 미치면 나머지를 벡터 순위로 채움, 각 묶음 안은 거리 순)
+    - 결과 Chunk에는 distance / rrf_score (pgvector 는 lexical_score 도) 속성이 붙음
+    - 어휘 조건이 없으면 search_chunks 와 같음
+    """
+    name_terms = [t for t in (name_terms or []) if t]
+    keyword_terms = [t for t in (keyword_terms or []) if t]
+    if not name_terms and not keyword_terms:
+        return search_chunks(q_emb, k, section_kinds=section_kinds, ef_search=ef_search)
+
+    pool = max(k, getattr(settings, "RAG_HYBRID_CANDIDATES", 50))
+    rrf_k = getattr(settings, "RAG_HYBRID_RRF_K", 60)
+    lex_weight = getattr(settings, "RAG_HYBRID_LEXICAL_WEIGHT", 1.0)
+
+    if get_backend() == BACKEND_NUMPY:
+        # 어휘 순위 대신 필터 결과의 벡터 순위 사용
+        vector = search_chunks(q_emb, pool, section_kinds=section_kinds)
+        lexical = search_chunks(
+            q_emb, pool, section_kinds=section_kinds, name_terms=name_terms, keyword_terms=keyword_terms
+        )
+        lexical_ids = {c.id for c in lexical}
+        fused = rrf_fuse([vector, lexical], k, rrf_k, [1.0, lex_weight], first_ids=lexical_ids)
+        fused.sort(key=lambda c: (c.id not in lexical_ids, c.distance if c.distance is not None else 2.0))
+        return fused
+
+    params: Dict[str, object] = {
+        "q": _vector_literal(q_emb),
+        "pool": pool,
+        "rrf_k": rrf_k,
+        "lex_weight": lex_weight,
+        "k": k,
+    }
+    sql = _hybrid_sql(section_kinds, name_terms, keyword_terms, params)
+
+    with transaction.atomic():
+        set_ef_search(get_ef_search(ef_search, pool))
+        return list(Chunk.objects.raw(sql, params))
@@ -1,10 +1,8 @@
 # rag/services.py
-from typing import List
-from django.db.models import Q
-from pgvector.django import CosineDistance
+from typing import List, Optional, Tuple
 
-from .models import Chunk
-from .embeddings import get_embedding
+from .models import Chunk, SectionKind
+from .search import hybrid_search_chunks, search_chunks, search_chunks_many
 from .llm import generate_answer
 from .symptom import recommend_by_symptom, build_symptom_answer
 from .intents import (
@@ -22,75 +20,144 @@ from .constants import (
     INTENT_WARNING,
     INTENT_SYMPTOM,
     INTENT_GENERAL,
-    HEALTH_FOOD_KEYS,
     MAX_CHUNK_CHARS,
 )
 from .utils import (
-    normalize,
     clean_output,
-    extract_med_names,
-    is_medical_question,
     get_non_medical_response,
 )
-from .intent_detector import detect_intent
+from .analysis import QueryAnalysis, analyze_query
 from .health_food import search_health_food_chunks, build_health_food_answer
+from .answer_cache import get_cached_answer, store_answer
 
 
-def retrieve_top_chunks(query: str, k: int = 3, max_distance: float = 0.5) -> List[Chunk]:
-    intent = detect_intent(query)
+# intent → 검색할 섹션 종류 (section_kind 완전일치 → 섹션별 HNSW 부분 인덱스 사용)
+INTENT_SECTION_KIND = {
+    INTENT_SIDE_EFFECT: SectionKind.SIDE_EFFECT,
+    INTENT_EFFICACY: SectionKind.EFFICACY,
+    INTENT_DOSAGE: SectionKind.DOSAGE,
+    INTENT_INTERACTION: SectionKind.INTERACTION,
+    INTENT_WARNING: SectionKind.WARNING,
+}
+
+
+def retrieve_top_chunks(
+    query: str,
+    k: int = 3,
+    max_distance: float = 0.5,
+    ef_search: Optional[int] = None,
+    analysis: Optional[QueryAnalysis] = None,
+) -> List[Chunk]:
+    analysis = analysis or analyze_query(query)
+    intent = analysis.intent
 
     if intent == INTENT_GENERAL:
         return []
 
-    q_emb = get_embedding(query)
-    meds = extract_med_names(query)
+    q_emb = analysis.embedding
+    meds = analysis.med_names
+    products = analysis.products
 
-    qs = Chunk.objects.all()
+    section_kinds = _section_kinds(intent)
 
-    if intent == INTENT_SIDE_EFFECT:
-        qs = qs.filter(Q(section__icontains="부작용") | Q(section__icontains="이상반응"))
-    elif intent == INTENT_EFFICACY:
-        qs = qs.filter(Q(section__icontains="효능효과") | Q(section__icontains="효능"))
-    elif intent == INTENT_DOSAGE:
-        qs = qs.filter(Q(section__icontains="용법용량"))
-    elif intent == INTENT_INTERACTION:
-        qs = qs.filter(Q(section__icontains="상호작용"))
-    elif intent == INTENT_WARNING:
-        qs = qs.filter(
-            Q(section__icontains="사용상 주의사항")
-            | Q(section__icontains="주의사항")
-            | Q(section__icontains="주의")
-            | Q(section__icontains="경고")
+    # 1) 제품명 사전으로 찾은 정식 제품명 → item_name IN (...) 완전일치 필터
+    chunks: List[Chunk] = []
+    if products:
+        chunks = search_chunks(
+            q_emb, k, section_kinds=section_kinds, item_names=products, ef_search=ef_search
+        )
+
+    # 2) 사전에 없는 약품명은 약품명 trigram 매칭 + 벡터 순위를 RRF 로 합쳐 1회 조회
+    # (약품명 매칭이 없으면 벡터 순위만으로 채워짐 → 재검색 불필요)
+    if not chunks and meds:
+        chunks = hybrid_search_chunks(
+            q_emb, k, section_kinds=section_kinds, name_terms=meds, ef_search=ef_search
         )
+    elif not chunks:
+        chunks = search_chunks(q_emb, k, section_kinds=section_kinds, ef_search=ef_search)
 
-    if meds:
-        name_q = Q()
-        for m in meds:
-            name_q |= Q(item_name__icontains=m)
-        filtered = qs.filter(name_q)
-        if filtered.exists():
-            qs = filtered
+    return _finalize_chunks(query, analysis, chunks, max_distance)
 
-    qs = qs.annotate(distance=CosineDistance("embedding", q_emb)).order_by("distance")[:k]
-    chunks = list(qs)
 
-    if meds:
+def _section_kinds(intent: str) -> Optional[List[str]]:
+    section_kind = INTENT_SECTION_KIND.get(intent)
+    return [section_kind] if section_kind else None
+
+
+def _finalize_chunks(
+    query: str, analysis: QueryAnalysis, chunks: List[Chunk], max_distance: float
+) -> List[Chunk]:
+    """검색 결과 정렬(제품명 우선) + 거리 기준 확인"""
+    intent = analysis.intent
+    meds = analysis.med_names
+    products = analysis.products
+
+    if products:
+        chunks = prioritize_products(products, chunks)
+    elif meds:
         chunks = prioritize_base_brand(meds[0], chunks)
 
     if not chunks:
-        print(f"[RAG] no chunks found for query='{query}' (intent={intent}, meds={meds})")
+        print(f"[RAG] no chunks found for query='{query}' (intent={intent}, meds={meds}, products={products[:3]})")
         return []
 
     first_dist = float(chunks[0].distance) if chunks[0].distance is not None else None
-    print(f"[RAG] intent={intent}, meds={meds}, top_k={len(chunks)}, first_dist={first_dist}")
+    print(
+        f"[RAG] intent={intent}, meds={meds}, products={products[:3]}, "
+        f"top_k={len(chunks)}, first_dist={first_dist}"
+    )
 
-    if not meds and first_dist is not None and first_dist > max_distance:
+    if not meds and not products and first_dist is not None and first_dist > max_distance:
         print(f"[RAG] distance too far (no meds, {first_dist} > {max_distance}) → 사용 안 함")
         return []
 
     return chunks
 
 
+def retrieve_top_chunks_many(
+    questions: List[str],
+    analyses: List[QueryAnalysis],
+    k: int = 3,
+    max_distance: float = 0.5,
+    ef_search: Optional[int] = None,
+) -> List[List[Chunk]]:
+    """
+    여러 질문 검색 (배치 질의용, 결과는 질문 순서대로 retrieve_top_chunks 와 같음)
+    - 약품명/제품명이 없는 질문: 섹션 필터 벡터 검색을 search_chunks_many 로 한 번에
+    - 약품명/제품명이 있는 질문: 질문별 필터가 달라 retrieve_top_chunks 를 각각 호출
+    """
+    results: List[List[Chunk]] = [[] for _ in questions]
+    plain: List[int] = []
+
+    for i, (question, analysis) in enumerate(zip(questions, analyses)):
+        if analysis.intent == INTENT_GENERAL:
+            continue
+        if analysis.med_names or analysis.products:
+            results[i] = retrieve_top_chunks(
+                question, k=k, max_distance=max_distance, ef_search=ef_search, analysis=analysis
+            )
+        else:
+            plain.append(i)
+
+    if plain:
+        found = search_chunks_many(
+            [analyses[i].embedding for i in plain],
+            k,
+            section_kinds_list=[_section_kinds(analyses[i].intent) for i in plain],
+            ef_search=ef_search,
+        )
+        for i, chunks in zip(plain, found):
+            results[i] = _finalize_chunks(questions[i], analyses[i], chunks, max_distance)
+
+    return results
+
+
+def prioritize_products(products: List[str], chunks: List[Chunk]) -> List[Chunk]:
+    """제품명 사전 결과 순서(먼저 언급된 약, 짧은 기본 제품명 우선)대로 정렬 (같은 제품 안에서는 검색 순서 유지)"""
+    rank = {name: i for i, name in enumerate(products)}
+    return sorted(chunks, key=lambda c: rank.get(c.item_name, len(rank)))
+
+
 def prioritize_base_brand(med: str, chunks: List[Chunk]) -> List[Chunk]:
     exact: List[Chunk] = []
     contains: List[Chunk] = []
@@ -118,25 +185,29 @@ def build_context(chunks: List[Chunk]) -> str:
     return "\n".join(blocks)
 
 
-def build_general_answer(question: str, chunks: List[Chunk]) -> str:
+# 일반 답변 프롬프트의 고정 머리말 (rag.llm prefix KV cache 재사용 단위)
+GENERAL_PREFIX_NO_CONTEXT = (
+    "너는 의약품과 일반 건강 정보를 설명하는 한국어 상담 어시스턴트이다.\n\n"
+    "아래 사용자의 질문에 대해, 네가 이미 학습한 의약·건강 지식을 사용해 "
+    "안전하고 보수적으로 답변해라. 확실하지 않은 내용이나 진단이 필요한 부분은 "
+    "추측하지 말고 반드시 의사 또는 약사 상담을 권고해라.\n"
+    "⭐ 답변은 3-5문장 이내로 핵심만 간결하게 작성해라.\n\n"
+    "[질문]\n"
+)
+GENERAL_PREFIX_WITH_CONTEXT = (
+    "\n너는 의약품과 일반 건강 정보를 설명하는 한국어 상담 어시스턴트이다.\n\n"
+    "[참고 문서]\n"
+)
+
+
+def build_general_prompt(question: str, chunks: List[Chunk]) -> Tuple[str, str]:
+    """일반 답변용 (프롬프트, 고정 머리말)"""
     if not chunks:
-        prompt = (
-            "너는 의약품과 일반 건강 정보를 설명하는 한국어 상담 어시스턴트이다.\n\n"
-            "아래 사용자의 질문에 대해, 네가 이미 학습한 의약·건강 지식을 사용해 "
-            "안전하고 보수적으로 답변해라. 확실하지 않은 내용이나 진단이 필요한 부분은 "
-            "추측하지 말고 반드시 의사 또는 약사 상담을 권고해라.\n"
-            "⭐ 답변은 3-5문장 이내로 핵심만 간결하게 작성해라.\n\n"
-            f"[질문]\n{question}\n\n[답변]\n"
-        )
-        return generate_answer(prompt).strip()
+        return GENERAL_PREFIX_NO_CONTEXT + f"{question}\n\n[답변]\n", GENERAL_PREFIX_NO_CONTEXT
 
     context = build_context(chunks)
 
-    prompt = f"""
-너는 의약품과 일반 건강 정보를 설명하는 한국어 상담 어시스턴트이다.
-
-[참고 문서]
-{context}
+    prompt = GENERAL_PREFIX_WITH_CONTEXT + f"""{context}
 
 [질문]
 {question}
@@ -152,32 +223,39 @@ def build_general_answer(question: str, chunks: List[Chunk]) -> str:
 
 [최종 답변]
 """
-    return generate_answer(prompt).strip()
+    return prompt, GENERAL_PREFIX_WITH_CONTEXT
 
 
-def build_answer(question: str, chunks: List[Chunk]) -> str:
+def build_general_answer(question: str, chunks: List[Chunk]) -> str:
+    prompt, static_prefix = build_general_prompt(question, chunks)
+    return generate_answer(prompt, static_prefix=static_prefix).strip()
+
+
+def build_answer(question: str, chunks: List[Chunk], analysis: Optional[QueryAnalysis] = None) -> str:
     """
     질문에 대한 최종 답변 생성
     - 의료 질문이 아니면 초기에 차단
     """
+    analysis = analysis or analyze_query(question)
+
     # ========== 의료 질문 필터링 ==========
-    if not is_medical_question(question):
+    if not analysis.is_medical:
         print(f"[FILTER] 비의료 질문 차단: {question[:50]}")
         return get_non_medical_response()
     # =====================================
 
-    intent = detect_intent(question)
+    intent = analysis.intent
     print("[INTENT]", intent, "/ q =", question)
 
     if intent == INTENT_GENERAL:
         return clean_output(build_general_answer(question, chunks))
 
     if intent == INTENT_SYMPTOM:
-        recs = recommend_by_symptom(question)
+        recs = recommend_by_symptom(question, analysis=analysis)
         if recs:
-            return clean_output(build_symptom_answer(question, recs))
+            return clean_output(build_symptom_answer(question, recs, analysis=analysis))
 
-        hf_chunks = search_health_food_chunks(question)
+        hf_chunks = search_health_food_chunks(question, analysis=analysis)
         if hf_chunks:
             return build_health_food_answer(question, hf_chunks)
 
@@ -185,23 +263,20 @@ def build_answer(question: str, chunks: List[Chunk]) -> str:
 
     if intent == INTENT_SIDE_EFFECT:
         if chunks:
-            return clean_output(build_side_effect_answer(question, chunks))
+            return clean_output(build_side_effect_answer(question, chunks, products=analysis.products))
         return clean_output(build_general_answer(question, chunks))
 
     if intent == INTENT_EFFICACY:
-        q_norm = normalize(question)
-        is_health_food_q = any(h in q_norm for h in HEALTH_FOOD_KEYS)
-
-        if is_health_food_q:
-            hf_chunks = search_health_food_chunks(question)
+        if analysis.is_health_food:
+            hf_chunks = search_health_food_chunks(question, analysis=analysis)
             if hf_chunks:
                 return build_health_food_answer(question, hf_chunks)
             return clean_output(build_general_answer(question, []))
 
         if chunks:
-            return clean_output(build_efficacy_answer(question, chunks))
+            return clean_output(build_efficacy_answer(question, chunks, products=analysis.products))
 
-        hf_chunks = search_health_food_chunks(question)
+        hf_chunks = search_health_food_chunks(question, analysis=analysis)
         if hf_chunks:
             return build_health_food_answer(question, hf_chunks)
 
@@ -209,17 +284,68 @@ def build_answer(question: str, chunks: List[Chunk]) -> str:
 
     if intent == INTENT_DOSAGE:
         if chunks:
-            return clean_output(build_dosage_answer(question, chunks))
+            return clean_output(build_dosage_answer(question, chunks, products=analysis.products))
         return clean_output(build_general_answer(question, chunks))
 
     if intent == INTENT_INTERACTION:
         if chunks:
-            return clean_output(build_interaction_answer(question, chunks))
+            return clean_output(build_interaction_answer(question, chunks, products=analysis.products))
         return clean_output(build_general_answer(question, chunks))
 
     if intent == INTENT_WARNING:
         if chunks:
-            return clean_output(build_warning_answer(question, chunks))
+            return clean_output(build_warning_answer(question, chunks, products=analysis.products))
         return clean_output(build_general_answer(question, chunks))
 
-    return clean_output(build_general_answer(question, chunks))
\ No newline at end of file
+    return clean_output(build_general_answer(question, chunks))
+
+
+def build_contexts(chunks: List[Chunk]) -> List[dict]:
+    """API 응답용 contexts (검색 결과가 없으면 빈 context 1개)"""
+    if not chunks:
+        return [{
+            "chunk_id": "",
+            "item_name": "",
+            "section": "",
+            "chunk_index": 0
+        }]
+
+    return [
+        {
+            "chunk_id": c.chunk_id,
+            "item_name": c.item_name,
+            "section": c.section,
+            "chunk_index": c.chunk_index,
+        }
+        for c in chunks
+    ]
+
+
+def answer_question(
+    question: str,
+    k: int = 5,
+    check_cache: bool = True,
+    analysis: Optional[QueryAnalysis] = None,
+    chunks: Optional[List[Chunk]] = None,
+) -> dict:
+    """
+    답변 캐시 → 검색 → 답변 생성 → 캐시 저장
+    check_cache=False: 호출 측에서 이미 캐시를 확인한 경우
+    analysis: 호출 측에서 이미 만든 analyze_query(question) 결과 (없으면 여기서 1회 계산)
+    chunks: 호출 측에서 이미 검색한 결과 (retrieve_top_chunks_many, 없으면 여기서 검색)
+    return: {"answer", "contexts", "cached"}
+    """
+    analysis = analysis or analyze_query(question)
+
+    if check_cache:
+        cached = get_cached_answer(question, analysis=analysis)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    if chunks is None:
+        chunks = retrieve_top_chunks(question, k=k, analysis=analysis)
+    answer = build_answer(question, chunks, analysis=analysis)
+
+    result = {"answer": answer, "contexts": build_contexts(chunks)}
+    store_answer(question, result, analysis=analysis)
+    return {**result, "cached": False}
@@ -0,0 +1,141 @@
+# rag/streaming.py
+"""
+RAG 답변 토큰 스트리밍 (Server-Sent Events)
+
+DrugRAGView mode=stream 에서 사용
+- 백그라운드 스레드에서 answer_question 실행
+- 그 스레드 안에서 generate_answer 가 호출되면 token sink 로 토큰을 흘려보냄
+- 응답 이벤트
+    event: token  data: {"text": "..."}            (LLM 생성 토큰 조각)
+    event: done   data: {status, question, cached, result}  (후처리 끝난 최종 답변, sync 응답과 같은 형태)
+    event: error  data: {"detail", "error"}
+템플릿 답변(약효/용법 등)은 token 없이 done 만 전송된다.
+"""
+import contextvars
+import json
+import queue
+import threading
+import traceback
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from django.db import connections
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+if TYPE_CHECKING:
+    from .analysis import QueryAnalysis
+
+KEEPALIVE_SECONDS = 15
+
+_token_sink: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "rag_token_sink", default=None
+)
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "rag_cancel_event", default=None
+)
+
+
+@contextmanager
+def token_sink(callback: Callable[[str], None], cancel: Optional[threading.Event] = None):
+    """
+    이 블록 안에서 generate_answer 가 만든 토큰을 callback 으로 전달
+    cancel 이 set 되면(클라이언트 연결 끊김) generate 중단
+    """
+    token = _token_sink.set(callback)
+    cancel_token = _cancel_event.set(cancel)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(cancel_token)
+        _token_sink.reset(token)
+
+
+def current_token_sink() -> Optional[Callable[[str], None]]:
+    return _token_sink.get()
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    return _cancel_event.get()
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events: Iterator[str]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx 버퍼링 끄기
+    return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Accept: text/event-stream 요청이 406으로 막히지 않도록 + 일반 Response(에러 등)도 이벤트 1개로 렌더링"""
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        event = "error" if response is not None and response.status_code >= 400 else "done"
+        return sse_event(event, data).encode("utf-8")
+
+
+def stream_answer_events(question: str, k: int = 5, analysis: Optional["QueryAnalysis"] = None) -> Iterator[str]:
+    """answer_question 을 돌리면서 token → done(또는 error) 이벤트를 순서대로 생성"""
+    from .services import answer_question
+
+    events: "queue.Queue" = queue.Queue()
+    finished = object()
+    outcome = {}
+    cancelled = threading.Event()
+
+    def run():
+        try:
+            with token_sink(lambda text: events.put(text), cancel=cancelled):
+                outcome["result"] = answer_question(question, k=k, check_cache=False, analysis=analysis)
+        except Exception as e:
+            print(f"[STREAM-RAG] RAG 처리 오류: {e}")
+            traceback.print_exc()
+            outcome["error"] = str(e)
+        finally:
+            # 요청 스레드가 아닌 곳에서 연 DB 커넥션 정리
+            connections.close_all()
+            events.put(finished)
+
+    threading.Thread(target=run, name="rag-stream", daemon=True).start()
+
+    try:
+        while True:
+            try:
+                item = events.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # 검색/모델 로드 중 프록시가 연결을 끊지 않도록 주석 라인 전송
+                yield ": keep-alive\n\n"
+                continue
+
+            if item is finished:
+                break
+            yield sse_event("token", {"text": item})
+    finally:
+        # 클라이언트가 끊기면(GeneratorExit) 남은 generate 중단
+        cancelled.set()
+
+    if "error" in outcome:
+        yield sse_event("error", {"detail": "RAG 처리 중 오류", "error": outcome["error"]})
+        return
+
+    result = outcome["result"]
+    yield sse_event(
+        "done",
+        {
+            "status": "done",
+            "question": question,
+            "cached": result["cached"],
+            "result": {
+                "answer": result["answer"],
+                "contexts": result["contexts"],
+            },
+        },
+    )
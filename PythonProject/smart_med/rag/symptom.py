@@ -1,10 +1,17 @@
 # rag/symptom.py
 import re
-from typing import List, Dict, Any
+import threading
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 
-from django.db.models import Q
+import numpy as np
+from django.conf import settings
 
-from .models import Chunk
+from .corpus import get_corpus_version
+from .models import Chunk, SectionKind
+
+if TYPE_CHECKING:
+    from .analysis import QueryAnalysis
 
 
 from typing import Dict, List
@@ -60,27 +67,14 @@ def extract_symptoms(question: str) -> List[str]:
     toks = [t.strip() for t in q_clean.split() if len(t.strip()) >= 2]
     toks = [t for t in toks if t not in SYMPTOM_STOPWORDS]
 
-    # 공백 제거 버전(문장 전체)
-    q_norm = _normalize(q_clean)
-
-    found = set()
-
-    # 1) 문장 전체에서 base/동의어 매칭 → base(키값)만 모음
-    for base, words in SYMPTOM_CATEGORY_MAP.items():
-        # base 직접 포함
-        if base in q_norm:
-            found.add(base)
-            continue
+    # 1) 문장 전체(한글만, 공백 제거)에서 base/동의어 매칭 → base(키값)만 모음
+    from .keyword_matcher import SYMPTOM_BASE, analyze_keywords
 
-        # 동의어들 포함
-        for w in words:
-            if w and w in q_norm:
-                found.add(base)
-                break
+    found = analyze_keywords(question).get(SYMPTOM_BASE)
 
     if found:
         # 항상 "속쓰림", "두통" 같은 카테고리 이름만 반환
-        return list(found)
+        return [base for base in SYMPTOM_CATEGORY_MAP if base in found]
 
     # 2) 매핑에 없는 증상(새 단어)일 때만 토큰 그대로 fallback
     return toks
@@ -119,122 +113,193 @@ def classify_product_age(item_name: str) -> str:
     return "unknown"
 
 
-def _score_chunk_for_symptoms(text_norm: str, symptoms: List[str]) -> (int, set):
+# ==================================================
+# 증상 역색인 (효능/효과 chunk 기준, Chunk 버전이 바뀌면 다시 만듦)
+# ==================================================
+AGE_UNKNOWN, AGE_CHILD, AGE_ADULT = 0, 1, 2
+_AGE_CODES = {"unknown": AGE_UNKNOWN, "child": AGE_CHILD, "adult": AGE_ADULT}
+
+
+class SymptomIndex:
     """
-    한 Chunk에 대해:
-    - 어떤 증상들이 매칭됐는지
-    - 점수는 얼마나 되는지 계산
+    증상/카테고리 단어 → 해당 단어가 들어있는 효능 chunk 위치(postings)
+    점수 규칙(질문 증상 s 마다):
+    - s 자체가 포함되면 +2
+    - SYMPTOM_CATEGORY_MAP[s] 의 단어가 포함될 때마다 +1
+    - 질문 연령대와 제품 연령대가 같으면 +1, 반대면 -1
     """
-    score = 0
-    matched = set()
 
-    for s in symptoms:
-        matched_flag = False
+    def __init__(self, version: str):
+        self.version = version
 
-        # 증상 단어 직접 포함
-        if s in text_norm:
-            score += 2
-            matched_flag = True
+        rows = list(
+            Chunk.objects
+            .filter(section_kind=SectionKind.EFFICACY)
+            .order_by("id")
+            .values_list("id", "item_name", "text")
+        )
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.item_names = [r[1] or "" for r in rows]
+        self.texts = [_normalize((text or "") + " " + (name or "")) for _, name, text in rows]
+        self.ages = np.array([_AGE_CODES[classify_product_age(name)] for name in self.item_names], dtype=np.int8)
 
-        # 매핑된 카테고리 단어 포함
-        for cat in SYMPTOM_CATEGORY_MAP.get(s, []):
-            if cat in text_norm:
-                score += 1
-                matched_flag = True
+        self.postings: Dict[str, np.ndarray] = {term: self._scan(term) for term in SYMPTOM_KEYWORDS}
 
-        if matched_flag:
-            matched.add(s)
+    @property
+    def rows(self) -> int:
+        return len(self.texts)
 
-    return score, matched
+    def _scan(self, term: str) -> np.ndarray:
+        return np.flatnonzero(np.fromiter((term in t for t in self.texts), dtype=bool, count=len(self.texts)))
 
+    def _hits(self, term: str) -> np.ndarray:
+        hit = self.postings.get(term)
+        # 매핑에 없는 fallback 토큰만 직접 검색
+        return hit if hit is not None else self._scan(term)
 
-def recommend_by_symptom(question: str, topn: int = 5) -> List[Dict[str, Any]]:
-    """
-    증상 기반 약 추천:
-    - 효능/효과 섹션에서 증상/카테고리 단어 검색
-    - 질문에 나온 여러 증상을 동시에 평가
-      1) 우선: 모든 증상을 다 포함하는 약만(strict)
-      2) 그런 약이 없으면: 일부 증상만 포함하는 약도 허용(loose)
-    - 어린이/성인 여부 반영
-    - 동일 item_name 중 최고 점수만 사용
-    """
-    symptoms = extract_symptoms(question)
-    if not symptoms:
-        return []
+    def recommend(self, symptoms: List[str], age_group: str, topn: int = 5) -> List[Dict[str, Any]]:
+        n = self.rows
+        score = np.zeros(n, dtype=np.int32)
+        symptom_hits = []
 
-    age_group = detect_age_group(question)
+        for s in symptoms:
+            hit = np.zeros(n, dtype=bool)
 
-    qs = Chunk.objects.filter(
-        Q(section__icontains="효능효과") | Q(section__icontains="효능")
-    )
+            idx = self._hits(s)
+            score[idx] += 2
+            hit[idx] = True
 
-    strict_best: Dict[str, Dict[str, Any]] = {}  # 모든 증상 포함
-    loose_best: Dict[str, Dict[str, Any]] = {}   # 일부만 포함
+            for cat in SYMPTOM_CATEGORY_MAP.get(s, []):
+                idx = self._hits(cat)
+                score[idx] += 1
+                hit[idx] = True
 
-    for c in qs:
-        text_norm = _normalize((c.text or "") + " " + (c.item_name or ""))
+            symptom_hits.append(hit)
 
-        base_score, matched = _score_chunk_for_symptoms(text_norm, symptoms)
-        if base_score <= 0:
-            continue
+        matched_count = np.sum(symptom_hits, axis=0) if symptom_hits else np.zeros(n, dtype=np.int64)
 
         # 연령대 보정
-        prod_age = classify_product_age(c.item_name or "")
-        age_tag = ""
-        score = base_score
-
+        adjusted = score.copy()
         if age_group == "child":
-            if prod_age == "child":
-                score += 1
-                age_tag = "어린이용"
-            elif prod_age == "adult":
-                score -= 1
+            adjusted += (self.ages == AGE_CHILD).astype(np.int32) - (self.ages == AGE_ADULT)
         elif age_group == "adult":
-            if prod_age == "adult":
-                score += 1
-                age_tag = "성인용"
-            elif prod_age == "child":
-                score -= 1
-                age_tag = "어린이용"
-
-        if score <= 0:
-            continue
-
-        key = c.item_name
-
-        # loose: 증상 일부만 매칭돼도 포함
-        if key not in loose_best or score > loose_best[key]["score"]:
-            loose_best[key] = {
-                "score": score,
-                "chunk": c,
-                "age_tag": age_tag,
-                "matched": matched,
+            adjusted += (self.ages == AGE_ADULT).astype(np.int32) - (self.ages == AGE_CHILD)
+
+        candidates = np.flatnonzero((score > 0) & (adjusted > 0))
+
+        strict_best: Dict[str, Dict[str, Any]] = {}  # 모든 증상 포함
+        loose_best: Dict[str, Dict[str, Any]] = {}   # 일부만 포함
+
+        for i in candidates:
+            key = self.item_names[i]
+            rec = {
+                "score": int(adjusted[i]),
+                "row": int(i),
+                "age_tag": self._age_tag(age_group, self.ages[i]),
+                "matched": {s for s, hit in zip(symptoms, symptom_hits) if hit[i]},
+            }
+
+            # loose: 증상 일부만 매칭돼도 포함
+            if key not in loose_best or rec["score"] > loose_best[key]["score"]:
+                loose_best[key] = rec
+
+            # strict: 모든 증상을 다 매칭한 경우만
+            if matched_count[i] == len(symptoms):
+                if key not in strict_best or rec["score"] > strict_best[key]["score"]:
+                    strict_best[key] = rec
+
+        # 우선 strict 결과 사용, 없으면 loose 사용
+        target = strict_best if strict_best else loose_best
+        if not target:
+            return []
+
+        recs = sorted(target.values(), key=lambda x: -x["score"])[:topn]
+
+        chunks = Chunk.objects.in_bulk([int(self.ids[r["row"]]) for r in recs])
+        return [
+            {
+                "score": r["score"],
+                "chunk": chunks[int(self.ids[r["row"]])],
+                "age_tag": r["age_tag"],
+                "matched": r["matched"],
             }
+            for r in recs
+            if int(self.ids[r["row"]]) in chunks
+        ]
 
-        # strict: 모든 증상을 다 매칭한 경우만
-        if len(matched) == len(symptoms):
-            if key not in strict_best or score > strict_best[key]["score"]:
-                strict_best[key] = {
-                    "score": score,
-                    "chunk": c,
-                    "age_tag": age_tag,
-                    "matched": matched,
-                }
-
-    # 우선 strict 결과 사용, 없으면 loose 사용
-    target = strict_best if strict_best else loose_best
-    if not target:
+    @staticmethod
+    def _age_tag(age_group: str, prod_age: int) -> str:
+        if age_group == "child" and prod_age == AGE_CHILD:
+            return "어린이용"
+        if age_group == "adult":
+            if prod_age == AGE_ADULT:
+                return "성인용"
+            if prod_age == AGE_CHILD:
+                return "어린이용"
+        return ""
+
+
+_index: Optional[SymptomIndex] = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_symptom_index() -> SymptomIndex:
+    global _index, _index_checked_at
+
+    interval = getattr(settings, "RAG_SYMPTOM_INDEX_CHECK_SECONDS", 30)
+    if _index is not None and time.time() - _index_checked_at < interval:
+        return _index
+
+    with _index_lock:
+        if _index is not None and time.time() - _index_checked_at < interval:
+            return _index
+
+        version = get_corpus_version()
+        if _index is None or _index.version != version:
+            t0 = time.time()
+            _index = SymptomIndex(version)
+            print(
+                f"[SYMPTOM-INDEX] build version={version}, rows={_index.rows}, "
+                f"terms={len(_index.postings)}, elapsed={time.time() - t0:.2f}s"
+            )
+
+        _index_checked_at = time.time()
+
+    return _index
+
+
+def recommend_by_symptom(
+    question: str,
+    topn: int = 5,
+    analysis: Optional["QueryAnalysis"] = None,
+) -> List[Dict[str, Any]]:
+    """
+    증상 기반 약 추천 (SymptomIndex 조회):
+    - 효능/효과 섹션에서 증상/카테고리 단어 검색
+    - 질문에 나온 여러 증상을 동시에 평가
+      1) 우선: 모든 증상을 다 포함하는 약만(strict)
+      2) 그런 약이 없으면: 일부 증상만 포함하는 약도 허용(loose)
+    - 어린이/성인 여부 반영
+    - 동일 item_name 중 최고 점수만 사용
+    """
+    symptoms = analysis.symptoms if analysis else extract_symptoms(question)
+    if not symptoms:
         return []
 
-    recs = sorted(target.values(), key=lambda x: -x["score"])[:topn]
-    return recs
+    age_group = analysis.age_group if analysis else detect_age_group(question)
+    return get_symptom_index().recommend(symptoms, age_group, topn)
 
 
-def build_symptom_answer(question: str, recs: List[Dict[str, Any]]) -> str:
+def build_symptom_answer(
+    question: str,
+    recs: List[Dict[str, Any]],
+    analysis: Optional["QueryAnalysis"] = None,
+) -> str:
     if not recs:
         return "참고 문서에서 해당 증상에 맞는 약을 찾지 못했습니다."
 
-    symptoms = extract_symptoms(question)
+    symptoms = analysis.symptoms if analysis else extract_symptoms(question)
     sym_line = ", ".join(symptoms) if symptoms else question
 
     lines: List[str] = []
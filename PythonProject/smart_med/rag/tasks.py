@@ -1,44 +1,26 @@
 # rag/tasks.py
 from celery import shared_task
 
-from .services import retrieve_top_chunks, build_answer
-from .llm_loader import get_llm_model
+from .analysis import analyze_query
+from .services import answer_question
 
 
-@shared_task(bind=True)
+# 워커가 죽으면 다른 워커가 다시 처리 (같은 질문 재처리는 안전)
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def run_rag_task(self, question):
     try:
-        tokenizer, model = get_llm_model()
-
-        chunks = retrieve_top_chunks(question, k=5)
-        answer = build_answer(question, chunks)
-
-        # fallback contexts 동일 적용!
-        if not chunks:
-            contexts = [{
-                "chunk_id": "",
-                "item_name": "",
-                "section": "",
-                "chunk_index": 0
-            }]
-        else:
-            contexts = [
-                {
-                    "chunk_id": c.chunk_id,
-                    "item_name": c.item_name,
-                    "section": c.section,
-                    "chunk_index": c.chunk_index,
-                }
-                for c in chunks
-            ]
+        # 워커 프로세스에서 질문 분석 1회 → 캐시 조회/검색/답변 생성이 같은 결과 사용
+        analysis = analyze_query(question)
+        result = answer_question(question, k=5, analysis=analysis)
 
         return {
             "status": "done",
             "question": question,
             "task_id": self.request.id,
+            "cached": result["cached"],
             "result": {
-                "answer": answer,
-                "contexts": contexts,
+                "answer": result["answer"],
+                "contexts": result["contexts"],
             }
         }
 
@@ -47,4 +29,4 @@ def run_rag_task(self, question):
             "status": "failed", 
             "error": str(e),
             "question": question
-        }
\ No newline at end of file
+        }
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import DrugRAGView, RAGTaskResultView
+from .views import DrugRAGView, RAGReadyView, RAGTaskResultView
 
 urlpatterns = [
     path("drug/", DrugRAGView.as_view()),
     path("result/<str:task_id>/", RAGTaskResultView.as_view()),
+    path("ready/", RAGReadyView.as_view()),
 ]
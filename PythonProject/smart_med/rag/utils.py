@@ -1,13 +1,7 @@
 # rag/utils.py
 import re
 from typing import List
-from .constants import (
-    MED_NAME_HINT, 
-    MEDICAL_KEYWORDS, 
-    NON_MEDICAL_KEYWORDS,
-    GREETING_KEYWORDS,
-    HEALTH_FOOD_KEYS,
-)
+from .constants import MED_NAME_HINT
 
 
 def normalize(s: str) -> str:
@@ -109,28 +103,13 @@ def is_greeting(question: str) -> bool:
     """
     질문이 인사말인지 판단
     """
-    q = question.strip().replace(" ", "").lower()
-    
     # 짧은 문장만 인사로 간주 (30자 이하)
     if len(question.strip()) > 30:
         return False
-    
-    # 인사 패턴 체크
-    greeting_patterns = [
-        "안녕",
-        "반가",
-        "처음",
-        "하이",
-        "헬로",
-        "좋은아침",
-        "좋은하루",
-    ]
-    
-    for pattern in greeting_patterns:
-        if pattern in q:
-            return True
-    
-    return False
+
+    from .keyword_matcher import GREETING, analyze_keywords
+
+    return analyze_keywords(question).has(GREETING)
 
 
 def get_greeting_response() -> str:
@@ -157,34 +136,20 @@ def is_medical_question(question: str) -> bool:
         True: 의료 관련 질문
         False: 비의료 질문
     """
-    q_norm = normalize(question)
-    
+    from . import keyword_matcher as km
+
+    hits = km.analyze_keywords(question)
+
     # 0. 인사말은 의료 질문으로 간주 (별도 처리 위해)
     if is_greeting(question):
         return True
     
     # 1. 명백한 비의료 키워드가 있으면 False
-    if any(k in q_norm for k in NON_MEDICAL_KEYWORDS):
+    if hits.has(km.NON_MEDICAL):
         return False
     
-    # 2. 의료 키워드가 하나라도 있으면 True
-    if any(k in q_norm for k in MEDICAL_KEYWORDS):
-        return True
-    
-    # 3. 증상 키워드가 있으면 True
-    try:
-        from .symptom import SYMPTOM_KEYWORDS
-        if any(k in q_norm for k in SYMPTOM_KEYWORDS):
-            return True
-    except ImportError:
-        pass
-    
-    # 4. 약품명 힌트가 있으면 True
-    if any(h in question for h in MED_NAME_HINT):
-        return True
-    
-    # 5. 건강기능식품 키워드가 있으면 True
-    if any(h in q_norm for h in HEALTH_FOOD_KEYS):
+    # 2. 의료 키워드 / 3. 증상 키워드 / 4. 약품명 힌트 / 5. 건강기능식품 키워드가 있으면 True
+    if any(hits.has(c) for c in (km.MEDICAL, km.SYMPTOM, km.MED_HINT, km.HEALTH_FOOD)):
         return True
     
     # 6. 그 외는 False (보수적으로 차단)
@@ -0,0 +1,311 @@
+# rag/vector_store.py
+"""
+프로세스 내 NumPy 벡터 검색 엔진 (settings.RAG_RETRIEVAL_BACKEND = "numpy")
+
+- 전체 Chunk 임베딩을 (N, 384) 행렬 파일로 저장하고 mmap으로 읽음
+- item_name / section / section_kind / text 등 메타데이터는 별도 배열
+- 질의 1건 = 행렬-벡터 곱 1번 + argpartition (배치 질의는 섹션 필터별 행렬-행렬 곱 1번, search_many)
+- intent / 약품명 / 키워드 필터는 boolean mask로 적용
+- Chunk 테이블 버전(rag.corpus)이 바뀌면 다시 빌드
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .corpus import get_corpus_version
+from .models import Chunk, EMB_DIM
+
+# 행렬-벡터 곱을 나눠서 계산할 행 수 (float16 → float32 변환 메모리 제한)
+MATMUL_BLOCK_ROWS = 65536
+
+META_FILE = "meta.json"
+META_FIELDS = ["ids", "chunk_ids", "item_names", "sections", "section_kinds", "chunk_indexes", "texts"]
+
+
+def _store_dir() -> Path:
+    return Path(getattr(settings, "RAG_VECTOR_STORE_DIR", settings.BASE_DIR / "data" / "vector_store"))
+
+
+def _store_dtype():
+    return np.float16 if getattr(settings, "RAG_VECTOR_STORE_DTYPE", "float32") == "float16" else np.float32
+
+
+def build_vector_store(version: Optional[str] = None) -> Path:
+    """
+    Chunk 테이블 → <RAG_VECTOR_STORE_DIR>/<version>/ 에 npy 파일 저장
+    임시 디렉터리에 쓴 뒤 rename 하므로 다른 프로세스는 완성된 파일만 읽음
+    """
+    version = version or get_corpus_version()
+    base = _store_dir()
+    target = base / version
+    if (target / META_FILE).exists():
+        return target
+
+    base.mkdir(parents=True, exist_ok=True)
+    tmp = base / f".tmp-{version}-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    t0 = time.time()
+    n = Chunk.objects.count()
+    dtype = _store_dtype()
+
+    emb = np.lib.format.open_memmap(tmp / "embeddings.npy", mode="w+", dtype=dtype, shape=(n, EMB_DIM))
+    ids = np.zeros(n, dtype=np.int64)
+    chunk_indexes = np.zeros(n, dtype=np.int32)
+    chunk_ids: List[str] = []
+    item_names: List[str] = []
+    sections: List[str] = []
+    section_kinds: List[str] = []
+    texts: List[str] = []
+
+    rows = (
+        Chunk.objects.order_by("id")
+        .values_list("id", "chunk_id", "item_name", "section", "section_kind", "chunk_index", "text", "embedding")
+        .iterator(chunk_size=2000)
+    )
+
+    i = 0
+    for cid, chunk_id, item_name, section, section_kind, chunk_index, text, vec in rows:
+        if i >= n:
+            break  # 빌드 중 새로 들어온 행은 다음 버전에서 반영
+        v = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        emb[i] = v / norm if norm > 0 else v
+        ids[i] = cid
+        chunk_indexes[i] = chunk_index
+        chunk_ids.append(chunk_id)
+        item_names.append(item_name or "")
+        sections.append(section or "")
+        section_kinds.append(section_kind or "")
+        texts.append(text or "")
+        i += 1
+
+    emb.flush()
+    del emb
+
+    np.save(tmp / "ids.npy", ids[:i])
+    np.save(tmp / "chunk_indexes.npy", chunk_indexes[:i])
+    np.save(tmp / "chunk_ids.npy", np.array(chunk_ids, dtype=str))
+    np.save(tmp / "item_names.npy", np.array(item_names, dtype=str))
+    np.save(tmp / "sections.npy", np.array(sections, dtype=str))
+    np.save(tmp / "section_kinds.npy", np.array(section_kinds, dtype=str))
+    np.save(tmp / "texts.npy", np.array(texts, dtype=str))
+
+    with open(tmp / META_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "rows": i, "dtype": np.dtype(dtype).name}, f)
+
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        # 다른 프로세스가 먼저 만든 경우
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # 이전 버전 정리
+    for old in base.iterdir():
+        if old.is_dir() and old.name != version and not old.name.startswith(".tmp-"):
+            shutil.rmtree(old, ignore_errors=True)
+
+    print(f"[VECTOR-STORE] build 완료 version={version}, rows={i}, elapsed={time.time() - t0:.2f}s")
+    return target
+
+
+class NumpyVectorStore:
+    def __init__(self, path: Path):
+        with open(path / META_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.version: str = meta["version"]
+        self.rows: int = meta["rows"]
+
+        self.embeddings = np.load(path / "embeddings.npy", mmap_mode="r")[: self.rows]
+        self.ids = np.load(path / "ids.npy")
+        self.chunk_ids = np.load(path / "chunk_ids.npy", mmap_mode="r")
+        self.item_names = np.load(path / "item_names.npy")
+        self.sections = np.load(path / "sections.npy", mmap_mode="r")
+        self.section_kinds = np.load(path / "section_kinds.npy")
+        self.chunk_indexes = np.load(path / "chunk_indexes.npy")
+        self.texts = np.load(path / "texts.npy", mmap_mode="r")
+
+        # icontains 필터용 소문자 배열 (text는 키워드 필터에서 필요할 때만 만든다)
+        self._item_names_lower = np.char.lower(self.item_names)
+        self._texts_lower = None
+
+    # ----------------------------------------------
+    # 필터 → boolean mask
+    # ----------------------------------------------
+    def _contains_any(self, haystack: np.ndarray, terms: List[str]) -> np.ndarray:
+        mask = np.zeros(self.rows, dtype=bool)
+        for t in terms:
+            if t:
+                mask |= np.char.find(haystack, t.lower()) >= 0
+        return mask
+
+    def _build_mask(
+        self,
+        section_kinds: Optional[List[str]] = None,
+        name_terms: Optional[List[str]] = None,
+        keyword_terms: Optional[List[str]] = None,
+        item_names: Optional[List[str]] = None,
+    ) -> Optional[np.ndarray]:
+        mask = None
+
+        if section_kinds:
+            mask = np.isin(self.section_kinds, [str(k) for k in section_kinds])
+
+        if item_names:
+            m = np.isin(self.item_names, item_names)
+            mask = m if mask is None else mask & m
+
+        if name_terms:
+            m = self._contains_any(self._item_names_lower, name_terms)
+            mask = m if mask is None else mask & m
+
+        if keyword_terms:
+            if self._texts_lower is None:
+                self._texts_lower = np.char.lower(np.asarray(self.texts))
+            m = self._contains_any(self._texts_lower, keyword_terms) | self._contains_any(
+                self._item_names_lower, keyword_terms
+            )
+            mask = m if mask is None else mask & m
+
+        return mask
+
+    # ----------------------------------------------
+    # 검색
+    # ----------------------------------------------
+    def _scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """코사인 유사도 (임베딩은 정규화되어 있으므로 내적)"""
+        if rows is not None:
+            return np.asarray(self.embeddings[rows], dtype=np.float32) @ q
+
+        if self.embeddings.dtype == np.float32:
+            return self.embeddings @ q
+
+        # q 가 (dim, 질의 수) 행렬이면 (rows, 질의 수) 점수 행렬
+        out = np.empty((self.rows, *q.shape[1:]), dtype=np.float32)
+        for start in range(0, self.rows, MATMUL_BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start : start + MATMUL_BLOCK_ROWS], dtype=np.float32)
+            out[start : start + len(block)] = block @ q
+        return out
+
+    @staticmethod
+    def _normalize(q: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(q, axis=-1, keepdims=True)
+        return np.divide(q, norm, out=q, where=norm > 0)
+
+    def _top_k(self, scores: np.ndarray, rows: Optional[np.ndarray], k: int) -> List[Chunk]:
+        kk = min(k, len(scores))
+
+        top = np.argpartition(-scores, kk - 1)[:kk]
+        top = top[np.argsort(-scores[top])]
+
+        result_rows = rows[top] if rows is not None else top
+        return [self._to_chunk(int(r), float(1.0 - scores[t])) for r, t in zip(result_rows, top)]
+
+    def _to_chunk(self, row: int, distance: float) -> Chunk:
+        c = Chunk(
+            id=int(self.ids[row]),
+            chunk_id=str(self.chunk_ids[row]),
+            item_name=str(self.item_names[row]),
+            section=str(self.sections[row]),
+            section_kind=str(self.section_kinds[row]),
+            chunk_index=int(self.chunk_indexes[row]),
+            text=str(self.texts[row]),
+        )
+        c.distance = distance
+        return c
+
+    def search(
+        self,
+        q_emb: List[float],
+        k: int,
+        section_kinds: Optional[List[str]] = None,
+        name_terms: Optional[List[str]] = None,
+        keyword_terms: Optional[List[str]] = None,
+        item_names: Optional[List[str]] = None,
+    ) -> List[Chunk]:
+        if self.rows == 0 or k <= 0:
+            return []
+
+        q = self._normalize(np.array(q_emb, dtype=np.float32))
+
+        mask = self._build_mask(section_kinds, name_terms, keyword_terms, item_names)
+        rows = None
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                return []
+
+        return self._top_k(self._scores(q, rows), rows, k)
+
+    def search_many(
+        self,
+        q_embs: List[List[float]],
+        k: int,
+        section_kinds_list: List[Optional[List[str]]],
+    ) -> List[List[Chunk]]:
+        """
+        여러 질의 top-k (배치 질의용)
+        같은 섹션 필터끼리 묶어 (rows x 질의 수) 행렬곱 1번으로 점수 계산
+        """
+        results: List[List[Chunk]] = [[] for _ in q_embs]
+        if self.rows == 0 or k <= 0 or not q_embs:
+            return results
+
+        queries = self._normalize(np.array(q_embs, dtype=np.float32))
+
+        groups: Dict[tuple, List[int]] = {}
+        for i, kinds in enumerate(section_kinds_list):
+            groups.setdefault(tuple(kinds or ()), []).append(i)
+
+        for kinds, idx in groups.items():
+            mask = self._build_mask(list(kinds) or None)
+            rows = None
+            if mask is not None:
+                rows = np.flatnonzero(mask)
+                if len(rows) == 0:
+                    continue
+
+            scores = self._scores(queries[idx].T, rows)
+            for col, i in enumerate(idx):
+                results[i] = self._top_k(np.ascontiguousarray(scores[:, col]), rows, k)
+
+        return results
+
+
+# ==================================================
+# 프로세스 전역 인스턴스 (버전 확인은 RAG_VECTOR_STORE_CHECK_SECONDS 간격)
+# ==================================================
+_store: Optional[NumpyVectorStore] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_vector_store() -> NumpyVectorStore:
+    global _store, _checked_at
+
+    interval = getattr(settings, "RAG_VECTOR_STORE_CHECK_SECONDS", 30)
+    if _store is not None and time.time() - _checked_at < interval:
+        return _store
+
+    with _lock:
+        if _store is not None and time.time() - _checked_at < interval:
+            return _store
+
+        version = get_corpus_version()
+        if _store is None or _store.version != version:
+            path = build_vector_store(version)
+            _store = NumpyVectorStore(path)
+            print(f"[VECTOR-STORE] load version={version}, rows={_store.rows}")
+
+        _checked_at = time.time()
+
+    return _store
@@ -4,26 +4,38 @@ import traceback
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from .services import retrieve_top_chunks, build_answer
+from .analysis import analyze_query
+from .services import answer_question
+from .registry import get_registry, required_models
+from .answer_cache import get_cached_answer
+from .streaming import EventStreamRenderer, sse_event, sse_response, stream_answer_events
 from .tasks import run_rag_task
 from .utils import (
-    is_medical_question,
     get_non_medical_response,
-    is_greeting,  # 추가
     get_greeting_response,  # 추가
 )
 from celery.result import AsyncResult
 
 
+def _immediate_response(mode: str, body: dict) -> Response:
+    """LLM 없이 바로 나가는 응답 (mode=stream 이면 done 이벤트 1개짜리 SSE)"""
+    if mode == "stream":
+        return sse_response(iter([sse_event("done", body)]))
+    return Response(body, status=200)
+
+
 class DrugRAGView(APIView):
     """
     약학 RAG 질의 처리 View
     - mode=async  : Celery 비동기 처리
     - mode=sync   : 기존 방식(즉시 응답)
+    - mode=stream : SSE(text/event-stream)로 토큰 스트리밍 (rag.streaming)
     """
     authentication_classes = []
     permission_classes = []
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
 
     def post(self, request):
         question = request.data.get("question")
@@ -36,10 +48,14 @@ class DrugRAGView(APIView):
         if not question:
             return Response({"detail": "question 필드가 필요합니다."}, status=400)
 
+        # 질문 분석 1회 (이후 캐시/검색/답변 생성이 같은 결과 사용)
+        analysis = analyze_query(question)
+
         # ========== 최우선 1순위: 인사말 처리 (LLM/DB 조회 없이 즉시 응답) ==========
-        if is_greeting(question):
+        if analysis.is_greeting:
             print(f"[GREETING-VIEW] 인사말 즉시 응답: '{question}'")
-            return Response(
+            return _immediate_response(
+                mode,
                 {
                     "status": "done",
                     "question": question,
@@ -48,14 +64,14 @@ class DrugRAGView(APIView):
                         "contexts": [],
                     },
                 },
-                status=200
             )
         # =================================================================
 
         # ========== 2순위: 의료 질문 검증 ==========
-        if not is_medical_question(question):
+        if not analysis.is_medical:
             print(f"[API-FILTER] 비의료 질문 차단: '{question}'")
-            return Response(
+            return _immediate_response(
+                mode,
                 {
                     "status": "rejected",
                     "question": question,
@@ -64,11 +80,26 @@ class DrugRAGView(APIView):
                         "contexts": [],
                     },
                 },
-                status=200
             )
         # ==========================================
 
-        # ========== 3순위: 비동기 모드 (Celery) ==========
+        # ========== 3순위: 답변 캐시 (모드와 상관없이 즉시 응답) ==========
+        cached = get_cached_answer(question, analysis=analysis)
+        if cached is not None:
+            return _immediate_response(
+                mode,
+                {
+                    "status": "done",
+                    "question": question,
+                    "cached": True,
+                    "result": {
+                        "answer": cached.get("answer", ""),
+                        "contexts": cached.get("contexts", []),
+                    },
+                },
+            )
+
+        # ========== 4순위: 비동기 모드 (Celery) ==========
         if mode == "async":
             task = run_rag_task.delay(question)
             return Response(
@@ -76,14 +107,18 @@ class DrugRAGView(APIView):
                 status=202,
             )
 
-        # ========== 4순위: 동기 모드 (즉시 RAG 처리) ==========
+        # ========== 5순위: 스트리밍 모드 (SSE) ==========
+        if mode == "stream":
+            print(f"[STREAM-RAG] q='{question[:30]}'")
+            return sse_response(stream_answer_events(question, k=5, analysis=analysis))
+
+        # ========== 6순위: 동기 모드 (즉시 RAG 처리) ==========
         try:
             start = time.time()
-            chunks = retrieve_top_chunks(question, k=5)
-            answer = build_answer(question, chunks)
+            result = answer_question(question, k=5, check_cache=False, analysis=analysis)
 
             elapsed = time.time() - start
-            print(f"[SYNC-RAG] q='{question[:30]}' elapsed={elapsed:.2f}s")
+            print(f"[SYNC-RAG] q='{question[:30]}' elapsed={elapsed:.2f}s cached={result['cached']}")
 
         except Exception as e:
             print(f"[ERROR] RAG 처리 오류: {e}")
@@ -93,34 +128,14 @@ class DrugRAGView(APIView):
                 status=500
             )
 
-        # ----------------------
-        # fallback context 적용
-        # ----------------------
-        if not chunks:
-            contexts = [{
-                "chunk_id": "",
-                "item_name": "",
-                "section": "",
-                "chunk_index": 0
-            }]
-        else:
-            contexts = [
-                {
-                    "chunk_id": c.chunk_id,
-                    "item_name": c.item_name,
-                    "section": c.section,
-                    "chunk_index": c.chunk_index,
-                }
-                for c in chunks
-            ]
-
         return Response(
             {
                 "status": "done",
                 "question": question,
+                "cached": result["cached"],
                 "result": {
-                    "answer": answer,
-                    "contexts": contexts,
+                    "answer": result["answer"],
+                    "contexts": result["contexts"],
                 },
             },
             status=200
@@ -173,6 +188,7 @@ class RAGTaskResultView(APIView):
                 {
                     "status": "done",
                     "question": data.get("question", ""),
+                    "cached": data.get("cached", False),
                     "result": {
                         "answer": data.get("result", {}).get("answer", ""),
                         "contexts": data.get("result", {}).get("contexts", []),
@@ -187,3 +203,16 @@ class RAGTaskResultView(APIView):
             "question": None,
             "result": None
         }, status=200)
+
+
+class RAGReadyView(APIView):
+    """
+    readiness probe: 이 프로세스가 미리 로드해야 하는 모델(RAG_PRELOAD_MODELS + RAG_DEFERRED_MODELS)이 준비됐는지
+    - 준비됨 200 / 로딩 중·실패 503
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        status = get_registry().readiness(required_models())
+        return Response(status, status=200 if status["ready"] else 503)
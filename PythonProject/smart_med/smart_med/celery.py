@@ -1,4 +1,5 @@
 from __future__ import absolute_import, unicode_literals
+import logging
 import os
 from celery import Celery
 from celery.schedules import crontab
@@ -9,43 +10,132 @@ app = Celery('smart_med')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+logger = logging.getLogger("celery")
+
+QUEUE_DEPTH_CACHE_KEY = "celery:queue_depth"
+
+# 매 분 알림 작업은 밀려서 늦게 실행되면 의미가 없으므로 다음 실행 전에 만료
+ALARM_EXPIRES = 55
+
+
+def _queue_names() -> list:
+    from django.conf import settings
+
+    queues = {settings.CELERY_TASK_DEFAULT_QUEUE}
+    queues.update(route["queue"] for route in settings.CELERY_TASK_ROUTES.values())
+    return sorted(queues)
+
+
+@app.task(name="smart_med.celery.report_queue_depth", ignore_result=True)
+def report_queue_depth():
+    """큐별 대기 작업 수를 로그 + 캐시(celery:queue_depth)에 기록"""
+    from django.conf import settings
+    from django.core.cache import cache
+
+    depths = {}
+    with app.connection_for_read() as conn:
+        channel = conn.default_channel
+        for queue in _queue_names():
+            try:
+                depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except Exception as e:
+                logger.warning(f"[QUEUE] {queue} 길이 조회 실패: {e}")
+
+    cache.set(QUEUE_DEPTH_CACHE_KEY, depths, timeout=settings.CELERY_QUEUE_DEPTH_INTERVAL * 4)
+
+    summary = ", ".join(f"{q}={n}" for q, n in depths.items())
+    if any(n >= settings.CELERY_QUEUE_DEPTH_WARN for n in depths.values()):
+        logger.warning(f"[QUEUE] 대기 작업 많음 → {summary}")
+    else:
+        logger.info(f"[QUEUE] {summary}")
+    return depths
+
 # ======================================================
 #                CELERY BEAT SCHEDULE
 # ======================================================
 
-app.conf.beat_schedule = {
-
-    # --------------------------------------------------
-    # Medication / 복약 알림 관련 작업
-    # --------------------------------------------------
-
-    "medication_send_alarms_every_minute": {
-        "task": "medications.tasks.send_med_alarms_task",
-        "schedule": crontab(minute="*"),  # 매 분 실행
-    },
-
-    "medication_check_missed_every_minute": {
-        "task": "medications.tasks.check_missed_medication",
-        "schedule": crontab(minute="*"), # 매 1분마다 체크 (운영 시 */10 등으로 변경 가능)
-    },
-
-    # 2. [통합] 재알림 (10분, 20분 체크)
-    "medication_user_reminders_every_minute": {
-        "task": "medications.tasks.send_user_reminders_task", # 👈 새로 만든 함수
-        "schedule": crontab(minute="*"),
-    },
-
-    # "medication_check_time_window": {
-    #     "task": "iot.tasks.check_medication_schedule",
-    #     "schedule": crontab(minute="*"),  # 매 분 실행
-    # },
-
-    # --------------------------------------------------
-    # IoT Device / IoT 장치 폴링 신호 전송
-    # --------------------------------------------------
-
-    "iot_send_is_time_signal_every_30s": {
-        "task": "iot.tasks.check_schedule_and_push_is_time",
-        "schedule": 30,  # 30초 간격 실행
-    },
-}
+def _beat_schedule(settings) -> dict:
+    # 복약 알림: 이벤트 스케줄러(medications.scheduler) 디스패처 1개 또는 기존 매 분 Plan 스캔 3개
+    if settings.ALARM_SCHEDULER_ENABLED:
+        MEDICATION_SCHEDULE = {
+            "medication_dispatch_due_alarms": {
+                "task": "medications.tasks.dispatch_due_alarms_task",
+                "schedule": settings.ALARM_DISPATCH_INTERVAL,
+                "options": {"expires": settings.ALARM_DISPATCH_INTERVAL},
+            },
+        }
+    else:
+        MEDICATION_SCHEDULE = {
+            "medication_send_alarms_every_minute": {
+                "task": "medications.tasks.send_med_alarms_task",
+                "schedule": crontab(minute="*"),  # 매 분 실행
+                "options": {"expires": ALARM_EXPIRES},
+            },
+
+            "medication_check_missed_every_minute": {
+                "task": "medications.tasks.check_missed_medication",
+                "schedule": crontab(minute="*"), # 매 1분마다 체크 (운영 시 */10 등으로 변경 가능)
+                "options": {"expires": ALARM_EXPIRES},
+            },
+
+            # 2. [통합] 재알림 (10분, 20분 체크)
+            "medication_user_reminders_every_minute": {
+                "task": "medications.tasks.send_user_reminders_task", # 👈 새로 만든 함수
+                "schedule": crontab(minute="*"),
+                "options": {"expires": ALARM_EXPIRES},
+            },
+        }
+
+    return {
+
+        # --------------------------------------------------
+        # Medication / 복약 알림 관련 작업
+        # --------------------------------------------------
+
+        **MEDICATION_SCHEDULE,
+
+        # "medication_check_time_window": {
+        #     "task": "iot.tasks.check_medication_schedule",
+        #     "schedule": crontab(minute="*"),  # 매 분 실행
+        # },
+
+        # 알림 대기열(notifications.outbox): 실패 알림 재시도 + 남은 PENDING 발송
+        "notification_dispatch_outbox": {
+            "task": "notifications.tasks.dispatch_notification_outbox_task",
+            "schedule": settings.NOTIFICATION_OUTBOX_INTERVAL,
+            "options": {"expires": settings.NOTIFICATION_OUTBOX_INTERVAL},
+        },
+
+        # 보관 기간(NOTIFICATION_RETENTION_DAYS) 지난 SUCCESS / FAILED 알림 삭제
+        "notification_purge_old": {
+            "task": "notifications.tasks.purge_old_notifications_task",
+            "schedule": crontab(hour=4, minute=30),  # 매일 04:30 (KST)
+        },
+
+        # --------------------------------------------------
+        # IoT Device / IoT 장치 폴링 신호 전송
+        # --------------------------------------------------
+
+        "iot_send_is_time_signal_every_30s": {
+            "task": "iot.tasks.check_schedule_and_push_is_time",
+            "schedule": 30,  # 30초 간격 실행
+            "options": {"expires": 25},
+        },
+
+        # --------------------------------------------------
+        # 모니터링 / 큐 길이 기록
+        # --------------------------------------------------
+
+        "celery_report_queue_depth": {
+            "task": "smart_med.celery.report_queue_depth",
+            "schedule": settings.CELERY_QUEUE_DEPTH_INTERVAL,
+        },
+    }
+
+
+@app.on_after_configure.connect
+def _setup_beat_schedule(sender, **kwargs):
+    """beat 주기는 Django settings 값 사용 (설정이 로드된 뒤에 구성)"""
+    from django.conf import settings
+
+    sender.conf.beat_schedule = _beat_schedule(settings)
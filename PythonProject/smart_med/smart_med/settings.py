@@ -19,6 +19,12 @@ FIREBASE_CREDENTIAL_PATH = env(
     "FIREBASE_CREDENTIAL_PATH",
     default="/run/secrets/smart_med_firebase_admin.json"
 )
+# FCM 일괄 발송 (notifications.services.send_fcm_batch): send_each 1회 메시지 수(최대 500) / 배치 동시 발송 스레드 수
+FCM_BATCH_SIZE = env.int("FCM_BATCH_SIZE", default=500)
+FCM_SEND_WORKERS = env.int("FCM_SEND_WORKERS", default=4)
+# 이 기간(일) 동안 앱에서 다시 등록되지 않은 FCM 토큰은 발송 대상에서 제외 (users.FcmDevice.last_seen_at)
+# 기본 0 = 제한 없음: 앱이 토큰을 다시 보내지 않아도 알림이 빠지면 안 되므로, 죽은 토큰은 발송 오류로만 비활성화
+FCM_TOKEN_STALE_DAYS = env.int("FCM_TOKEN_STALE_DAYS", default=0)
 
 # 와일드카드(*)는 CSRF_TRUSTED_ORIGINS에 허용되지 않아요.
 # 실제 접근 도메인/포트로 명시해 주세요 (개발 기본 예시)
@@ -50,6 +56,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # pg_trgm (rag.Chunk trigram 인덱스)
 
     "rest_framework",
     "drf_spectacular",
@@ -62,6 +69,7 @@ INSTALLED_APPS = [
     "medications",
     "iot",
     "health",
+    "notifications",
     "rag.apps.RagConfig",
 ]
 
@@ -91,6 +99,133 @@ CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Seoul"
 CELERY_ENABLE_UTC = False
 
+# 큐 분리: 복약 알림(alarms)은 느린 LLM 작업(rag)과 다른 워커에서 처리 (docker-compose 참고)
+# ※ 큐 안에서의 작업 우선순위(priority)는 쓰지 않음 → 알림 지연은 워커 분리로만 막음
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "medications.tasks.send_med_alarms_task": {"queue": "alarms"},
+    "medications.tasks.check_missed_medication": {"queue": "alarms"},
+    "medications.tasks.send_user_reminders_task": {"queue": "alarms"},
+    "medications.tasks.dispatch_due_alarms_task": {"queue": "alarms"},
+    "notifications.tasks.purge_old_notifications_task": {"queue": "default"},
+    "notifications.tasks.*": {"queue": "alarms"},
+    "iot.tasks.*": {"queue": "alarms"},
+    "rag.tasks.*": {"queue": "rag"},
+}
+# 워커가 미리 가져가는 작업 수 = concurrency × 1 (긴 작업이 다른 작업을 붙잡지 않도록)
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# 작업별 시간 제한 (soft 초과 시 SoftTimeLimitExceeded, hard 초과 시 강제 종료)
+# ※ hard/soft 제한은 prefork 풀에서만 동작 → threads 풀인 rag 워커는 RAG_LLM_TIMEOUT 으로도 제한
+CELERY_TASK_SOFT_TIME_LIMIT = env.int("CELERY_TASK_SOFT_TIME_LIMIT", default=300)
+CELERY_TASK_TIME_LIMIT = env.int("CELERY_TASK_TIME_LIMIT", default=360)
+ALARM_TASK_SOFT_TIME_LIMIT = env.int("ALARM_TASK_SOFT_TIME_LIMIT", default=45)
+ALARM_TASK_TIME_LIMIT = env.int("ALARM_TASK_TIME_LIMIT", default=55)
+RAG_TASK_SOFT_TIME_LIMIT = env.int("RAG_TASK_SOFT_TIME_LIMIT", default=120)
+RAG_TASK_TIME_LIMIT = env.int("RAG_TASK_TIME_LIMIT", default=150)
+
+_ALARM_LIMITS = {"soft_time_limit": ALARM_TASK_SOFT_TIME_LIMIT, "time_limit": ALARM_TASK_TIME_LIMIT}
+CELERY_TASK_ANNOTATIONS = {
+    "medications.tasks.send_med_alarms_task": _ALARM_LIMITS,
+    "medications.tasks.check_missed_medication": _ALARM_LIMITS,
+    "medications.tasks.send_user_reminders_task": _ALARM_LIMITS,
+    "medications.tasks.dispatch_due_alarms_task": _ALARM_LIMITS,
+    "notifications.tasks.dispatch_notification_outbox_task": _ALARM_LIMITS,
+    "iot.tasks.check_schedule_and_push_is_time": _ALARM_LIMITS,
+    "iot.tasks.check_medication_schedule": _ALARM_LIMITS,
+    "rag.tasks.run_rag_task": {"soft_time_limit": RAG_TASK_SOFT_TIME_LIMIT, "time_limit": RAG_TASK_TIME_LIMIT},
+}
+
+# 큐 길이 기록 주기(초) / 경고 기준
+CELERY_QUEUE_DEPTH_INTERVAL = env.int("CELERY_QUEUE_DEPTH_INTERVAL", default=30)
+CELERY_QUEUE_DEPTH_WARN = env.int("CELERY_QUEUE_DEPTH_WARN", default=20)
+
+# 복약 알림 이벤트 스케줄러 (medications.scheduler)
+# True: Plan 변경 시 Redis sorted set 에 이벤트 등록 + dispatch_due_alarms_task 가 도래한 이벤트만 발송
+# False: 기존 매 분 Plan 스캔 작업 3개 (celery.py beat 스케줄도 이 값으로 전환)
+ALARM_SCHEDULER_ENABLED = env.bool("ALARM_SCHEDULER_ENABLED", default=True)
+ALARM_DISPATCH_INTERVAL = env.int("ALARM_DISPATCH_INTERVAL", default=20)  # 디스패처 실행 간격(초)
+ALARM_DISPATCH_BATCH = env.int("ALARM_DISPATCH_BATCH", default=5000)  # 한 번에 꺼낼 최대 이벤트 수
+ALARM_EVENT_MAX_DELAY_SECONDS = env.int("ALARM_EVENT_MAX_DELAY_SECONDS", default=300)  # 정시/재알림이 이보다 늦으면 버림
+# 꺼낸 이벤트를 처리 완료(ack) 없이 이 시간(초)이 지나면 다시 꺼냄 (ALARM_TASK_TIME_LIMIT 보다 길게)
+ALARM_EVENT_LEASE_SECONDS = env.int("ALARM_EVENT_LEASE_SECONDS", default=120)
+
+# 알림 발송 대기열 (notifications.outbox): 알림 작업은 Notification 행 등록 후 바로 발송, 실패분은 주기적으로 재시도
+NOTIFICATION_OUTBOX_INTERVAL = env.int("NOTIFICATION_OUTBOX_INTERVAL", default=30)  # 재시도 디스패처 실행 간격(초)
+NOTIFICATION_OUTBOX_BATCH = env.int("NOTIFICATION_OUTBOX_BATCH", default=500)  # 트랜잭션 1개에서 잠그고 보낼 행 수
+NOTIFICATION_OUTBOX_MAX_BATCHES = env.int("NOTIFICATION_OUTBOX_MAX_BATCHES", default=20)  # 1회 실행당 최대 배치 수
+NOTIFICATION_MAX_ATTEMPTS = env.int("NOTIFICATION_MAX_ATTEMPTS", default=5)  # 이 횟수만큼 실패하면 FAILED
+NOTIFICATION_RETRY_BASE_SECONDS = env.int("NOTIFICATION_RETRY_BASE_SECONDS", default=30)  # 재시도 간격 = base × 2^(실패 횟수-1)
+NOTIFICATION_RETRY_MAX_SECONDS = env.int("NOTIFICATION_RETRY_MAX_SECONDS", default=3600)
+# 끝난 알림(SUCCESS / FAILED) 보관 기간(일), 매일 purge_old_notifications_task 가 삭제 (최소 2일, dedupe_key 유지)
+NOTIFICATION_RETENTION_DAYS = env.int("NOTIFICATION_RETENTION_DAYS", default=30)
+NOTIFICATION_PURGE_CHUNK = env.int("NOTIFICATION_PURGE_CHUNK", default=5000)  # DELETE 1회당 행 수
+
+# === RAG 설정 ===
+# HNSW 검색 후보 수 (클수록 recall↑ / 속도↓, 요청별로 ef_search 인자로 덮어쓸 수 있음)
+RAG_HNSW_EF_SEARCH = env.int("RAG_HNSW_EF_SEARCH", default=40)
+# 약품명 등 추가 필터로 후보가 부족할 때 인덱스를 이어서 탐색 (strict_order / relaxed_order, 빈 값이면 사용 안 함)
+# ※ pgvector 0.8+ 전용 → 이전 버전에서 켜면 모든 검색이 "unrecognized configuration parameter" 로 실패 (SELECT extversion FROM pg_extension WHERE extname = 'vector')
+RAG_HNSW_ITERATIVE_SCAN = env("RAG_HNSW_ITERATIVE_SCAN", default="")
+
+# 하이브리드 검색(약품명/키워드 trigram + 벡터, RRF): 각 순위의 후보 수 / RRF 상수 / 어휘 순위 가중치
+RAG_HYBRID_CANDIDATES = env.int("RAG_HYBRID_CANDIDATES", default=50)
+RAG_HYBRID_RRF_K = env.int("RAG_HYBRID_RRF_K", default=60)
+RAG_HYBRID_LEXICAL_WEIGHT = env.float("RAG_HYBRID_LEXICAL_WEIGHT", default=1.0)
+
+# 제품명 사전(rag.product_index): 토큰 1개가 이보다 많은 제품에 걸리면 일반 단어로 보고 무시 / Chunk 버전 확인 주기
+RAG_PRODUCT_MAX_MATCHES = env.int("RAG_PRODUCT_MAX_MATCHES", default=30)
+RAG_PRODUCT_INDEX_CHECK_SECONDS = env.int("RAG_PRODUCT_INDEX_CHECK_SECONDS", default=30)
+
+# 검색 백엔드: "pgvector"(DB HNSW) / "numpy"(프로세스 내 mmap 행렬, CPU 전용 배포용)
+RAG_RETRIEVAL_BACKEND = env("RAG_RETRIEVAL_BACKEND", default="pgvector")
+RAG_VECTOR_STORE_DIR = env("RAG_VECTOR_STORE_DIR", default=str(BASE_DIR / "data" / "vector_store"))
+RAG_VECTOR_STORE_DTYPE = env("RAG_VECTOR_STORE_DTYPE", default="float32")  # float32 / float16
+RAG_VECTOR_STORE_CHECK_SECONDS = env.int("RAG_VECTOR_STORE_CHECK_SECONDS", default=30)
+# 증상 추천 역색인(rag.symptom) Chunk 버전 확인 주기
+RAG_SYMPTOM_INDEX_CHECK_SECONDS = env.int("RAG_SYMPTOM_INDEX_CHECK_SECONDS", default=30)
+
+# 적재 파이프라인 (python manage.py load_rag_data)
+RAG_EMBED_BATCH_SIZE = env.int("RAG_EMBED_BATCH_SIZE", default=64)
+RAG_EMBED_WORKERS = env.int("RAG_EMBED_WORKERS", default=0)  # 0/1 = 단일 프로세스
+RAG_INGEST_WRITE_BATCH = env.int("RAG_INGEST_WRITE_BATCH", default=1000)
+
+# 질의 임베딩 캐시 (프로세스 LRU 크기 / Redis 보관 시간)
+RAG_EMBED_CACHE_SIZE = env.int("RAG_EMBED_CACHE_SIZE", default=2048)
+RAG_EMBED_CACHE_TTL = env.int("RAG_EMBED_CACHE_TTL", default=60 * 60 * 24 * 7)
+
+# 최종 답변 캐시 (완전일치 + 선택적 의미 유사도 매칭, Chunk 재색인 시 자동 무효화)
+RAG_ANSWER_CACHE_ENABLED = env.bool("RAG_ANSWER_CACHE_ENABLED", default=True)
+RAG_ANSWER_CACHE_TTL = env.int("RAG_ANSWER_CACHE_TTL", default=60 * 60 * 6)
+RAG_ANSWER_CACHE_SEMANTIC = env.bool("RAG_ANSWER_CACHE_SEMANTIC", default=False)
+RAG_ANSWER_CACHE_SIMILARITY = env.float("RAG_ANSWER_CACHE_SIMILARITY", default=0.97)
+RAG_ANSWER_CACHE_RECENT = env.int("RAG_ANSWER_CACHE_RECENT", default=500)
+
+# LLM 배치 추론 (rag.inference): 동시에 들어온 요청을 최대 N개까지, 최대 대기 ms 동안 모아서 generate
+RAG_LLM_MAX_BATCH_SIZE = env.int("RAG_LLM_MAX_BATCH_SIZE", default=8)
+RAG_LLM_BATCH_WAIT_MS = env.int("RAG_LLM_BATCH_WAIT_MS", default=20)
+# 한 번의 generate 결과를 기다리는 최대 시간(초) (threads 풀 rag 워커의 시간 제한 역할)
+# 시간이 지나면 호출자는 TimeoutError, 배치 generate 도 deadline StoppingCriteria 로 중단 (rag.inference)
+RAG_LLM_TIMEOUT = env.int("RAG_LLM_TIMEOUT", default=110)
+# mode=stream 단독 generate 동시 실행 수 (넘으면 배치 추론으로 생성, 배치 스레드가 밀리지 않도록)
+RAG_STREAM_MAX_CONCURRENCY = env.int("RAG_STREAM_MAX_CONCURRENCY", default=2)
+# 프롬프트 템플릿 고정 머리말의 KV cache 재사용 (단일 요청 generate 에만 적용)
+RAG_LLM_PREFIX_CACHE = env.bool("RAG_LLM_PREFIX_CACHE", default=True)
+# LLM 로드 정밀도: auto(GPU fp16 / CPU fp32) / fp32 / bf16 / int8(CPU 동적 양자화) / int8_artifact(quantize_llm 결과)
+RAG_LLM_PRECISION = env("RAG_LLM_PRECISION", default="auto")
+RAG_LLM_QUANTIZED_PATH = env("RAG_LLM_QUANTIZED_PATH", default="/models/merged_qwen25-3b-med-int8")
+# Speculative decoding: 같은 tokenizer 를 쓰는 작은 draft 모델 경로 (빈 값이면 사용 안 함, 단일 요청 generate 에만 적용)
+RAG_DRAFT_MODEL_PATH = env("RAG_DRAFT_MODEL_PATH", default="")
+RAG_DRAFT_NUM_TOKENS = env.int("RAG_DRAFT_NUM_TOKENS", default=5)
+
+# 모델 미리 로드 (rag.registry): off(첫 요청 때) / background(백그라운드 스레드) / sync(시작 시, gunicorn --preload 용)
+RAG_PRELOAD_MODE = env("RAG_PRELOAD_MODE", default="off")
+# 위 방식으로 로드할 모델 (sync 면 gunicorn 마스터 부팅 중 로드되므로 가벼운 임베딩 모델만)
+RAG_PRELOAD_MODELS = env.list("RAG_PRELOAD_MODELS", default=["embedder"])
+# 항상 백그라운드로 로드할 모델 (sync 면 fork 된 워커 안에서 시작, 마스터 부팅을 막지 않음)
+# 기본은 없음 → web 은 첫 sync/stream 요청 때 LLM 로드 (생성은 보통 rag 워커), rag 워커만 llm 지정 (docker-compose)
+RAG_DEFERRED_MODELS = env.list("RAG_DEFERRED_MODELS", default=[])
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
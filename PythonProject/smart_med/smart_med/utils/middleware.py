@@ -56,6 +56,10 @@ class DisableChunkedMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
 
+        # SSE(rag mode=stream)는 버퍼링하면 의미가 없으므로 그대로 흘려보냄
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+
         # chunked encoding 방지
         if response.streaming:
             response.streaming = False
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import FcmDevice, User
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -29,3 +29,12 @@ class UserAdmin(BaseUserAdmin):
 
     readonly_fields = ("uuid","created_at","updated_at","last_login")
     filter_horizontal = ("groups","user_permissions")
+
+
+@admin.register(FcmDevice)
+class FcmDeviceAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "device_id", "platform", "is_active", "last_seen_at", "deactivated_reason")
+    list_filter = ("is_active", "platform", "deactivated_reason")
+    search_fields = ("user__email", "user__username", "device_id", "token")
+    raw_id_fields = ("user",)
+    readonly_fields = ("created_at", "deactivated_at")
@@ -96,7 +96,11 @@ register_fcm_docs = extend_schema(
     request={
         "application/json": {
             "type": "object",
-            "properties": {"fcm_token": {"type": "string"}},
+            "properties": {
+                "fcm_token": {"type": "string"},
+                "device_id": {"type": "string", "description": "기기 식별자 (선택, 같은 기기의 이전 토큰 비활성화)"},
+                "platform": {"type": "string", "description": "android / ios (선택)"},
+            },
             "required": ["fcm_token"]
         }
     },
@@ -0,0 +1,76 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_user_tokens(apps, schema_editor):
+    """기존 User.fcm_token → FcmDevice (같은 토큰이 여러 유저에 있으면 마지막 로그인 유저)"""
+    User = apps.get_model("users", "User")
+    FcmDevice = apps.get_model("users", "FcmDevice")
+
+    devices = {}
+    users = User.objects.exclude(fcm_token__isnull=True).exclude(fcm_token="").order_by(models.F("last_login").asc(nulls_first=True), "id")
+    for user in users.only("id", "fcm_token", "updated_at").iterator():
+        devices[user.fcm_token] = FcmDevice(user_id=user.id, token=user.fcm_token, last_seen_at=user.updated_at)
+    FcmDevice.objects.bulk_create(devices.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_remove_user_is_admin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FcmDevice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=512, unique=True)),
+                (
+                    "device_id",
+                    models.CharField(blank=True, default="", help_text="앱이 보내는 기기 식별자 (선택)", max_length=128),
+                ),
+                (
+                    "platform",
+                    models.CharField(blank=True, default="", help_text="android / ios (선택)", max_length=20),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "last_seen_at",
+                    models.DateTimeField(default=django.utils.timezone.now, help_text="마지막 토큰 등록(앱 실행) 시각"),
+                ),
+                ("deactivated_at", models.DateTimeField(blank=True, null=True)),
+                ("deactivated_reason", models.CharField(blank=True, default="", max_length=50)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fcm_devices",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "fcm_devices",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("is_active", True)),
+                        fields=["user"],
+                        name="fcm_device_active_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(copy_user_tokens, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 import uuid
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import RegexValidator, MinValueValidator
 from django.db.models.functions import Lower
@@ -141,11 +143,30 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
-#fcm user테이블 속성으로 추가해서 삭제
-# class FcmToken(models.Model):
-#     user = models.ForeignKey(User, on_delete=models.CASCADE)
-#     token = models.CharField(max_length=300)
-#     updated_at = models.DateTimeField(auto_now=True)
+# 디바이스별 FCM 토큰 (User.fcm_token 은 마지막 등록 토큰만 보관 → 기존 코드 호환용)
+# 알림은 활성 토큰 전체로 발송하고, 만료 토큰은 발송 결과(UNREGISTERED 등)로 자동 비활성화 (notifications.tokens)
+class FcmDevice(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="fcm_devices")
+    token = models.CharField(max_length=512, unique=True)
+    device_id = models.CharField(max_length=128, blank=True, default="", help_text="앱이 보내는 기기 식별자 (선택)")
+    platform = models.CharField(max_length=20, blank=True, default="", help_text="android / ios (선택)")
+
+    is_active = models.BooleanField(default=True)
+    last_seen_at = models.DateTimeField(default=timezone.now, help_text="마지막 토큰 등록(앱 실행) 시각")
+    deactivated_at = models.DateTimeField(null=True, blank=True)
+    deactivated_reason = models.CharField(max_length=50, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "fcm_devices"
+        indexes = [
+            # 발송 시 조회: user_id IN (...) AND is_active
+            models.Index(fields=["user"], name="fcm_device_active_idx", condition=Q(is_active=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.device_id or self.token[:12]}"
 
 #이메일인증 캐싱처리로 삭제
 # class EmailVerification(models.Model):
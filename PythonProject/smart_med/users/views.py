@@ -17,6 +17,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from notifications.services import send_fcm_to_token
+from notifications.tokens import register_token
 from rest_framework.decorators import api_view, permission_classes
 
 from .serializers import (
@@ -167,8 +168,13 @@ class RegisterFcmTokenView(APIView):
             return Response({"detail": "fcm_token 누락"}, status=400)
 
         user = request.user
-        user.fcm_token = token
-        user.save(update_fields=["fcm_token"])
+        # 디바이스별 토큰 등록 (last_seen 갱신, 같은 기기의 이전 토큰 비활성화)
+        register_token(
+            user,
+            token,
+            device_id=request.data.get("device_id") or "",
+            platform=request.data.get("platform") or "",
+        )
 
         cache_key = f"just_logged_in:{user.id}"
         is_just_logged_in = cache.get(cache_key)